@@ -2,7 +2,14 @@
 Blog admin configuration
 """
 from django.contrib import admin
-from .models import Post, Category
+from .models import Post, PostTag, Category, Tag
+
+
+class PostTagInline(admin.TabularInline):
+    model = PostTag
+    fields = ['tag']
+    autocomplete_fields = ['tag']
+    extra = 1
 
 
 @admin.register(Post)
@@ -12,6 +19,7 @@ class PostAdmin(admin.ModelAdmin):
     search_fields = ['title', 'excerpt', 'content']
     prepopulated_fields = {'slug': ('title',)}
     date_hierarchy = 'published_at'
+    inlines = [PostTagInline]
     
     fieldsets = (
         ('Basic Information', {
@@ -22,7 +30,7 @@ class PostAdmin(admin.ModelAdmin):
             'description': 'Write content in Markdown format'
         }),
         ('Metadata', {
-            'fields': ('tags', 'status', 'featured', 'published_at')
+            'fields': ('status', 'featured', 'published_at')
         }),
     )
     
@@ -37,3 +45,10 @@ class CategoryAdmin(admin.ModelAdmin):
     list_display = ['name', 'slug']
     prepopulated_fields = {'slug': ('name',)}
     search_fields = ['name']
+
+
+@admin.register(Tag)
+class TagAdmin(admin.ModelAdmin):
+    list_display = ['name', 'slug', 'post_count']
+    prepopulated_fields = {'slug': ('name',)}
+    search_fields = ['name']
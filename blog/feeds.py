@@ -0,0 +1,79 @@
+"""
+Blog feeds
+RSS and Atom feeds of the latest published posts, for the whole blog or
+one category. Items carry the stored content HTML; only rows whose HTML
+is missing or from an older pipeline are rendered, in one batch.
+PostFeedView adds conditional GET and page caching.
+"""
+from django.contrib.syndication.views import Feed
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+
+from core.rendering import content_hash, is_stale, render_many
+
+from .models import Post
+
+FEED_ITEMS = 20
+
+
+class LatestPostsFeed(Feed):
+    """RSS 2.0 feed; the category is resolved by the view"""
+
+    def get_object(self, request, category=None):
+        return category
+
+    def title(self, category):
+        return f"Blog - {category.name}" if category else "Blog"
+
+    def link(self, category):
+        if category:
+            return reverse('blog:category', kwargs={'category_slug': category.slug})
+        return reverse('blog:list')
+
+    def description(self, category):
+        return f"Latest posts in {category.name}" if category else "Latest posts"
+
+    def published(self, category):
+        """The feed's posts, newest first, before the FEED_ITEMS cut"""
+        queryset = Post.objects.filter(status='published')
+        return queryset.filter(category=category) if category else queryset
+
+    def items(self, category):
+        queryset = self.published(category).select_related('author', 'category').defer('featured_image_variants')
+        posts = list(queryset[:FEED_ITEMS])
+        # As get_content_html does for the detail page, batched: rows saved
+        # before content_html existed, or rendered by an older pipeline
+        stale = [post for post in posts if is_stale(post, 'content', 'content_html_hash')]
+        if stale:
+            for post, html in zip(stale, render_many([post.content for post in stale])):
+                post.content_html, post.content_html_hash = html, content_hash(post.content)
+            # No signals or updated_at, like render_cached's write-back
+            Post.objects.bulk_update(stale, ['content_html', 'content_html_hash'])
+        return posts
+
+    def item_title(self, post):
+        return post.title
+
+    def item_description(self, post):
+        # Brought up to date in items()
+        return post.content_html
+
+    def item_author_name(self, post):
+        return post.author.get_full_name() or post.author.username
+
+    def item_pubdate(self, post):
+        return post.published_at
+
+    def item_updateddate(self, post):
+        return post.updated_at
+
+    def item_categories(self, post):
+        return [post.category.name] if post.category else []
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    """Atom 1.0 feed"""
+    feed_type = Atom1Feed
+
+    def subtitle(self, category):
+        return self.description(category)
@@ -0,0 +1,44 @@
+# Generated by Django 5.0.1 on 2026-10-17 06:53
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_published_at(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Post.objects.filter(status='published', published_at__isnull=True).update(published_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_post_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_published_at, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_published_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_category_published_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='post_featured_idx',
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['-published_at', '-created_at', '-id'], name='post_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['category', '-published_at', '-created_at', '-id'], name='post_category_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('featured', True), ('status', 'published')), fields=['-published_at', '-created_at', '-id'], name='post_featured_idx'),
+        ),
+    ]
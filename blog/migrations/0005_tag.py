@@ -0,0 +1,116 @@
+# Generated by Django 5.0.1 on 2026-10-17 07:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from core import slugs
+
+
+def split_tag_strings(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Tag = apps.get_model('blog', 'Tag')
+    PostTag = apps.get_model('blog', 'PostTag')
+
+    # One tag per name, ignoring case and surrounding space ("Django" and
+    # "django " share one; "C++", "C#" and "C" stay apart)
+    names = {}
+    links = {}
+    posts = Post.objects.exclude(tag_names='').values_list(
+        'pk', 'tag_names', 'status', 'published_at', 'created_at',
+    )
+    for post_id, tag_names, status, published_at, created_at in posts.iterator():
+        for name in tag_names.split(','):
+            name = ' '.join(name.split())[:50]
+            if not name:
+                continue
+            key = name.casefold()
+            names.setdefault(key, name)
+            links[post_id, key] = {
+                'published': status == 'published',
+                'published_at': published_at,
+                'created_at': created_at,
+            }
+
+    # Slugs as Tag.save allocates them: suffixed on collision, with a
+    # fallback for names that slugify to nothing ("日本語")
+    tags = {key: Tag(name=name) for key, name in names.items()}
+    for tag, slug in zip(tags.values(), slugs.allocate_many(Tag, list(names.values()))):
+        tag.slug = slug
+    Tag.objects.bulk_create(tags.values(), batch_size=1000)
+    slug_ids = dict(Tag.objects.values_list('slug', 'pk'))
+    tag_ids = {key: slug_ids[tag.slug] for key, tag in tags.items()}
+    PostTag.objects.bulk_create(
+        (PostTag(post_id=post_id, tag_id=tag_ids[key], **sort_key) for (post_id, key), sort_key in links.items()),
+        batch_size=1000,
+    )
+    counts = (
+        PostTag.objects.filter(tag=OuterRef('pk'), published=True)
+        .values('tag').annotate(count=Count('post')).values('count')
+    )
+    Tag.objects.update(post_count=Coalesce(Subquery(counts), 0))
+
+
+def join_tag_strings(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    for post in Post.objects.prefetch_related('tags').iterator(chunk_size=1000):
+        tag_names = ', '.join(tag.name for tag in post.tags.all())
+        if tag_names:
+            Post.objects.filter(pk=post.pk).update(tag_names=tag_names[:200])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_post_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('slug', models.SlugField(blank=True, unique=True)),
+                ('post_count', models.PositiveIntegerField(default=0, editable=False)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.RenameField(
+            model_name='post',
+            old_name='tags',
+            new_name='tag_names',
+        ),
+        migrations.CreateModel(
+            name='PostTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('published', models.BooleanField(default=False, editable=False)),
+                ('published_at', models.DateTimeField(editable=False, null=True)),
+                ('created_at', models.DateTimeField(editable=False, null=True)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_links', to='blog.post')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_links', to='blog.tag')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='tags',
+            field=models.ManyToManyField(blank=True, related_name='posts', through='blog.PostTag', to='blog.tag'),
+        ),
+        migrations.AddIndex(
+            model_name='posttag',
+            index=models.Index(condition=models.Q(('published', True)), fields=['tag', '-published_at', '-created_at', '-post'], name='posttag_archive_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='posttag',
+            constraint=models.UniqueConstraint(fields=('post', 'tag'), name='posttag_unique_post_tag'),
+        ),
+        migrations.RunPython(split_tag_strings, join_tag_strings),
+        migrations.RemoveField(
+            model_name='post',
+            name='tag_names',
+        ),
+    ]
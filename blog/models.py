@@ -3,11 +3,14 @@ Blog app models
 Writing/articles with markdown support
 """
 from django.db import models
-from django.utils.text import slugify
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
 from django.urls import reverse
 from django.contrib.auth.models import User
-import markdown
-import bleach
+from core.images import derivatives_cached
+from core.rendering import render_cached
+from core.slugs import save_with_slug
 
 
 class Category(models.Model):
@@ -20,9 +23,38 @@ class Category(models.Model):
         ordering = ['name']
     
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.name)
-        super().save(*args, **kwargs)
+        save_with_slug(self, 'name', lambda: super(Category, self).save(*args, **kwargs))
+    
+    def __str__(self):
+        return self.name
+
+
+class TagQuerySet(models.QuerySet):
+    def refresh_post_counts(self):
+        """Recount published posts for these tags in a single UPDATE"""
+        counts = (
+            PostTag.objects.filter(tag=OuterRef('pk'), published=True)
+            .values('tag').annotate(count=Count('post')).values('count')
+        )
+        return self.update(post_count=Coalesce(Subquery(counts), 0))
+
+
+class Tag(models.Model):
+    """Post tag, with a denormalized count of its published posts"""
+    name = models.CharField(max_length=50, unique=True)
+    slug = models.SlugField(max_length=50, unique=True, blank=True)
+    post_count = models.PositiveIntegerField(default=0, editable=False)
+    
+    objects = TagQuerySet.as_manager()
+    
+    class Meta:
+        ordering = ['name']
+    
+    def save(self, *args, **kwargs):
+        save_with_slug(self, 'name', lambda: super(Tag, self).save(*args, **kwargs))
+    
+    def get_absolute_url(self):
+        return reverse('blog:tag', kwargs={'tag_slug': self.slug})
     
     def __str__(self):
         return self.name
@@ -41,11 +73,14 @@ class Post(models.Model):
     
     excerpt = models.TextField(max_length=300, help_text="Brief summary for post listings")
     content = models.TextField(help_text="Full post content in Markdown")
+    content_html = models.TextField(blank=True, editable=False)
+    content_html_hash = models.CharField(max_length=64, blank=True, editable=False)
     
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name='posts')
-    tags = models.CharField(max_length=200, blank=True, help_text="Comma-separated tags")
+    tags = models.ManyToManyField(Tag, through='PostTag', blank=True, related_name='posts')
     
     featured_image = models.ImageField(upload_to='blog/%Y/%m/', blank=True, null=True)
+    featured_image_variants = models.JSONField(default=dict, blank=True, editable=False)
     
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
     featured = models.BooleanField(default=False, help_text="Feature on homepage")
@@ -56,40 +91,95 @@ class Post(models.Model):
     
     class Meta:
         ordering = ['-published_at', '-created_at']
+        # Partial indexes matching the public list/home query shapes, so the
+        # published filter and default ordering are served without a sort.
+        # The trailing id makes the list key unique for cursor pagination.
+        indexes = [
+            models.Index(
+                fields=['-published_at', '-created_at', '-id'],
+                condition=models.Q(status='published'),
+                name='post_published_idx',
+            ),
+            models.Index(
+                fields=['category', '-published_at', '-created_at', '-id'],
+                condition=models.Q(status='published'),
+                name='post_category_published_idx',
+            ),
+            models.Index(
+                fields=['-published_at', '-created_at', '-id'],
+                condition=models.Q(status='published', featured=True),
+                name='post_featured_idx',
+            ),
+        ]
     
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.title)
-        super().save(*args, **kwargs)
+        # Published posts always carry a date; cursor pagination keys on it
+        if self.status == 'published' and not self.published_at:
+            self.published_at = timezone.now()
+        render_cached(self, 'content', 'content_html', 'content_html_hash', persist=False)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if 'content' in update_fields:
+                update_fields |= {'content_html', 'content_html_hash'}
+            if 'status' in update_fields:
+                update_fields.add('published_at')
+            kwargs['update_fields'] = update_fields
+        save_with_slug(self, 'title', lambda: super(Post, self).save(*args, **kwargs))
+        # After saving, so a new upload has its final storage name
+        derivatives_cached(self, 'featured_image', 'featured_image_variants')
     
     def get_absolute_url(self):
         return reverse('blog:detail', kwargs={'slug': self.slug})
     
+    def sync_tag_links(self):
+        """Copy this post's list ordering onto its tag links"""
+        PostTag.objects.filter(post=self).update(**PostTag.sort_key(self))
+    
     def get_content_html(self):
-        """Convert markdown to safe HTML"""
-        html = markdown.markdown(
-            self.content,
-            extensions=['fenced_code', 'codehilite', 'tables', 'toc']
-        )
-        allowed_tags = [
-            'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
-            'strong', 'em', 'a', 'ul', 'ol', 'li',
-            'blockquote', 'code', 'pre', 'hr', 'br',
-            'table', 'thead', 'tbody', 'tr', 'th', 'td',
-            'img', 'div', 'span'
+        """Return the stored HTML, re-rendering it if the source changed"""
+        return render_cached(self, 'content', 'content_html', 'content_html_hash')
+    
+    def __str__(self):
+        return self.title
+
+
+class PostTag(models.Model):
+    """
+    A post's tag, carrying a copy of the post's publication state and list
+    ordering so tag archives page through one index, without a join or sort
+    """
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='tag_links')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='post_links')
+    
+    published = models.BooleanField(default=False, editable=False)
+    published_at = models.DateTimeField(null=True, editable=False)
+    created_at = models.DateTimeField(null=True, editable=False)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'tag'], name='posttag_unique_post_tag'),
+        ]
+        indexes = [
+            models.Index(
+                fields=['tag', '-published_at', '-created_at', '-post'],
+                condition=models.Q(published=True),
+                name='posttag_archive_idx',
+            ),
         ]
-        allowed_attrs = {
-            'a': ['href', 'title'],
-            'img': ['src', 'alt', 'title'],
-            'code': ['class'],
-            'div': ['class'],
-            'span': ['class'],
+    
+    @staticmethod
+    def sort_key(post):
+        return {
+            'published': post.status == 'published',
+            'published_at': post.published_at,
+            'created_at': post.created_at,
         }
-        return bleach.clean(html, tags=allowed_tags, attributes=allowed_attrs)
     
-    def get_tags_list(self):
-        """Return tags as a list"""
-        return [tag.strip() for tag in self.tags.split(',') if tag.strip()]
+    def save(self, *args, **kwargs):
+        for field, value in self.sort_key(self.post).items():
+            setattr(self, field, value)
+        super().save(*args, **kwargs)
     
     def __str__(self):
-        return self.title
+        return f'{self.post} - {self.tag}'
@@ -0,0 +1,133 @@
+"""
+Blog signal handlers
+Evict cached pages that display a post, category or tag when it changes,
+keep per-tag post counts current, and keep the search index in step with
+published posts
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core import search
+from core.cache import bump
+from .models import Category, Post, PostTag, Tag
+
+
+def post_page_tags(post_id, status, featured, category_id):
+    """Cache tags of the public pages showing a post in the given state"""
+    if status != 'published':
+        return set()
+    tags = {f'post:{post_id}', 'post-list'}
+    if category_id:
+        tags.add(f'category:{category_id}')
+    if featured:
+        tags.add('featured-posts')
+    return tags
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_pages(sender, instance, **kwargs):
+    # Pages showing the post before this save must be evicted as well,
+    # e.g. when it is unpublished or moved to another category.
+    instance._previous_page_tags = set()
+    if instance.pk:
+        previous = Post.objects.filter(pk=instance.pk).values('status', 'featured', 'category_id').first()
+        if previous:
+            instance._previous_page_tags = post_page_tags(instance.pk, **previous)
+
+
+@receiver(post_save, sender=Post)
+def evict_post_pages(sender, instance, **kwargs):
+    tags = post_page_tags(instance.pk, instance.status, instance.featured, instance.category_id)
+    bump(*tags, *getattr(instance, '_previous_page_tags', ()))
+
+
+@receiver(post_delete, sender=Post)
+def evict_deleted_post_pages(sender, instance, **kwargs):
+    bump(*post_page_tags(instance.pk, instance.status, instance.featured, instance.category_id))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def evict_category_pages(sender, instance, **kwargs):
+    # Category names appear in the sidebar, on post cards and on post pages
+    bump('categories', f'category:{instance.pk}', 'post-list', 'featured-posts')
+
+
+def evict_posts(queryset):
+    tags = set()
+    for post in queryset.values('pk', 'status', 'featured', 'category_id'):
+        tags |= post_page_tags(post['pk'], post['status'], post['featured'], post['category_id'])
+    bump(*tags)
+
+
+def refresh_tags(tag_ids):
+    """Recount the given tags and evict their archive pages"""
+    tag_ids = list(tag_ids)
+    if tag_ids:
+        Tag.objects.filter(pk__in=tag_ids).refresh_post_counts()
+        bump(*(f'tag:{pk}' for pk in tag_ids))
+
+
+def tag_links_changed(post_ids, tag_ids):
+    # Post pages list their tags, and tag names are part of the search index
+    refresh_tags(tag_ids)
+    posts = Post.objects.filter(pk__in=post_ids)
+    evict_posts(posts)
+    for post in posts:
+        search.index_post(post)
+
+
+@receiver(post_save, sender=Post)
+def refresh_post_tags(sender, instance, created, **kwargs):
+    # Publishing, unpublishing or re-dating moves the post within its tag
+    # archives; any edit to a listed post changes its card there.
+    if not created:
+        instance.sync_tag_links()
+        if instance.status == 'published' or getattr(instance, '_previous_page_tags', None):
+            refresh_tags(instance.tags.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=PostTag)
+@receiver(post_delete, sender=PostTag)
+def evict_post_tag_pages(sender, instance, **kwargs):
+    # Covers admin inlines, remove()/clear() and cascades from either side
+    tag_links_changed([instance.post_id], [instance.tag_id])
+
+
+@receiver(m2m_changed, sender=PostTag)
+def sync_added_tag_links(sender, instance, action, reverse, pk_set, **kwargs):
+    # add() bulk-creates links without calling PostTag.save()
+    if action != 'post_add':
+        return
+    if reverse:
+        posts = Post.objects.filter(pk__in=pk_set)
+        for post in posts:
+            post.sync_tag_links()
+        tag_links_changed(pk_set, [instance.pk])
+    else:
+        instance.sync_tag_links()
+        tag_links_changed([instance.pk], pk_set)
+
+
+@receiver(post_save, sender=Tag)
+def evict_tag_pages(sender, instance, created, **kwargs):
+    bump(f'tag:{instance.pk}')
+    if not created:
+        # A renamed tag changes every post page and index entry showing it
+        tag_links_changed(instance.posts.values_list('pk', flat=True), [])
+
+
+@receiver(post_delete, sender=Tag)
+def evict_deleted_tag_pages(sender, instance, **kwargs):
+    # Its posts were handled as the links cascaded
+    bump(f'tag:{instance.pk}')
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    search.index_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.remove('post', instance.pk)
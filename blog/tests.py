@@ -0,0 +1,412 @@
+"""
+Blog tests
+"""
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+
+from core.pagination import CursorPaginator
+from core.testing import QueryPlanMixin, public_site_settings
+
+from .models import Category, Post, Tag
+from .views import PostListView, TagArchiveView
+
+
+class PostRenderedHtmlTests(TestCase):
+    """Stored, content-hashed HTML for post bodies"""
+
+    def setUp(self):
+        self.author = User.objects.create_user('author')
+
+    def test_html_rendered_on_save(self):
+        post = Post.objects.create(title='Hello', author=self.author, content='# Title\n\n**bold**')
+        stored = Post.objects.values_list('content_html', 'content_html_hash').get(pk=post.pk)
+        self.assertIn('<strong>bold</strong>', stored[0])
+        self.assertEqual(len(stored[1]), 64)
+
+    def test_stored_html_served_without_rendering(self):
+        post = Post.objects.create(title='Hello', author=self.author, content='text')
+        Post.objects.filter(pk=post.pk).update(content_html='<p>cached</p>')
+        post = Post.objects.get(pk=post.pk)
+        self.assertEqual(post.get_content_html(), '<p>cached</p>')
+
+    def test_stale_hash_rerenders_lazily(self):
+        post = Post.objects.create(title='Hello', author=self.author, content='text')
+        Post.objects.filter(pk=post.pk).update(content_html='old', content_html_hash='stale')
+        post = Post.objects.get(pk=post.pk)
+        self.assertEqual(post.get_content_html(), '<p>text</p>')
+        self.assertEqual(Post.objects.get(pk=post.pk).content_html, '<p>text</p>')
+
+    def test_html_is_sanitized(self):
+        post = Post.objects.create(title='Hello', author=self.author, content='<script>x</script>')
+        self.assertNotIn('<script>', post.get_content_html())
+
+    def test_rerender_command(self):
+        post = Post.objects.create(title='Hello', author=self.author, content='text')
+        Post.objects.filter(pk=post.pk).update(content_html='', content_html_hash='')
+        call_command('rerender_markdown', stdout=StringIO())
+        self.assertEqual(Post.objects.get(pk=post.pk).content_html, '<p>text</p>')
+
+
+class PostIndexTests(QueryPlanMixin, TestCase):
+    """Public post queries are served from the partial indexes"""
+
+    def view_queryset(self, **kwargs):
+        view = PostListView()
+        view.kwargs = kwargs
+        return view.get_queryset()
+
+    def test_post_list_uses_published_index(self):
+        self.assertUsesIndex(self.view_queryset(), 'post_published_idx')
+
+    def test_category_list_uses_category_index(self):
+        Category.objects.create(name='Django')
+        queryset = self.view_queryset(category_slug='django')
+        self.assertUsesIndex(queryset, 'post_category_published_idx')
+
+    def test_tag_archive_pages_through_archive_index(self):
+        view = TagArchiveView()
+        view.tag = Tag.objects.create(name='Django')
+        queryset = view.get_queryset().order_by(*TagArchiveView.cursor_ordering)[:11]
+        self.assertUsesIndex(queryset, 'posttag_archive_idx')
+
+    def test_home_featured_posts_use_featured_index(self):
+        queryset = Post.objects.filter(status='published', featured=True)[:3]
+        self.assertUsesIndex(queryset, 'post_featured_idx')
+
+
+@public_site_settings
+class PostCursorPaginationTests(TestCase):
+    """Keyset pagination over the published post list"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user('author')
+        shared = timezone.now()
+        # Several posts share a publish time, so the id tiebreaker matters
+        for index in range(25):
+            Post.objects.create(
+                title=f'Post {index}', author=author, content='text', status='published',
+                published_at=shared if index % 3 else shared - timezone.timedelta(days=index),
+            )
+        cls.expected = list(
+            Post.objects.filter(status='published').order_by('-published_at', '-created_at', '-id')
+            .values_list('pk', flat=True)
+        )
+
+    def walk(self, paginator):
+        seen, page = [], paginator.page()
+        while True:
+            seen.extend(post.pk for post in page)
+            if not page.has_next():
+                return seen, page
+            page = paginator.page(page.next_cursor)
+
+    def test_forward_walk_visits_every_post_once_in_order(self):
+        paginator = CursorPaginator(Post.objects.filter(status='published'), PostListView.cursor_ordering, 4)
+        seen, _ = self.walk(paginator)
+        self.assertEqual(seen, self.expected)
+
+    def test_previous_cursor_returns_to_prior_page(self):
+        paginator = CursorPaginator(Post.objects.filter(status='published'), PostListView.cursor_ordering, 4)
+        first = paginator.page()
+        second = paginator.page(first.next_cursor)
+        back = paginator.page(second.previous_cursor)
+        self.assertEqual([post.pk for post in back], [post.pk for post in first])
+        self.assertFalse(back.has_previous())
+
+    def test_cursor_page_skips_count_query(self):
+        first = self.client.get('/blog/?cursor=')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/blog/?cursor={first.context["page_obj"].next_cursor}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['posts']), 10)
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
+
+    def test_invalid_cursor_is_not_found(self):
+        self.assertEqual(self.client.get('/blog/?cursor=not-a-cursor').status_code, 404)
+
+    def test_numbered_pagination_is_default(self):
+        response = self.client.get('/blog/?page=2')
+        self.assertEqual(response.context['page_obj'].number, 2)
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+@public_site_settings
+class PostPageCacheTests(TestCase):
+    """Cached blog pages are evicted only by changes they display"""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user('author')
+        self.category = Category.objects.create(name='Django')
+        self.post = Post.objects.create(
+            title='Cached', author=self.author, content='text', status='published', category=self.category,
+        )
+        self.other = Post.objects.create(title='Other', author=self.author, content='text', status='published')
+
+    def assertCached(self, url):
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+    def assertNotCached(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        self.assertTrue(queries.captured_queries)
+
+    def test_repeat_request_served_from_cache(self):
+        self.client.get(self.post.get_absolute_url())
+        self.assertCached(self.post.get_absolute_url())
+
+    def test_editing_a_post_evicts_only_its_pages(self):
+        for url in (self.post.get_absolute_url(), self.other.get_absolute_url(), '/blog/'):
+            self.client.get(url)
+        self.post.title = 'Edited'
+        self.post.save()
+        self.assertNotCached(self.post.get_absolute_url())
+        self.assertNotCached('/blog/')
+        self.assertCached(self.other.get_absolute_url())
+
+    def test_draft_changes_do_not_evict(self):
+        self.client.get('/blog/')
+        Post.objects.create(title='Draft', author=self.author, content='text')
+        self.assertCached('/blog/')
+
+    def test_unpublishing_evicts_previous_pages(self):
+        self.client.get(f'/blog/category/{self.category.slug}/')
+        self.post.status = 'draft'
+        self.post.save()
+        self.assertNotCached(f'/blog/category/{self.category.slug}/')
+
+    def test_tagging_a_post_evicts_the_tag_archive(self):
+        tag = Tag.objects.create(name='Python')
+        self.client.get(tag.get_absolute_url())
+        self.assertCached(tag.get_absolute_url())
+        self.post.tags.add(tag)
+        self.assertNotCached(tag.get_absolute_url())
+
+    def test_category_page_sidebar_needs_no_category_queries(self):
+        url = f'/blog/category/{self.category.slug}/'
+        self.client.force_login(self.author)
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertFalse(any('FROM "blog_category"' in query['sql'] for query in queries.captured_queries))
+
+    def test_unknown_category_is_not_found(self):
+        self.assertEqual(self.client.get('/blog/category/missing/').status_code, 404)
+
+    def test_authenticated_users_bypass_cache(self):
+        self.client.get('/blog/')
+        self.client.force_login(self.author)
+        self.assertNotCached('/blog/')
+
+
+@public_site_settings
+class TagTests(TestCase):
+    """Normalized tags, their stored counts and archive pages"""
+
+    def setUp(self):
+        self.author = User.objects.create_user('author')
+        self.tag = Tag.objects.create(name='Django')
+
+    def make_post(self, title, status='published'):
+        post = Post.objects.create(title=title, author=self.author, content='text', status=status)
+        post.tags.add(self.tag)
+        return post
+
+    def count(self):
+        return Tag.objects.get(pk=self.tag.pk).post_count
+
+    def test_count_tracks_published_posts(self):
+        post = self.make_post('One')
+        draft = self.make_post('Draft', status='draft')
+        self.assertEqual(self.count(), 1)
+        draft.status = 'published'
+        draft.save()
+        self.assertEqual(self.count(), 2)
+        post.tags.remove(self.tag)
+        self.assertEqual(self.count(), 1)
+        draft.delete()
+        self.assertEqual(self.count(), 0)
+
+    def test_count_tracks_reverse_and_cleared_relations(self):
+        post = Post.objects.create(title='One', author=self.author, content='text', status='published')
+        self.tag.posts.add(post)
+        self.assertEqual(self.count(), 1)
+        post.tags.clear()
+        self.assertEqual(self.count(), 0)
+
+    def test_archive_lists_published_tagged_posts_with_keyset_pages(self):
+        for index in range(12):
+            self.make_post(f'Post {index}')
+        self.make_post('Hidden draft', status='draft')
+        Post.objects.create(title='Untagged', author=self.author, content='text', status='published')
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.tag.get_absolute_url())
+        self.assertEqual(len(response.context['posts']), 10)
+        self.assertContains(response, '12 posts')
+        self.assertFalse(any('COUNT(' in query['sql'] for query in queries.captured_queries))
+
+        response = self.client.get(self.tag.get_absolute_url(), {'cursor': response.context['page_obj'].next_cursor})
+        self.assertEqual(len(response.context['posts']), 2)
+        self.assertNotContains(response, 'Hidden draft')
+
+    def test_unknown_tag_is_not_found(self):
+        self.assertEqual(self.client.get('/blog/tag/missing/').status_code, 404)
+
+    def test_post_page_links_its_tags(self):
+        post = self.make_post('One')
+        self.assertContains(self.client.get(post.get_absolute_url()), 'href="/blog/tag/django/"')
+
+
+class TagMigrationTests(TransactionTestCase):
+    """0005 turns the comma-separated tag strings into Tag rows"""
+    before = [('blog', '0004_post_keyset_indexes')]
+    after = [('blog', '0005_tag')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_every_name_keeps_a_tag_with_a_usable_slug(self):
+        apps = self.migrate(self.before)
+        author = apps.get_model('auth', 'User').objects.create(username='author')
+        apps.get_model('blog', 'Post').objects.create(
+            title='Hello', slug='hello', author=author, content='', status='published',
+            tags='C++, C#, C, 日本語, Django, django ',
+        )
+
+        apps = self.migrate(self.after)
+        tags = dict(apps.get_model('blog', 'Tag').objects.values_list('name', 'slug'))
+        self.assertEqual(tags, {'C++': 'c', 'C#': 'c-2', 'C': 'c-3', '日本語': 'tag', 'Django': 'django'})
+        self.assertEqual(apps.get_model('blog', 'PostTag').objects.count(), 5)
+        self.assertEqual(set(apps.get_model('blog', 'Tag').objects.values_list('post_count', flat=True)), {1})
+
+
+@public_site_settings
+class PostConditionalGetTests(TestCase):
+    """ETag / Last-Modified validators on blog pages"""
+
+    def setUp(self):
+        self.author = User.objects.create_user('author')
+        self.post = Post.objects.create(title='Hello', author=self.author, content='text', status='published')
+
+    def test_matching_etag_returns_not_modified_with_one_query(self):
+        etag = self.client.get(self.post.get_absolute_url())['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(self.post.get_absolute_url(), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_if_modified_since_returns_not_modified(self):
+        last_modified = self.client.get(self.post.get_absolute_url())['Last-Modified']
+        response = self.client.get(self.post.get_absolute_url(), HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_validates_without_queries(self):
+        response = self.client.get('/blog/')
+        self.assertNotIn('Last-Modified', response)
+        with self.assertNumQueries(0):
+            response = self.client.get('/blog/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_unpublishing_post_changes_list_etag(self):
+        etag = self.client.get('/blog/')['ETag']
+        self.post.status = 'draft'
+        self.post.save()
+        self.assertEqual(self.client.get('/blog/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_editing_post_changes_etag(self):
+        etag = self.client.get(self.post.get_absolute_url())['ETag']
+        self.post.content = 'changed'
+        self.post.save()
+        response = self.client.get(self.post.get_absolute_url(), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_new_post_changes_list_etag(self):
+        etag = self.client.get('/blog/')['ETag']
+        Post.objects.create(title='Second', author=self.author, content='text', status='published')
+        self.assertEqual(self.client.get('/blog/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+@public_site_settings
+class PostFeedTests(TestCase):
+    """RSS/Atom feeds of the blog and of each category"""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user('author')
+        self.category = Category.objects.create(name='Django')
+        self.post = Post.objects.create(
+            title='In category', author=self.author, content='**bold**', status='published', category=self.category,
+        )
+        self.other = Post.objects.create(title='Elsewhere', author=self.author, content='text', status='published')
+        Post.objects.create(title='Draft', author=self.author, content='text')
+
+    def test_feeds_list_published_posts_with_stored_html(self):
+        response = self.client.get('/blog/atom.xml')
+        self.assertEqual(response['Content-Type'], 'application/atom+xml; charset=utf-8')
+        self.assertContains(response, 'In category')
+        self.assertContains(response, 'Elsewhere')
+        self.assertNotContains(response, 'Draft')
+        self.assertContains(response, '&lt;strong&gt;bold&lt;/strong&gt;')
+
+        response = self.client.get('/blog/category/django/rss.xml')
+        self.assertEqual(response['Content-Type'], 'application/rss+xml; charset=utf-8')
+        self.assertContains(response, 'In category')
+        self.assertNotContains(response, 'Elsewhere')
+        self.assertEqual(self.client.get('/blog/category/missing/rss.xml').status_code, 404)
+
+    def test_feed_does_not_render_markdown(self):
+        with mock.patch.object(Post, 'get_content_html') as get_content_html:
+            self.client.get('/blog/rss.xml')
+        get_content_html.assert_not_called()
+
+    def test_stale_or_missing_html_is_rendered(self):
+        Post.objects.filter(pk=self.post.pk).update(content_html='', content_html_hash='')
+        Post.objects.filter(pk=self.other.pk).update(content_html='<p>outdated</p>', content_html_hash='outdated')
+        response = self.client.get('/blog/rss.xml')
+        self.assertContains(response, '&lt;strong&gt;bold&lt;/strong&gt;')
+        self.assertContains(response, '&lt;p&gt;text&lt;/p&gt;')
+        self.assertNotContains(response, 'outdated')
+        self.assertEqual(Post.objects.get(pk=self.post.pk).content_html, '<p><strong>bold</strong></p>')
+
+    def test_unchanged_feed_costs_no_query(self):
+        response = self.client.get('/blog/rss.xml')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/blog/rss.xml', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+        with self.assertNumQueries(0):
+            self.assertContains(self.client.get('/blog/rss.xml'), 'In category')
+
+    def test_if_modified_since_returns_not_modified(self):
+        last_modified = self.client.get('/blog/rss.xml')['Last-Modified']
+        self.assertEqual(last_modified, http_date(self.other.updated_at.timestamp()))
+        # Kept by a page cache hit
+        self.assertEqual(self.client.get('/blog/rss.xml')['Last-Modified'], last_modified)
+        response = self.client.get('/blog/rss.xml', HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_editing_a_post_updates_its_feeds_only(self):
+        for url in ('/blog/rss.xml', '/blog/category/django/rss.xml'):
+            self.client.get(url)
+        self.other.title = 'Renamed'
+        self.other.save()
+        self.assertContains(self.client.get('/blog/rss.xml'), 'Renamed')
+        with self.assertNumQueries(0):
+            self.client.get('/blog/category/django/rss.xml')
@@ -2,12 +2,29 @@
 Blog URL configuration
 """
 from django.urls import path
-from . import views
+from core.routes import with_async_views
+from . import feeds, views
 
 app_name = 'blog'
 
+rss_feed = views.PostFeedView.as_view(feed=feeds.LatestPostsFeed())
+atom_feed = views.PostFeedView.as_view(feed=feeds.LatestPostsAtomFeed())
+
 urlpatterns = [
     path('', views.PostListView.as_view(), name='list'),
+    path('page/<int:page>/', views.PostListView.as_view(), name='list'),
     path('category/<slug:category_slug>/', views.PostListView.as_view(), name='category'),
+    path('category/<slug:category_slug>/page/<int:page>/', views.PostListView.as_view(), name='category'),
+    path('rss.xml', rss_feed, name='rss'),
+    path('atom.xml', atom_feed, name='atom'),
+    path('category/<slug:category_slug>/rss.xml', rss_feed, name='category-rss'),
+    path('category/<slug:category_slug>/atom.xml', atom_feed, name='category-atom'),
+    path('tag/<slug:tag_slug>/', views.TagArchiveView.as_view(), name='tag'),
     path('<slug:slug>/', views.PostDetailView.as_view(), name='detail'),
 ]
+
+# Same routes with the async views, for config.urls_async
+async_urlpatterns = with_async_views(urlpatterns, {
+    views.PostListView: views.AsyncPostListView,
+    views.PostDetailView: views.AsyncPostDetailView,
+})
@@ -1,43 +1,158 @@
 """
 Blog views
 """
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
 from django.views.generic import ListView, DetailView
-from .models import Post, Category
+from core.cache import PageCacheMixin, get_generations
+from core import reference
+from core.asyncviews import AsyncDetailMixin, AsyncListMixin
+from core.conditional import ConditionalDetailMixin, ConditionalGetMixin, make_etag
+from core.pagination import CursorPaginationMixin
+from .feeds import FEED_ITEMS
+from .models import Post, PostTag, Tag
 
 
-class PostListView(ListView):
+class PostListView(ConditionalGetMixin, PageCacheMixin, CursorPaginationMixin, ListView):
     """Display all published blog posts"""
     model = Post
     template_name = 'blog/post_list.html'
     context_object_name = 'posts'
     paginate_by = 10
+    cursor_ordering = ('-published_at', '-created_at', '-id')
+    
+    @cached_property
+    def current_category(self):
+        """The category being browsed, from the cached reference set"""
+        category_slug = self.kwargs.get('category_slug')
+        if not category_slug:
+            return None
+        for category in reference.categories():
+            if category.slug == category_slug:
+                return category
+        raise Http404("No such category")
     
     def get_queryset(self):
         queryset = Post.objects.filter(status='published').select_related('author', 'category')
         
         # Filter by category if provided
-        category_slug = self.kwargs.get('category_slug')
-        if category_slug:
-            queryset = queryset.filter(category__slug=category_slug)
+        if self.current_category:
+            queryset = queryset.filter(category=self.current_category)
         
         return queryset
     
     def get_context_data(self, **kwargs):
+        # The sidebar's categories come from the reference_data context processor
         context = super().get_context_data(**kwargs)
-        context['categories'] = Category.objects.all()
-        
-        category_slug = self.kwargs.get('category_slug')
-        if category_slug:
-            context['current_category'] = Category.objects.get(slug=category_slug)
-        
+        context['current_category'] = self.current_category
+        return context
+    
+    def get_validators(self):
+        # The page's cache tags are bumped when a listed post changes, is
+        # added, removed or unpublished, so no query is needed. No
+        # Last-Modified: a removal would not move it forward.
+        generations = get_generations(self.get_cache_tags())
+        return None, make_etag(self.kwargs.get('page'), self.request.GET.urlencode(), generations)
+    
+    def get_cache_tags(self):
+        if self.current_category:
+            return ['categories', f'category:{self.current_category.pk}']
+        return ['categories', 'post-list']
+
+
+class PostFeedView(PostListView):
+    """
+    RSS/Atom feed of the blog or of one category.
+
+    Shares the list's ETag and cache tags, so readers polling an unchanged
+    feed get a 304 or a page cache hit. Last-Modified is the newest
+    ``updated_at`` among the items, as the feed itself reports it.
+    """
+    feed = None
+    
+    def get_validators(self):
+        _, etag = super().get_validators()
+        # The FEED_ITEMS newest posts, read through the published index
+        updated = self.feed.published(self.current_category)[:FEED_ITEMS].values_list('updated_at', flat=True)
+        return max(updated, default=None), etag
+    
+    def get(self, request, *args, **kwargs):
+        return self.feed(request, category=self.current_category)
+
+
+class TagArchiveView(PostListView):
+    """
+    Published posts with a tag, always keyset-paginated.
+
+    Pages are read from the tag's ``PostTag`` links through their archive
+    index, the heading uses the stored ``post_count``, and the validators
+    come from a single tag lookup, so nothing scans the whole archive.
+    """
+    cursor_ordering = ('-published_at', '-created_at', '-post_id')
+    
+    @cached_property
+    def tag(self):
+        return get_object_or_404(Tag, slug=self.kwargs['tag_slug'])
+    
+    def use_cursor_pagination(self):
+        return True
+    
+    def get_queryset(self):
+        return PostTag.objects.filter(tag=self.tag, published=True)
+    
+    def paginate_queryset(self, queryset, page_size):
+        paginator, page, links, is_paginated = super().paginate_queryset(queryset, page_size)
+        posts = Post.objects.select_related('author', 'category').in_bulk([link.post_id for link in links])
+        page.object_list = [posts[link.post_id] for link in links if link.post_id in posts]
+        return paginator, page, page.object_list, is_paginated
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['tag'] = self.tag
         return context
+    
+    def get_validators(self):
+        tag = Tag.objects.filter(slug=self.kwargs['tag_slug']).values('pk', 'post_count').first()
+        if tag is None:
+            return None
+        generations = get_generations(['categories', f"tag:{tag['pk']}"])
+        return None, make_etag(tag, self.request.GET.urlencode(), generations)
+    
+    def get_cache_tags(self):
+        return ['categories', f'tag:{self.tag.pk}']
 
 
-class PostDetailView(DetailView):
+class PostDetailView(ConditionalDetailMixin, PageCacheMixin, DetailView):
     """Display individual blog post"""
     model = Post
     template_name = 'blog/post_detail.html'
     context_object_name = 'post'
+    object_prefetches = ('tags',)
     
     def get_queryset(self):
         return Post.objects.filter(status='published').select_related('author', 'category')
+    
+    def get_object_validators(self, post):
+        tags = [f'post:{post.pk}', f'category:{post.category_id}']
+        return post.updated_at, make_etag(post.pk, post.updated_at, post.category_id, get_generations(tags))
+    
+    def get_cache_tags(self):
+        tags = [f'post:{self.object.pk}']
+        if self.object.category_id:
+            tags.append(f'category:{self.object.category_id}')
+        return tags
+
+
+class AsyncPostListView(AsyncListMixin, PostListView):
+    """PostListView for ASGI"""
+    
+    async def get(self, request, *args, **kwargs):
+        # Resolve the category (reference data, may query) off the event loop
+        await sync_to_async(lambda: self.current_category)()
+        return await super().get(request, *args, **kwargs)
+
+
+class AsyncPostDetailView(AsyncDetailMixin, PostDetailView):
+    """PostDetailView for ASGI"""
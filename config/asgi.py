@@ -5,6 +5,7 @@ ASGI config for portfolio project.
 import os
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# config.settings with the public pages served by their async views
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings_asgi')
 
 application = get_asgi_application()
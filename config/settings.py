@@ -40,7 +40,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.timing.ServerTimingMiddleware',  # Server-Timing header (sampled)
+    'core.compression.CompressionMiddleware',  # Brotli/gzip for HTML and feeds
     'django.middleware.security.SecurityMiddleware',
+    'core.routers.ReplicaMiddleware',  # Public reads from the replica, if configured
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Static files
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -71,6 +74,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.reference_data',
             ],
         },
     },
@@ -98,6 +102,20 @@ if not DATABASES['default']:
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 
+# Optional read replica for the public pages, e.g. a copy of db.sqlite3
+# locally; see core.routers
+replica_url = config('DATABASE_REPLICA_URL', default='')
+REPLICA_DATABASE = 'replica' if replica_url else None
+if replica_url:
+    DATABASES['replica'] = dj_database_url.parse(
+        replica_url, conn_max_age=600, conn_health_checks=True,
+        test_options={'MIRROR': 'default'},
+    )
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Longest the replica is expected to trail the primary; reads stay on the
+# primary this long after a write
+REPLICA_LAG_SECONDS = config('REPLICA_LAG_SECONDS', default=5, cast=int)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -125,6 +143,74 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Pagination: 'numbered' (page links with a total count) or 'cursor'
+# (keyset pagination, constant cost per page for large archives)
+PAGINATION_MODE = config('PAGINATION_MODE', default='numbered')
+# Set by export_site while it renders pages for a static server
+STATIC_EXPORT = False
+
+# Caches. CACHE_BACKEND picks the shared store: 'locmem' (single process,
+# the default without REDIS_URL), 'file', 'db' (run createcachetable) or
+# 'redis'. Shared stores get a bounded per-worker LRU in front of them;
+# CACHE_LOCAL_TIMEOUT bounds how stale a worker's copy can be.
+REDIS_URL = config('REDIS_URL', default='')
+CACHE_BACKEND = config('CACHE_BACKEND', default='redis' if REDIS_URL else 'locmem')
+SHARED_CACHE_BACKENDS = {
+    'locmem': ('django.core.cache.backends.locmem.LocMemCache', ''),
+    'file': ('django.core.cache.backends.filebased.FileBasedCache', str(BASE_DIR / '.cache')),
+    'db': ('django.core.cache.backends.db.DatabaseCache', 'django_cache'),
+    'redis': ('django.core.cache.backends.redis.RedisCache', REDIS_URL),
+}
+_shared_backend, _shared_location = SHARED_CACHE_BACKENDS[CACHE_BACKEND]
+CACHES = {
+    'shared': {
+        'BACKEND': _shared_backend,
+        'LOCATION': config('CACHE_LOCATION', default=_shared_location),
+        'TIMEOUT': config('CACHE_TIMEOUT', default=300, cast=int),
+    },
+}
+if CACHE_BACKEND == 'locmem':
+    CACHES['default'] = CACHES['shared']
+else:
+    CACHES['default'] = {
+        'BACKEND': 'core.cache_backends.TieredCache',
+        'OPTIONS': {
+            'SHARED': 'shared',
+            'LOCAL_TIMEOUT': config('CACHE_LOCAL_TIMEOUT', default=5, cast=int),
+            'LOCAL_MAX_BYTES': config('CACHE_LOCAL_MAX_BYTES', default=16 * 1024 * 1024, cast=int),
+            'LOCAL_MAX_ENTRIES': config('CACHE_LOCAL_MAX_ENTRIES', default=10000, cast=int),
+        },
+    }
+
+# Page cache for anonymous visitors, evicted by model signals. With the
+# locmem cache each worker keeps its own copy, so the timeout bounds how
+# long other workers can serve a page after an edit.
+PAGE_CACHE_ENABLED = config('PAGE_CACHE_ENABLED', default=True, cast=bool)
+PAGE_CACHE_TIMEOUT = config('PAGE_CACHE_TIMEOUT', default=300, cast=int)
+PAGE_CACHE_ALIAS = 'default'
+
+# Rows per sitemap shard (the protocol allows up to 50,000 URLs per file)
+SITEMAP_SHARD_SIZE = config('SITEMAP_SHARD_SIZE', default=5000, cast=int)
+
+# Fraction of requests (0.0-1.0) that get a Server-Timing header and a
+# structured timing log line
+SERVER_TIMING_SAMPLE_RATE = config('SERVER_TIMING_SAMPLE_RATE', default=1.0 if DEBUG else 0.0, cast=float)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'portfolio': {
+            'handlers': ['console'],
+            'level': config('PORTFOLIO_LOG_LEVEL', default='INFO'),
+            'propagate': False,
+        },
+    },
+}
+
 # Crispy Forms
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap4"
 CRISPY_TEMPLATE_PACK = "bootstrap4"
@@ -138,6 +224,10 @@ EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
 CONTACT_EMAIL = config('CONTACT_EMAIL', default='')
 
+# Outbound email queue (see `manage.py send_outbox`)
+OUTBOX_MAX_ATTEMPTS = config('OUTBOX_MAX_ATTEMPTS', default=6, cast=int)
+OUTBOX_RETRY_BASE_SECONDS = config('OUTBOX_RETRY_BASE_SECONDS', default=60, cast=int)
+
 # Security settings for production
 if not DEBUG:
     SECURE_SSL_REDIRECT = True
@@ -0,0 +1,7 @@
+"""
+Settings for ASGI deployments
+config.settings with the public pages served by their async views.
+"""
+from .settings import *  # noqa: F401,F403
+
+ROOT_URLCONF = 'config.urls_async'
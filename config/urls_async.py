@@ -0,0 +1,21 @@
+"""
+URL configuration for ASGI deployments
+The routes of config.urls, with the public pages served by async views.
+"""
+from django.urls import include, path
+
+from blog.urls import async_urlpatterns as blog_patterns
+from core.urls import async_urlpatterns as core_patterns
+from projects.urls import async_urlpatterns as projects_patterns
+
+from . import urls
+
+ASYNC_NAMESPACES = {'core', 'projects', 'blog'}
+
+urlpatterns = [
+    path('', include((core_patterns, 'core'))),
+    path('projects/', include((projects_patterns, 'projects'))),
+    path('blog/', include((blog_patterns, 'blog'))),
+    # Admin and, in development, media
+    *(pattern for pattern in urls.urlpatterns if getattr(pattern, 'namespace', None) not in ASYNC_NAMESPACES),
+]
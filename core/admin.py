@@ -2,7 +2,7 @@
 Core admin configuration
 """
 from django.contrib import admin
-from .models import ContactMessage
+from .models import ContactMessage, OutboundEmail
 
 
 @admin.register(ContactMessage)
@@ -16,3 +16,18 @@ class ContactMessageAdmin(admin.ModelAdmin):
     def has_add_permission(self, request):
         # Prevent manual creation in admin
         return False
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'recipients', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['subject', 'recipients']
+    readonly_fields = [
+        'contact_message', 'subject', 'body', 'from_email', 'recipients',
+        'attempts', 'last_error', 'created_at', 'sent_at',
+    ]
+    
+    def has_add_permission(self, request):
+        # Emails are queued by the application
+        return False
@@ -0,0 +1,119 @@
+"""
+Async public views
+Mixins that run the public page views natively under ASGI. They sit in
+front of the sync view they replace and reuse its querysets, validators,
+cache tags and templates; only the request flow is async, with queries
+issued through the async ORM and template rendering (which may still
+touch the database) moved to a worker thread.
+"""
+from asgiref.sync import sync_to_async
+from django.core.paginator import InvalidPage
+from django.db.models import prefetch_related_objects
+from django.http import Http404
+from django.views import View
+
+from .conditional import ConditionalGetMixin
+
+
+async def alist(queryset):
+    """Evaluate ``queryset`` (including its prefetches) without blocking"""
+    return [obj async for obj in queryset]
+
+
+class AsyncPageMixin:
+    """
+    Async counterpart of ConditionalGetMixin + PageCacheMixin.
+
+    Runs the same validator and page cache steps (``read_validators``,
+    ``conditional_response``, ``read_cache``, ``store_response``) around an
+    async ``get``. Subclasses implement ``get`` and call ``read_generations``
+    at the point the sync view would, i.e. before the page's content is read.
+    """
+    generations = None
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            # OPTIONS and 405 Method Not Allowed, as for any async view
+            return await View.dispatch(self, request, *args, **kwargs)
+
+        conditional = isinstance(self, ConditionalGetMixin)
+        if not conditional or await sync_to_async(self.read_validators)() is None:
+            return await self.cached_get(request, *args, **kwargs)
+
+        response = self.conditional_response(request)
+        if response is None:
+            response = await self.cached_get(request, *args, **kwargs)
+        return self.add_validators(response)
+
+    async def cached_get(self, request, *args, **kwargs):
+        """``get`` behind the page cache"""
+        cacheable, cached = await sync_to_async(self.read_cache)(request)
+        if cached is not None:
+            return cached
+
+        response = await self.get(request, *args, **kwargs)
+        if cacheable and response.status_code == 200 and self.generations is not None:
+            await sync_to_async(self.store_response)(request, response, self.generations)
+        return response
+
+    async def read_generations(self):
+        # Cache tags may come from reference data, which can query
+        self.generations = await sync_to_async(self.get_page_generations)()
+
+    async def render(self, context):
+        response = self.render_to_response(context)
+        await sync_to_async(response.render)()
+        return response
+
+
+class AsyncListMixin(AsyncPageMixin):
+    """Async ``get`` for the public ListViews (numbered or cursor pages)"""
+
+    async def get(self, request, *args, **kwargs):
+        await self.read_generations()
+        self.object_list = self.get_queryset()
+        page_size = self.get_paginate_by(self.object_list)
+        if self.use_cursor_pagination():
+            self.pagination = await sync_to_async(super().paginate_queryset)(self.object_list, page_size)
+        else:
+            self.pagination = await self.apaginate_queryset(self.object_list, page_size)
+        return await self.render(self.get_context_data())
+
+    async def apaginate_queryset(self, queryset, page_size):
+        """ListView.paginate_queryset with the count and page read asynchronously"""
+        paginator = self.get_paginator(queryset, page_size, allow_empty_first_page=self.get_allow_empty())
+        paginator.count = await queryset.acount()
+        page_number = self.kwargs.get(self.page_kwarg) or self.request.GET.get(self.page_kwarg) or 1
+        try:
+            page_number = int(page_number)
+        except ValueError:
+            if page_number != 'last':
+                raise Http404("Page is not 'last', nor can it be converted to an int.")
+            page_number = paginator.num_pages
+        try:
+            page = paginator.page(page_number)
+        except InvalidPage as error:
+            raise Http404(f"Invalid page ({page_number}): {error}")
+        page.object_list = await alist(page.object_list)
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def paginate_queryset(self, queryset, page_size):
+        # Already paginated in get(); get_context_data asks again
+        return self.pagination
+
+
+class AsyncDetailMixin(AsyncPageMixin):
+    """Async ``get`` for the public DetailViews, looked up by slug"""
+
+    async def get(self, request, *args, **kwargs):
+        # Usually read already by ConditionalDetailMixin.get_validators
+        self.object = self.validated_object
+        if self.object is None:
+            queryset = self.get_queryset().filter(**{self.get_slug_field(): self.kwargs[self.slug_url_kwarg]})
+            try:
+                self.object = await queryset.aget()
+            except queryset.model.DoesNotExist:
+                raise Http404(f"No {queryset.model._meta.verbose_name} found matching the query")
+        await sync_to_async(prefetch_related_objects)([self.object], *self.object_prefetches)
+        await self.read_generations()
+        return await self.render(self.get_context_data(object=self.object))
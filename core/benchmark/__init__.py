@@ -0,0 +1,230 @@
+"""
+Benchmark harness
+Seeds a synthetic dataset and measures query count, latency and memory
+for every public route, comparing the results against a JSON baseline.
+Feature benchmarks (compression, asgi, search, slugs) live in the
+submodules and reuse the dataset and URL helpers here.
+"""
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+
+from blog.models import Category, Post, PostTag, Tag
+from core.cache import bump
+from core.images import PIPELINE_SIGNATURE
+from core.rendering import content_hash, render_many
+from core.routes import route_names
+from projects.models import Project, ProjectImage, TechStack
+
+# Query strings for routes that need one to do representative work
+QUERY_STRINGS = {
+    'core:search': 'q=django',
+}
+
+SAMPLE_BODIES = [
+    "## Overview\n\nA short introduction with **bold** and `inline code`.\n\n"
+    "```python\ndef handler(request):\n    return render(request, 'page.html')\n```\n",
+    "| Metric | Value |\n|---|---|\n| p50 | 12ms |\n| p95 | 40ms |\n\n"
+    "- first point\n- second point\n\n> A quoted remark.\n",
+    "# Case study\n\n" + "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 40,
+]
+
+
+@contextmanager
+def throwaway_database():
+    """A fresh test database, so seeded data never lands in the real one"""
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def seed_dataset(posts=10000, projects=500, images=5000, tech=100, categories=20, batch_size=1000):
+    """Bulk-create a synthetic, fully published dataset"""
+    bodies = [(body, html, content_hash(body)) for body, html in zip(SAMPLE_BODIES, render_many(SAMPLE_BODIES))]
+    now = timezone.now()
+    author = User.objects.create_user('benchmark')
+
+    category_objs = Category.objects.bulk_create(
+        Category(name=f'Category {index}', slug=f'category-{index}') for index in range(categories)
+    )
+    tech_objs = TechStack.objects.bulk_create(
+        TechStack(name=f'Tech {index}', category='Backend') for index in range(tech)
+    )
+
+    post_objs = Post.objects.bulk_create((
+        Post(
+            title=f'Post {index}', slug=f'post-{index}', author=author,
+            excerpt='A synthetic post used for benchmarking.',
+            content=bodies[index % len(bodies)][0],
+            content_html=bodies[index % len(bodies)][1],
+            content_html_hash=bodies[index % len(bodies)][2],
+            category=category_objs[index % len(category_objs)] if category_objs else None,
+            status='published', featured=index % 50 == 0,
+            published_at=now - timedelta(minutes=index),
+        )
+        for index in range(posts)
+    ), batch_size=batch_size)
+
+    tag_objs = Tag.objects.bulk_create(Tag(name=name, slug=name) for name in ('python', 'django'))
+    PostTag.objects.bulk_create((
+        PostTag(post_id=post.pk, tag_id=tag.pk, **PostTag.sort_key(post))
+        for post in post_objs for tag in tag_objs
+    ), batch_size=batch_size)
+    Tag.objects.refresh_post_counts()
+
+    project_objs = Project.objects.bulk_create((
+        Project(
+            title=f'Project {index}', slug=f'project-{index}',
+            short_description='A synthetic project used for benchmarking.',
+            case_study_content=bodies[index % len(bodies)][0],
+            case_study_html=bodies[index % len(bodies)][1],
+            case_study_html_hash=bodies[index % len(bodies)][2],
+            status='published', featured=index % 20 == 0, order=index % 10,
+        )
+        for index in range(projects)
+    ), batch_size=batch_size)
+
+    if project_objs:
+        ProjectImage.objects.bulk_create((
+            ProjectImage(
+                project=project_objs[index % len(project_objs)],
+                image=f'projects/benchmark/{index}.png', order=index // len(project_objs),
+                # What build_image_derivatives records for a missing file, so
+                # requests don't write manifests
+                image_variants={'sources': {}, 'source': f'projects/benchmark/{index}.png',
+                                'pipeline': PIPELINE_SIGNATURE},
+            )
+            for index in range(images)
+        ), batch_size=batch_size)
+        if tech_objs:
+            through = Project.tech_stack.through
+            through.objects.bulk_create((
+                through(project_id=project.pk, techstack_id=tech_objs[(index + offset) % len(tech_objs)].pk)
+                for index, project in enumerate(project_objs)
+                for offset in range(min(3, len(tech_objs)))
+            ), batch_size=batch_size)
+
+    # bulk_create skips the signals that maintain the search index and
+    # version the cached reference sets
+    call_command('rebuild_search_index', stdout=StringIO())
+    bump('categories', 'tech-stack')
+
+
+def sample_kwargs():
+    """Values for each URL kwarg, taken from the seeded data"""
+    post = Post.objects.filter(status='published').order_by('pk').first()
+    project = Project.objects.filter(status='published').order_by('pk').first()
+    category = Category.objects.order_by('pk').first()
+    tag = Tag.objects.order_by('-post_count', 'pk').first()
+    return {
+        'blog': {
+            'slug': post and post.slug,
+            'category_slug': category and category.slug,
+            'tag_slug': tag and tag.slug,
+        },
+        'projects': {'slug': project and project.slug},
+        'core': {'section': 'posts', 'number': post and post.pk // settings.SITEMAP_SHARD_SIZE},
+    }
+
+
+def public_urls():
+    """One concrete URL per named public route in the root URLconf"""
+    samples = sample_kwargs()
+    urls = {}
+    for name, converters in route_names(get_resolver().url_patterns):
+        if name in urls:
+            # Further patterns under the same name, e.g. numbered pages
+            continue
+        app = name.split(':')[0]
+        kwargs = {key: samples.get(app, {}).get(key) for key in converters}
+        missing = [key for key, value in kwargs.items() if value is None]
+        if missing:
+            raise ValueError(f"No benchmark sample for {name} kwargs {missing}")
+        urls[name] = reverse(name, kwargs=kwargs)
+        if name in QUERY_STRINGS:
+            urls[name] += f'?{QUERY_STRINGS[name]}'
+    return urls
+
+
+def read(response):
+    """The body, reading a streaming response through as a real client would"""
+    return response.getvalue() if response.streaming else response.content
+
+
+def measure(client, url, iterations=20, warmup=2):
+    """Query count, latency percentiles and peak allocation for one URL"""
+    for _ in range(warmup):
+        read(client.get(url))
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+        read(response)
+    if response.status_code != 200:
+        raise ValueError(f"{url} returned {response.status_code}")
+    # Count now: the next request resets the connection's query log
+    query_count = len(queries)
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        read(client.get(url))
+        timings.append((time.perf_counter() - start) * 1000)
+
+    # Traced separately, as tracemalloc slows down the measured requests
+    tracemalloc.start()
+    read(client.get(url))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'url': url,
+        'queries': query_count,
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[max(0, int(len(timings) * 0.95) - 1)], 3),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def run(iterations=20):
+    client = Client()
+    return {name: measure(client, url, iterations) for name, url in public_urls().items()}
+
+
+def compare(results, baseline, latency_tolerance=0.5, memory_tolerance=0.25, latency_floor_ms=2.0):
+    """
+    Regressions of ``results`` against ``baseline``.
+
+    Any extra query is a regression. Latency and memory may grow by the
+    given fraction; latency also gets an absolute floor to absorb noise
+    on very fast views.
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        if result['queries'] > previous['queries']:
+            regressions.append(f"{name}: {previous['queries']} -> {result['queries']} queries")
+        allowed_ms = max(previous['p95_ms'] * (1 + latency_tolerance), previous['p95_ms'] + latency_floor_ms)
+        if result['p95_ms'] > allowed_ms:
+            regressions.append(f"{name}: p95 {previous['p95_ms']}ms -> {result['p95_ms']}ms")
+        if result['peak_kib'] > previous['peak_kib'] * (1 + memory_tolerance):
+            regressions.append(f"{name}: peak {previous['peak_kib']}KiB -> {result['peak_kib']}KiB")
+    return regressions
@@ -0,0 +1,74 @@
+"""
+ASGI benchmark
+Throughput of the sync views under WSGI against the async views under
+ASGI, at equal concurrency.
+"""
+import asyncio
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient, Client, override_settings
+
+from . import public_urls, read
+
+
+def _wsgi_load(url, concurrency, requests):
+    """Drive the WSGI handler from ``concurrency`` threads, like threaded workers"""
+    def worker(count):
+        client = Client()
+        for _ in range(count):
+            read(client.get(url))
+
+    shares = [requests // concurrency + (index < requests % concurrency) for index in range(concurrency)]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, shares))
+
+
+def _asgi_load(url, concurrency, requests):
+    """Drive the ASGI handler with ``concurrency`` requests in flight on one event loop"""
+    async def run():
+        client = AsyncClient()
+        slots = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with slots:
+                response = await client.get(url)
+                if response.streaming:
+                    await sync_to_async(read)(response)
+
+        await asyncio.gather(*(one() for _ in range(requests)))
+
+    asyncio.run(run())
+
+
+def measure_throughput(concurrency=8, requests=200):
+    """
+    Requests per second and peak allocation per public route, for the
+    WSGI stack (sync views, one thread per concurrent request) and the
+    ASGI stack (config.urls_async, one event loop), at equal concurrency.
+    """
+    stacks = {
+        'wsgi': ('config.urls', _wsgi_load),
+        'asgi': ('config.urls_async', _asgi_load),
+    }
+    results = {}
+    for name, url in public_urls().items():
+        results[name] = {}
+        for stack, (urlconf, load) in stacks.items():
+            with override_settings(ROOT_URLCONF=urlconf):
+                load(url, concurrency, concurrency)  # warm up
+                start = time.perf_counter()
+                load(url, concurrency, requests)
+                elapsed = time.perf_counter() - start
+                # Traced separately, as tracemalloc slows down the measured run
+                tracemalloc.start()
+                load(url, concurrency, concurrency * 2)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            results[name][stack] = {
+                'rps': round(requests / elapsed, 1),
+                'peak_kib': round(peak / 1024, 1),
+            }
+    return results
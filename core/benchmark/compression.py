@@ -0,0 +1,39 @@
+"""
+Compression benchmark
+Response size and server CPU time per public route and content encoding.
+"""
+import time
+
+from django.test import Client, override_settings
+
+from core.cache import get_cache
+from core.compression import available_encodings
+
+from . import public_urls, read
+
+
+def measure_compression(iterations=20):
+    """
+    Response bytes and server CPU time per public route and encoding.
+
+    Each encoding is measured with the page cache off (render and compress
+    on every request) and on (served as stored by the cache).
+    """
+    client = Client()
+    results = {}
+    for name, url in public_urls().items():
+        results[name] = {}
+        for encoding in ['identity', *available_encodings()]:
+            row = {}
+            for cached in (False, True):
+                with override_settings(PAGE_CACHE_ENABLED=cached):
+                    get_cache().clear()
+                    body = read(client.get(url, HTTP_ACCEPT_ENCODING=encoding))
+                    start = time.process_time()
+                    for _ in range(iterations):
+                        read(client.get(url, HTTP_ACCEPT_ENCODING=encoding))
+                    cpu_ms = (time.process_time() - start) * 1000 / iterations
+                row['cached_cpu_ms' if cached else 'cpu_ms'] = round(cpu_ms, 3)
+            row['bytes'] = len(body)
+            results[name][encoding] = row
+    return results
@@ -0,0 +1,83 @@
+"""
+Search benchmark
+A synthetic corpus with a Zipf-like word mix, and ranked query latency.
+"""
+import random
+import statistics
+import time
+
+from django.db import connection
+from django.utils import timezone
+
+from core import search
+from core.models import SearchDocument
+
+
+def seed_search_documents(count, vocabulary=5000, words_per_document=200, batch_size=2000, seed=0):
+    """
+    Bulk-create ``count`` search documents with a Zipf-like word mix.
+
+    Returns sample queries spanning common, mid-frequency, rare and
+    multi-word terms.
+    """
+    rng = random.Random(seed)
+    words = [f'{"".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(4, 9)))}' for _ in range(vocabulary)]
+    weights = [1 / (rank + 1) for rank in range(vocabulary)]
+    now = timezone.now()
+
+    def documents():
+        for index in range(count):
+            text = rng.choices(words, weights, k=words_per_document)
+            yield SearchDocument(
+                kind='post', object_id=index, title=' '.join(text[:6]),
+                summary=' '.join(text[6:30]), body=' '.join(text[30:]),
+                url=f'/blog/post-{index}/', updated_at=now,
+            )
+
+    batch = []
+    for document in documents():
+        batch.append(document)
+        if len(batch) >= batch_size:
+            SearchDocument.objects.bulk_create(batch)
+            batch = []
+    SearchDocument.objects.bulk_create(batch)
+
+    return [
+        words[0], words[10], words[500], words[4000],
+        f'{words[3]} {words[50]}', f'{words[20]} {words[700]}', words[1500],
+    ]
+
+
+def match_count(query):
+    """Documents matching ``query``; each of them is scored when ranking"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                "SELECT count(*) FROM core_searchdocument WHERE search_vector @@ websearch_to_tsquery('english', %s)",
+                [query],
+            )
+        else:
+            cursor.execute(
+                "SELECT count(*) FROM core_searchdocument_fts WHERE core_searchdocument_fts MATCH %s",
+                [search._fts5_query(query)],
+            )
+        return cursor.fetchone()[0]
+
+
+def measure_search(queries, iterations=20):
+    """Latency percentiles and match count per query for core.search.search()"""
+    results = {}
+    for query in queries:
+        search.search(query)
+        timings = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            search.search(query)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        results[query] = {
+            'matches': match_count(query),
+            'p50_ms': round(statistics.median(timings), 3),
+            'p95_ms': round(timings[max(0, int(len(timings) * 0.95) - 1)], 3),
+        }
+    return results
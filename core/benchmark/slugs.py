@@ -0,0 +1,79 @@
+"""
+Slug benchmark
+Allocating slugs for many posts sharing one title, against probing one
+candidate slug per query.
+"""
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.utils.text import slugify
+
+from blog.models import Post
+from core import slugs
+
+
+@contextmanager
+def count_queries():
+    """A one-item list holding the number of queries run, with no logging cap"""
+    counter = [0]
+
+    def wrapper(execute, sql, params, many, context):
+        counter[0] += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(wrapper):
+        yield counter
+
+
+def _probe(model, title):
+    """The old allocation: one existence query per candidate slug"""
+    base = slugify(title)
+    slug, number = base, 1
+    while model.objects.filter(slug=slug).exists():
+        number += 1
+        slug = f'{base}-{number}'
+    return slug
+
+
+def measure_slug_allocation(count=10000, title="Same title", batch_size=1000, saves=100):
+    """
+    Queries and time to give ``count`` posts with one title distinct slugs.
+
+    ``bulk`` assigns slugs before bulk_create; ``save`` is the per-save
+    cost once ``count`` slugs collide, against probing each candidate.
+    """
+    author = User.objects.create(username='slug-benchmark')
+    results = {}
+
+    start = time.perf_counter()
+    with count_queries() as queries:
+        for offset in range(0, count, batch_size):
+            posts = [
+                Post(title=title, author=author, content='', content_html='')
+                for _ in range(min(batch_size, count - offset))
+            ]
+            Post.objects.bulk_create(slugs.assign(posts, 'title'))
+    results['bulk'] = {
+        'ms': round((time.perf_counter() - start) * 1000, 1),
+        'queries': queries[0],
+    }
+
+    for name, allocate in (('allocate', slugs.allocate), ('probe', _probe)):
+        start = time.perf_counter()
+        with count_queries() as queries:
+            allocate(Post, title)
+        results[name] = {
+            'ms': round((time.perf_counter() - start) * 1000, 3),
+            'queries': queries[0],
+        }
+
+    timings = []
+    for _ in range(saves):
+        start = time.perf_counter()
+        Post.objects.create(title=title, author=author, content='')
+        timings.append((time.perf_counter() - start) * 1000)
+    results['save'] = {'ms': round(statistics.median(timings), 3), 'queries': None}
+    return results
@@ -0,0 +1,504 @@
+"""
+Bulk content import/export
+Streams posts and projects to and from JSON Lines or a directory of
+markdown files with frontmatter, a batch at a time. Imports are written
+with bulk_create/bulk_update, resolve categories, tags and tech stack
+once per batch, and render markdown in a worker pool while the batch's
+references are resolved.
+"""
+import json
+import os
+import sys
+from collections import Counter
+from io import StringIO, TextIOWrapper
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.validators import validate_slug
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from django.utils.text import slugify
+
+from blog.models import Category, Post, PostTag, Tag
+from projects.models import Project, TechStack
+
+from . import slugs
+from .cache import bump
+from .rendering import content_hash, render_many
+
+KINDS = ('post', 'project')
+
+MODELS = {'post': Post, 'project': Project}
+
+# Markdown directory layout: one folder per kind, one file per record
+KIND_DIRECTORIES = {'post': 'posts', 'project': 'projects'}
+
+# The markdown field each kind keeps in the file body
+BODY_FIELDS = {'post': 'content', 'project': 'case_study_content'}
+
+FRONTMATTER_DELIMITER = '---'
+
+
+def detect_format(path):
+    """``markdown`` for a directory, otherwise ``jsonl`` (``-`` is stdin/stdout)"""
+    return 'markdown' if path != '-' and Path(path).is_dir() else 'jsonl'
+
+
+# Reading
+
+def read_jsonl(path):
+    """``(position, record)`` per non-blank line"""
+    stream = TextIOWrapper(sys.stdin.buffer, 'utf-8') if path == '-' else open(path, encoding='utf-8')
+    with stream:
+        for number, line in enumerate(stream, 1):
+            if not line.strip():
+                continue
+            try:
+                yield f'line {number}', json.loads(line)
+            except ValueError as error:
+                raise ValueError(f"line {number}: invalid JSON ({error})")
+
+
+def parse_frontmatter(text):
+    """
+    ``(fields, body)`` from a file starting with a ``---`` delimited header.
+
+    Header lines are ``key: value``; values are read as JSON when they parse
+    (as this module writes them, a subset of YAML) and as plain strings
+    otherwise, so hand-written ``title: Hello`` works too.
+    """
+    lines = text.split('\n')
+    if not lines or lines[0].strip() != FRONTMATTER_DELIMITER:
+        return {}, text
+    fields = {}
+    for index, line in enumerate(lines[1:], 1):
+        if line.strip() == FRONTMATTER_DELIMITER:
+            return fields, '\n'.join(lines[index + 1:])
+        key, separator, value = line.partition(':')
+        if not separator or not key.strip():
+            continue
+        value = value.strip()
+        try:
+            fields[key.strip()] = json.loads(value)
+        except ValueError:
+            if value.startswith('[') and value.endswith(']'):
+                fields[key.strip()] = [item.strip().strip('\'"') for item in value[1:-1].split(',') if item.strip()]
+            else:
+                fields[key.strip()] = value.strip('\'"')
+    raise ValueError("unterminated frontmatter")
+
+
+def read_markdown(root):
+    """``(position, record)`` per ``.md`` file in the kind directories"""
+    for kind, directory in KIND_DIRECTORIES.items():
+        folder = Path(root) / directory
+        if not folder.is_dir():
+            continue
+        # scandir reads the directory lazily; sorting names only is cheap
+        for name in sorted(entry.name for entry in os.scandir(folder) if entry.name.endswith('.md')):
+            path = folder / name
+            try:
+                fields, body = parse_frontmatter(path.read_text(encoding='utf-8'))
+            except ValueError as error:
+                raise ValueError(f"{path}: {error}")
+            # "My Post.md" is my-post; a name with nothing to slugify is
+            # kept, for Importer.add to report
+            fields.setdefault('slug', slugify(path.stem) or path.stem)
+            yield str(path), {**fields, 'type': kind, BODY_FIELDS[kind]: body}
+
+
+def read_records(path):
+    return read_markdown(path) if detect_format(path) == 'markdown' else read_jsonl(path)
+
+
+# Writing
+
+def post_record(post):
+    return {
+        'type': 'post',
+        'slug': post.slug,
+        'title': post.title,
+        'excerpt': post.excerpt,
+        'category': post.category.name if post.category else None,
+        'tags': [tag.name for tag in post.tags.all()],
+        'author': post.author.username,
+        'status': post.status,
+        'featured': post.featured,
+        'published_at': post.published_at.isoformat() if post.published_at else None,
+        'featured_image': post.featured_image.name or '',
+        'content': post.content,
+    }
+
+
+def project_record(project):
+    return {
+        'type': 'project',
+        'slug': project.slug,
+        'title': project.title,
+        'short_description': project.short_description,
+        'tech_stack': [tech.name for tech in project.tech_stack.all()],
+        'github_url': project.github_url or '',
+        'live_url': project.live_url or '',
+        'status': project.status,
+        'featured': project.featured,
+        'order': project.order,
+        'case_study_content': project.case_study_content,
+    }
+
+
+def export_records(kinds=KINDS, chunk_size=1000):
+    """Every post and project as a record, read ``chunk_size`` rows at a time"""
+    if 'post' in kinds:
+        posts = (
+            Post.objects.select_related('author', 'category').prefetch_related('tags')
+            .defer('content_html', 'featured_image_variants').order_by('pk')
+        )
+        for post in posts.iterator(chunk_size=chunk_size):
+            yield post_record(post)
+    if 'project' in kinds:
+        projects = Project.objects.prefetch_related('tech_stack').defer('case_study_html').order_by('pk')
+        for project in projects.iterator(chunk_size=chunk_size):
+            yield project_record(project)
+
+
+def write_jsonl(records, stream):
+    count = 0
+    for record in records:
+        stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+        count += 1
+    return count
+
+
+def format_frontmatter(record):
+    kind = record['type']
+    fields = {key: value for key, value in record.items() if key not in ('type', BODY_FIELDS[kind])}
+    header = '\n'.join(f'{key}: {json.dumps(value, ensure_ascii=False)}' for key, value in fields.items())
+    return f'{FRONTMATTER_DELIMITER}\n{header}\n{FRONTMATTER_DELIMITER}\n{record[BODY_FIELDS[kind]]}'
+
+
+def write_markdown(records, root):
+    count = 0
+    for record in records:
+        folder = Path(root) / KIND_DIRECTORIES[record['type']]
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / f"{record['slug']}.md").write_text(format_frontmatter(record), encoding='utf-8')
+        count += 1
+    return count
+
+
+# Importing
+
+def _datetime(value):
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"invalid datetime {value!r}")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _render(pool, texts, workers):
+    """Start rendering ``texts``; returns a callable that waits for the HTML"""
+    if pool is None or len(texts) < 2:
+        return lambda: render_many(texts)
+    size = -(-len(texts) // workers)
+    futures = [pool.submit(render_many, texts[start:start + size]) for start in range(0, len(texts), size)]
+    return lambda: [html for future in futures for html in future.result()]
+
+
+class Importer:
+    """
+    Upsert records by slug, ``batch_size`` at a time.
+
+    Only a record's own slug updates an existing row: records without one
+    are new content and get a free slug from the title, as the models'
+    ``save`` does. Bulk writes skip the model signals, so ``finish`` brings
+    tag counts, the search index and cached pages up to date once at the
+    end.
+    """
+
+    def __init__(self, batch_size=1000, pool=None, workers=1, author=None):
+        self.batch_size = batch_size
+        self.pool = pool
+        self.workers = workers
+        self.default_author = author
+        self.pending = {kind: [] for kind in KINDS}
+        self.counts = Counter()
+        # name -> pk, kept across batches so each name is looked up once
+        self.categories, self.tags, self.tech, self.users = {}, {}, {}, {}
+        self.cache_tags = set()
+
+    def add(self, position, record):
+        kind = record.get('type')
+        if kind not in KINDS:
+            raise ValueError(f"{position}: unknown record type {kind!r}")
+        if not record.get('title'):
+            raise ValueError(f"{position}: missing title")
+        slug = record.get('slug')
+        if slug:
+            # Frontmatter reads slug: 2024 as a number
+            slug = str(slug)
+            record = {**record, 'slug': slug}
+            try:
+                validate_slug(slug)
+            except ValidationError:
+                raise ValueError(f"{position}: invalid slug {slug!r}")
+            if len(slug) > MODELS[kind]._meta.get_field('slug').max_length:
+                raise ValueError(f"{position}: slug {slug!r} is too long")
+        self.pending[kind].append((position, record))
+        if len(self.pending[kind]) >= self.batch_size:
+            self.flush(kind)
+
+    def flush(self, kind):
+        entries, self.pending[kind] = self.pending[kind], []
+        if not entries:
+            return
+        if kind == 'post':
+            self.resolve_users(entries)
+        # A later record for the same slug replaces an earlier one
+        records = list({record['slug']: record for _, record in entries if record.get('slug')}.values())
+        unnamed = [record for _, record in entries if not record.get('slug')]
+        if unnamed:
+            allocated = slugs.allocate_many(
+                MODELS[kind], [record['title'] for record in unnamed],
+                reserved=[record['slug'] for record in records],
+            )
+            records += [{**record, 'slug': slug} for record, slug in zip(unnamed, allocated)]
+        with transaction.atomic():
+            if kind == 'post':
+                self.write_posts(records)
+            else:
+                self.write_projects(records)
+
+    def finish(self):
+        for kind in KINDS:
+            self.flush(kind)
+        if self.cache_tags:
+            Tag.objects.refresh_post_counts()
+            call_command('rebuild_search_index', stdout=StringIO())
+            bump(*self.cache_tags)
+        return self.counts
+
+    def resolve(self, model, known, names):
+        """pks for ``names`` from one lookup per batch, creating missing rows"""
+        missing = {name for name in names if name and name not in known}
+        if missing:
+            known.update(model.objects.filter(name__in=missing).values_list('name', 'pk'))
+            new = [model(name=name) for name in sorted(missing) if name not in known]
+            if new:
+                if hasattr(model, 'slug'):
+                    slugs.assign(new, 'name')
+                model.objects.bulk_create(new)
+                known.update(model.objects.filter(name__in=[obj.name for obj in new]).values_list('name', 'pk'))
+        return known
+
+    def prepare(self, model, records, source_field, html_fields):
+        """
+        Existing rows by slug, and a callable returning each record's
+        ``(html, hash)`` once rendering finishes.
+
+        Unchanged markdown keeps its stored HTML; only new or edited
+        documents are sent to the pool.
+        """
+        html_field, hash_field = html_fields
+        existing = model.objects.filter(slug__in=[record['slug'] for record in records]).defer(
+            *(field for field in (source_field, 'featured_image_variants') if hasattr(model, field)),
+        ).in_bulk(field_name='slug')
+        hashes = [content_hash(record.get(source_field) or '') for record in records]
+        stale = [
+            index for index, (record, digest) in enumerate(zip(records, hashes))
+            if record['slug'] not in existing or getattr(existing[record['slug']], hash_field) != digest
+        ]
+        pending = _render(self.pool, [records[index].get(source_field) or '' for index in stale], self.workers)
+
+        def results():
+            rendered = dict(zip(stale, pending()))
+            return [
+                (rendered[index] if index in rendered else getattr(existing[record['slug']], html_field), digest)
+                for index, (record, digest) in enumerate(zip(records, hashes))
+            ]
+        return existing, results
+
+    def save(self, model, objs, existing, fields, source_field):
+        """
+        Insert new rows and upsert changed ones; unchanged rows are not
+        written, so their ``updated_at`` and cached pages stay as they are.
+
+        Every object has its pk afterwards. Changed rows are written with an
+        INSERT ... ON CONFLICT on the pk: bulk_update's CASE expressions
+        grow with rows times fields and dominate large imports.
+        """
+        # The source is compared through its hash, as it isn't loaded
+        compared = [model._meta.get_field(name).attname for name in fields if name not in (source_field, 'updated_at')]
+        created, changed = [], []
+        for obj in objs:
+            previous = existing.get(obj.slug)
+            if previous is None:
+                created.append(obj)
+                continue
+            obj.pk, obj.created_at = previous.pk, previous.created_at
+            if any(getattr(obj, name) != getattr(previous, name) for name in compared):
+                changed.append(obj)
+        model.objects.bulk_create(created, batch_size=self.batch_size)
+        if created and not connection.features.can_return_rows_from_bulk_insert:
+            # Backends without RETURNING leave pks unset; read them back
+            pks = dict(model.objects.filter(slug__in=[obj.slug for obj in created]).values_list('slug', 'pk'))
+            for obj in created:
+                obj.pk = pks[obj.slug]
+        model.objects.bulk_create(
+            changed, batch_size=self.batch_size, update_conflicts=True, unique_fields=['id'], update_fields=fields,
+        )
+        # The upsert ran pre_save(add=True), which set created_at to now on
+        # the objects; the rows keep theirs, and tag links copy it
+        for obj in changed:
+            obj.created_at = existing[obj.slug].created_at
+        self.counts[f'{model._meta.model_name}s created'] += len(created)
+        self.counts[f'{model._meta.model_name}s updated'] += len(changed)
+        self.counts[f'{model._meta.model_name}s unchanged'] += len(objs) - len(created) - len(changed)
+        return created + changed
+
+    def write_posts(self, records):
+        existing, rendered = self.prepare(Post, records, 'content', ('content_html', 'content_html_hash'))
+        categories = self.resolve(Category, self.categories, [record.get('category') for record in records])
+        tags = self.resolve(Tag, self.tags, [name for record in records for name in record.get('tags') or ()])
+
+        now = timezone.now()
+        posts = []
+        for record, (html, digest) in zip(records, rendered()):
+            post = Post(slug=record['slug'])
+            post.title = record['title']
+            post.excerpt = record.get('excerpt', '')
+            post.content = record.get('content', '')
+            post.content_html, post.content_html_hash = html, digest
+            post.category_id = categories.get(record.get('category'))
+            post.author_id = self.users[record['author']] if record.get('author') else self.author_id()
+            post.status = record.get('status', 'draft')
+            post.featured = bool(record.get('featured', False))
+            previous = existing.get(record['slug'])
+            post.published_at = _datetime(record.get('published_at')) or (previous and previous.published_at)
+            if post.status == 'published' and not post.published_at:
+                post.published_at = now
+            post.featured_image = record.get('featured_image') or ''
+            post.updated_at = now
+            posts.append(post)
+        written = self.save(Post, posts, existing, [
+            'title', 'excerpt', 'content', 'content_html', 'content_html_hash', 'category', 'author',
+            'status', 'featured', 'published_at', 'featured_image', 'updated_at',
+        ], 'content')
+
+        relinked = self.write_tag_links(posts, [
+            {tags[name] for name in record.get('tags') or ()} for record in records
+        ])
+
+        for post in written:
+            self.cache_tags.add(f'post:{post.pk}')
+            # Both the category a post moved to and the one it left
+            for previous in (post, existing.get(post.slug)):
+                if previous and previous.category_id:
+                    self.cache_tags.add(f'category:{previous.category_id}')
+        self.cache_tags |= {f'post:{pk}' for pk in relinked}
+        if written or relinked:
+            self.cache_tags |= {'post-list', 'featured-posts', 'categories'}
+            self.cache_tags |= {f'tag:{pk}' for pk in tags.values()}
+
+    def write_tag_links(self, posts, tag_ids):
+        """
+        Make each post's tag links match ``tag_ids``, with current sort keys.
+
+        Links are diffed rather than replaced: deleting a PostTag fires the
+        per-link signal handlers, which only removed tags should pay for.
+        Returns the pks of posts whose tags changed.
+        """
+        wanted = {(post.pk, tag_id): post for post, ids in zip(posts, tag_ids) for tag_id in ids}
+        stale, removed, relinked = [], [], set()
+        for link in PostTag.objects.filter(post__in=[post.pk for post in posts]):
+            post = wanted.pop((link.post_id, link.tag_id), None)
+            if post is None:
+                removed.append(link.pk)
+                relinked.add(link.post_id)
+            elif any(getattr(link, field) != value for field, value in PostTag.sort_key(post).items()):
+                stale.append(PostTag(post_id=link.post_id, tag_id=link.tag_id, **PostTag.sort_key(post)))
+        if removed:
+            PostTag.objects.filter(pk__in=removed).delete()
+        PostTag.objects.bulk_create(
+            stale, batch_size=self.batch_size, update_conflicts=True, unique_fields=['post', 'tag'],
+            update_fields=['published', 'published_at', 'created_at'],
+        )
+        PostTag.objects.bulk_create((
+            PostTag(post_id=post_id, tag_id=tag_id, **PostTag.sort_key(post))
+            for (post_id, tag_id), post in wanted.items()
+        ), batch_size=self.batch_size)
+        return relinked | {post_id for post_id, _ in wanted}
+
+    def write_projects(self, records):
+        existing, rendered = self.prepare(
+            Project, records, 'case_study_content', ('case_study_html', 'case_study_html_hash'),
+        )
+        tech = self.resolve(TechStack, self.tech, [name for record in records for name in record.get('tech_stack') or ()])
+
+        now = timezone.now()
+        projects = []
+        for record, (html, digest) in zip(records, rendered()):
+            project = Project(slug=record['slug'])
+            project.title = record['title']
+            project.short_description = record.get('short_description', '')
+            project.case_study_content = record.get('case_study_content', '')
+            project.case_study_html, project.case_study_html_hash = html, digest
+            project.github_url = record.get('github_url') or None
+            project.live_url = record.get('live_url') or None
+            project.status = record.get('status', 'draft')
+            project.featured = bool(record.get('featured', False))
+            project.order = int(record.get('order', 0))
+            project.updated_at = now
+            projects.append(project)
+        written = self.save(Project, projects, existing, [
+            'title', 'short_description', 'case_study_content', 'case_study_html', 'case_study_html_hash',
+            'github_url', 'live_url', 'status', 'featured', 'order', 'updated_at',
+        ], 'case_study_content')
+
+        through = Project.tech_stack.through
+        wanted = {
+            (project.pk, tech[name]) for project, record in zip(projects, records)
+            for name in record.get('tech_stack') or ()
+        }
+        removed, retagged = [], set()
+        for pk, project_id, tech_id in through.objects.filter(
+            project__in=[project.pk for project in projects],
+        ).values_list('pk', 'project_id', 'techstack_id'):
+            if (project_id, tech_id) in wanted:
+                wanted.discard((project_id, tech_id))
+            else:
+                removed.append(pk)
+                retagged.add(project_id)
+        through.objects.filter(pk__in=removed).delete()
+        through.objects.bulk_create(
+            (through(project_id=project_id, techstack_id=tech_id) for project_id, tech_id in wanted),
+            batch_size=self.batch_size,
+        )
+        retagged |= {project_id for project_id, _ in wanted}
+
+        changed = {project.pk for project in written} | retagged
+        self.cache_tags |= {f'project:{pk}' for pk in changed}
+        if changed:
+            self.cache_tags |= {'project-list', 'featured-projects', 'tech-stack'}
+
+    def resolve_users(self, entries):
+        """Look up the batch's authors; an author a record names must exist"""
+        names = {record.get('author') for _, record in entries} - set(self.users) - {None, ''}
+        if names:
+            self.users.update(User.objects.filter(username__in=names).values_list('username', 'pk'))
+        for position, record in entries:
+            if record.get('author') and record['author'] not in self.users:
+                raise ValueError(f"{position}: unknown author {record['author']!r}")
+
+    def author_id(self):
+        if self.default_author is None:
+            self.default_author = User.objects.filter(is_superuser=True).order_by('pk').first()
+            if self.default_author is None:
+                raise ValueError("posts without an author need --author or a superuser")
+        return self.default_author.pk
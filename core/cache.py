@@ -0,0 +1,186 @@
+"""
+Page caching
+Whole-response cache for anonymous visitors. Each cached page records the
+generation of the content tags it depends on (e.g. ``post:12``,
+``post-list``); bumping a tag from a model signal makes every page that
+depends on it miss on its next request, and nothing else.
+
+Pages are stored compressed in every encoding ``core.compression`` can
+produce; a hit is sent in the client's preferred one as stored.
+"""
+import gzip
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+
+from .cache_backends import TieredCache
+from .compression import negotiate, precompress
+from .timing import record
+
+GENERATION_PREFIX = 'generation:'
+# When any tag was last bumped, i.e. when public content last changed
+CHANGED_KEY = 'generation-changed-at'
+PAGE_PREFIX = 'page:v2:'
+
+
+def get_cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+def get_generation_cache():
+    # Counters are read from the shared tier only: a worker-local copy
+    # would keep serving stale pages after another worker bumped a tag.
+    cache = get_cache()
+    return cache.shared if isinstance(cache, TieredCache) else cache
+
+
+def _generation_key(tag):
+    return f'{GENERATION_PREFIX}{tag}'
+
+
+def get_generations(tags):
+    """Current generation of each tag, initializing any that are missing"""
+    cache = get_generation_cache()
+    keys = {_generation_key(tag): tag for tag in tags}
+    found = cache.get_many(keys)
+    for key, tag in keys.items():
+        if key not in found:
+            # Seed from the clock rather than 0, so a counter that was
+            # evicted never comes back at a value an old page recorded.
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+    return {tag: found[key] for key, tag in keys.items()}
+
+
+def bump(*tags):
+    """Invalidate every cached page depending on any of ``tags``"""
+    cache = get_generation_cache()
+    for tag in set(tags):
+        try:
+            cache.incr(_generation_key(tag))
+        except ValueError:
+            cache.set(_generation_key(tag), time.time_ns(), None)
+    cache.set(CHANGED_KEY, time.time(), None)
+
+
+def changed_at():
+    """Unix time of the last bump(), or 0 if none is recorded"""
+    return get_generation_cache().get(CHANGED_KEY, 0)
+
+
+def page_cache_key(request):
+    path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+    return f'{PAGE_PREFIX}{path}'
+
+
+def is_cacheable(request):
+    """Only anonymous, cookie-free GET/HEAD requests share cached pages"""
+    if not settings.PAGE_CACHE_ENABLED or request.method not in ('GET', 'HEAD'):
+        return False
+    # Pending flash messages or a session mean the page may be personalized
+    if 'messages' in request.COOKIES or settings.SESSION_COOKIE_NAME in request.COOKIES:
+        return False
+    return not request.user.is_authenticated
+
+
+def get_cached_entry(request):
+    """The page cache entry for ``request`` if still current, read once per request"""
+    try:
+        return request._page_cache_entry
+    except AttributeError:
+        pass
+    entry = get_cache().get(page_cache_key(request))
+    if entry is not None and get_generations(entry['generations']) != entry['generations']:
+        entry = None
+    request._page_cache_entry = entry
+    return entry
+
+
+def get_cached_page(request):
+    entry = get_cached_entry(request)
+    if entry is None:
+        return None
+    encodings = entry['encodings']
+    encoding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''), list(encodings))
+    if encoding is None:
+        response = HttpResponse(gzip.decompress(encodings['gzip']), content_type=entry['content_type'])
+    else:
+        response = HttpResponse(encodings[encoding], content_type=entry['content_type'])
+        response['Content-Encoding'] = encoding
+        # For CompressionMiddleware, which weakens the ETag of encoded bodies
+        response.precompressed = encodings
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
+
+
+def store_page(request, response, generations, validators=None):
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return
+    entry = {
+        'generations': generations,
+        # Conditional GET validators sent with the page, so a hit needs no query
+        'validators': validators,
+        'encodings': precompress(response.content),
+        'content_type': response['Content-Type'],
+    }
+    # Lets CompressionMiddleware send this response without compressing again
+    response.precompressed = entry['encodings']
+    get_cache().set(page_cache_key(request), entry, settings.PAGE_CACHE_TIMEOUT)
+
+
+class PageCacheMixin:
+    """
+    Serve whole responses from the page cache for anonymous visitors.
+
+    Views list the content their page depends on in ``get_cache_tags``,
+    which is called after the view has run (so ``self.object`` is set).
+    """
+
+    def get_cache_tags(self):
+        return []
+
+    def get_page_generations(self):
+        """Generations the page is stored under; views built from older data return those"""
+        return get_generations(self.get_cache_tags())
+
+    def get_cached_validators(self):
+        """The validators stored with a current cached page, for ConditionalGetMixin"""
+        if not is_cacheable(self.request):
+            return None
+        entry = get_cached_entry(self.request)
+        return entry and entry.get('validators')
+
+    def read_cache(self, request):
+        """Whether the page may be cached, and its current cached copy if any"""
+        if not is_cacheable(request):
+            record('page-cache', 'bypass')
+            return False, None
+        cached = get_cached_page(request)
+        record('page-cache', 'miss' if cached is None else 'hit')
+        return True, cached
+
+    def store_response(self, request, response, generations):
+        """Store a rendered page, or a template response once it renders"""
+        validators = getattr(self, 'validators', None)
+        if hasattr(response, 'add_post_render_callback'):
+            response.add_post_render_callback(
+                lambda rendered: store_page(request, rendered, generations, validators)
+            )
+        else:
+            store_page(request, response, generations, validators)
+
+    def dispatch(self, request, *args, **kwargs):
+        cacheable, cached = self.read_cache(request)
+        if cached is not None:
+            return cached
+
+        response = super().dispatch(request, *args, **kwargs)
+        if cacheable and response.status_code == 200:
+            # Read generations before the template evaluates its querysets,
+            # so an edit landing mid-render leaves a page that is already stale.
+            self.store_response(request, response, self.get_page_generations())
+        return response
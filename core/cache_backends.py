@@ -0,0 +1,182 @@
+"""
+Cache backends
+A two-tier cache: a bounded in-process LRU in front of a shared backend,
+so hot entries are served without a network round trip while every
+gunicorn worker still sees the same data.
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+class TieredCache(BaseCache):
+    """
+    In-process LRU (TTL + byte budget) over the cache alias ``SHARED``.
+
+    Local copies live at most ``LOCAL_TIMEOUT`` seconds, which bounds how
+    stale one worker's copy can be after another worker overwrites the
+    key. Writes go to both tiers; counters (``incr``/``decr``) always go to
+    the shared tier and are never held locally.
+
+    OPTIONS: ``SHARED`` (alias, required), ``LOCAL_TIMEOUT`` (seconds,
+    default 5), ``LOCAL_MAX_BYTES`` (default 16 MiB), ``LOCAL_MAX_ENTRIES``
+    (default 10000).
+    """
+
+    def __init__(self, location, params):
+        options = params.get('OPTIONS', {})
+        super().__init__({**params, 'OPTIONS': {}})
+        self.shared_alias = options['SHARED']
+        self.local_timeout = options.get('LOCAL_TIMEOUT', 5)
+        self.local_max_bytes = options.get('LOCAL_MAX_BYTES', 16 * 1024 * 1024)
+        self.local_max_entries = options.get('LOCAL_MAX_ENTRIES', 10000)
+        self._local = OrderedDict()  # key -> (expires_at, pickled value)
+        self._local_bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0}
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    def stats(self):
+        """Counters for this process, plus the local tier's current size"""
+        with self._lock:
+            return {**self.counters, 'local_entries': len(self._local), 'local_bytes': self._local_bytes}
+
+    # Local tier
+
+    def _local_get(self, key):
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._local_discard(key)
+                self.counters['expirations'] += 1
+                return None
+            self._local.move_to_end(key)
+            self.counters['local_hits'] += 1
+        return pickle.loads(entry[1])
+
+    def _local_set(self, key, value, timeout=DEFAULT_TIMEOUT):
+        timeout = self.get_backend_timeout(timeout)
+        ttl = self.local_timeout if timeout is None else min(timeout - time.time(), self.local_timeout)
+        if ttl <= 0:
+            self._local_delete(key)
+            return
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        if len(pickled) > self.local_max_bytes:
+            self._local_delete(key)
+            return
+        with self._lock:
+            self._local_discard(key)
+            self._local[key] = (time.monotonic() + ttl, pickled)
+            self._local_bytes += len(pickled)
+            while self._local_bytes > self.local_max_bytes or len(self._local) > self.local_max_entries:
+                _, (_, evicted) = self._local.popitem(last=False)
+                self._local_bytes -= len(evicted)
+                self.counters['evictions'] += 1
+
+    def _local_discard(self, key):
+        # Caller holds the lock
+        entry = self._local.pop(key, None)
+        if entry is not None:
+            self._local_bytes -= len(entry[1])
+
+    def _local_delete(self, key):
+        with self._lock:
+            self._local_discard(key)
+
+    # Cache API. The shared tier gets the caller's key and version and
+    # applies its own prefix; the local tier uses this backend's.
+
+    def _key(self, key, version):
+        return self.make_and_validate_key(key, version=version)
+
+    def get(self, key, default=None, version=None):
+        local_key = self._key(key, version)
+        value = self._local_get(local_key)
+        if value is not None:
+            return value
+        sentinel = object()
+        value = self.shared.get(key, sentinel, version=version)
+        if value is sentinel:
+            with self._lock:
+                self.counters['misses'] += 1
+            return default
+        with self._lock:
+            self.counters['shared_hits'] += 1
+        self._local_set(local_key, value)
+        return value
+
+    def get_many(self, keys, version=None):
+        found, missing = {}, []
+        for key in keys:
+            value = self._local_get(self._key(key, version))
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            shared = self.shared.get_many(missing, version=version)
+            with self._lock:
+                self.counters['shared_hits'] += len(shared)
+                self.counters['misses'] += len(missing) - len(shared)
+            for key, value in shared.items():
+                self._local_set(self._key(key, version), value)
+            found.update(shared)
+        return found
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        self._local_set(self._key(key, version), value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self._local_set(self._key(key, version), value, timeout)
+        return added
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        for key, value in data.items():
+            if key not in failed:
+                self._local_set(self._key(key, version), value, timeout)
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self._local_delete(self._key(key, version))
+        return self.shared.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        for key in keys:
+            self._local_delete(self._key(key, version))
+        self.shared.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        return self._local_get(self._key(key, version)) is not None or self.shared.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self._local_delete(self._key(key, version))
+        return self.shared.incr(key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        self._local_delete(self._key(key, version))
+        return self.shared.decr(key, delta, version=version)
+
+    def clear(self):
+        with self._lock:
+            self._local.clear()
+            self._local_bytes = 0
+        self.shared.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
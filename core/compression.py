@@ -0,0 +1,154 @@
+"""
+Response compression
+Negotiates Brotli or gzip from Accept-Encoding and compresses text
+responses. Pages in the page cache are stored already compressed in each
+encoding, so a cache hit is served without compressing anything.
+"""
+import gzip
+import re
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+
+from .timing import timer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Below this size the encoding overhead outweighs the saving
+MIN_SIZE = 200
+
+COMPRESSIBLE_TYPES = re.compile(
+    r'^(text/|application/(json|javascript|xml|atom\+xml|rss\+xml|manifest\+json)|image/svg\+xml)'
+)
+
+# Levels for compressing on every request, and for compressing once when
+# a page is stored in the page cache
+LIVE_LEVELS = {'br': 4, 'gzip': 6}
+STORED_LEVELS = {'br': 9, 'gzip': 9}
+
+
+def available_encodings():
+    """Encodings this process can produce, in order of preference"""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def negotiate(accept_encoding, available=None):
+    """
+    The preferred encoding the client accepts from ``available``, or None.
+
+    Follows the q-values in ``accept_encoding``; ties go to the order of
+    ``available`` (Brotli first, as it compresses HTML better).
+    """
+    if available is None:
+        available = available_encodings()
+    accepted = {}
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().lower().partition(';')
+        quality = 1.0
+        match = re.search(r'q=([0-9.]+)', params)
+        if match:
+            try:
+                quality = float(match.group(1))
+            except ValueError:
+                continue
+        if coding:
+            accepted[coding.strip()] = quality
+
+    best, best_quality = None, 0.0
+    for coding in available:
+        quality = accepted.get(coding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+def compress(content, encoding, levels=LIVE_LEVELS):
+    if encoding == 'br':
+        return brotli.compress(content, quality=levels['br'])
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(content, compresslevel=levels['gzip'], mtime=0)
+
+
+def precompress(content):
+    """``content`` in every available encoding, for the page cache"""
+    return {encoding: compress(content, encoding, STORED_LEVELS) for encoding in available_encodings()}
+
+
+def is_compressible(response):
+    return bool(COMPRESSIBLE_TYPES.match(response.get('Content-Type', '')))
+
+
+def _weaken_etag(response):
+    # The compressed body is not byte-identical to the one the strong
+    # validator described
+    etag = response.get('ETag')
+    if etag and etag.startswith('"'):
+        response['ETag'] = 'W/' + etag
+
+
+class CompressionMiddleware:
+    """
+    Compress text responses with Brotli (when installed) or gzip.
+
+    Responses that already carry a Content-Encoding, such as page cache
+    hits and WhiteNoise's precompressed static files, pass through as-is.
+    Streaming responses are gzipped incrementally. Usable from both the
+    WSGI and the ASGI handler.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.process(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process(request, await self.get_response(request))
+
+    def process(self, request, response):
+        if not is_compressible(response):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if response.has_header('Content-Encoding'):
+            # A page cache hit in one of its stored encodings gets the same
+            # weak ETag as a freshly compressed page
+            if hasattr(response, 'precompressed'):
+                _weaken_etag(response)
+            return response
+
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if response.streaming:
+            # Async iterators (ASGI streaming) are passed through uncompressed
+            if not response.is_async and negotiate(accept_encoding, ['gzip']):
+                response.streaming_content = compress_sequence(response.streaming_content)
+                response.headers.pop('Content-Length', None)
+                response['Content-Encoding'] = 'gzip'
+                _weaken_etag(response)
+            return response
+
+        encoding = negotiate(accept_encoding)
+        if encoding is None or len(response.content) < MIN_SIZE:
+            return response
+        # Set by the page cache when it stored this response
+        compressed = getattr(response, 'precompressed', {}).get(encoding)
+        if compressed is None:
+            with timer('compress'):
+                compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        _weaken_etag(response)
+        return response
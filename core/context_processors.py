@@ -0,0 +1,12 @@
+"""
+Core context processors
+"""
+from . import reference
+
+
+def reference_data(request):
+    # Callables, so templates only load the sets they actually use
+    return {
+        'categories': reference.categories,
+        'tech_stack': reference.tech_stack,
+    }
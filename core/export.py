@@ -0,0 +1,165 @@
+"""
+Static export
+Renders the public site through the normal request stack into plain files
+any static server can serve. Pages are found by following links from the
+fixed public routes; each page's ETag and links are kept in a manifest,
+so a later export only re-renders pages whose validators changed. ETags
+include cache tag generations, so that needs a cache shared by, and
+outliving, the export processes (Redis, database or file cache); with a
+per-process cache every page is rendered and only changed files are
+written.
+"""
+import json
+import os
+import re
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import Client, override_settings
+from django.urls import get_resolver, reverse
+
+from .cache import get_generation_cache
+from .compression import COMPRESSIBLE_TYPES, MIN_SIZE, precompress
+from .routes import route_names
+
+MANIFEST_NAME = '.export-manifest.json'
+
+# Routes that need the application at request time
+DYNAMIC_ROUTES = {'core:search', 'core:contact'}
+
+# Site-relative links, and the absolute locations in sitemaps (which only
+# list this site's pages); query strings and fragments don't name other files
+LINK_PATTERN = re.compile(r'href="(/(?!/)[^"#?]*)|<loc>https?://[^/<]+(/[^<#?]*)</loc>')
+
+# WhiteNoise and most static servers pick these up next to the original
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+# A static server ignores query strings: lists are rendered with their
+# path-based numbered pages, and cursor links are left out. Export
+# renders never enter the page cache live visitors are served from.
+export_settings = override_settings(PAGINATION_MODE='numbered', STATIC_EXPORT=True, PAGE_CACHE_ENABLED=False)
+
+_client = None
+
+
+def seed_paths():
+    """Paths of the public routes that take no arguments"""
+    return [
+        reverse(name) for name, converters in route_names(get_resolver().url_patterns)
+        if not converters and name not in DYNAMIC_ROUTES
+    ]
+
+
+def validators_persist():
+    """Whether ETags from an earlier export can still match this one"""
+    return not isinstance(get_generation_cache(), (LocMemCache, DummyCache))
+
+
+def excluded_prefixes():
+    return [
+        '/' + settings.STATIC_URL.lstrip('/'), '/' + settings.MEDIA_URL.lstrip('/'), '/admin/',
+        *(reverse(name) for name in DYNAMIC_ROUTES),
+    ]
+
+
+def extract_links(content, excluded):
+    links = {href or loc for href, loc in LINK_PATTERN.findall(content.decode('utf-8', 'replace'))}
+    return sorted(link for link in links if not link.startswith(tuple(excluded)))
+
+
+def fetch(path, etag, host, secure):
+    """
+    Worker entry point: ``(status, etag, content type, body)`` for ``path``.
+
+    Sends the ETag from the previous export, so unchanged pages come back
+    as 304 without rendering.
+    """
+    global _client
+    if _client is None:
+        _client = Client(HTTP_HOST=host)
+    headers = {'If-None-Match': etag} if etag else {}
+    with export_settings:
+        response = _client.get(path, secure=secure, headers=headers)
+        content = response.getvalue() if response.streaming else response.content
+    return response.status_code, response.get('ETag'), response.get('Content-Type', ''), content
+
+
+def output_path(root, path):
+    """File for URL ``path``: directories get an ``index.html``"""
+    relative = path.lstrip('/')
+    return root / relative / 'index.html' if path.endswith('/') else root / relative
+
+
+def _write_atomic(target, content):
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp = tempfile.mkstemp(dir=target.parent, prefix='.export-')
+    with os.fdopen(fd, 'wb') as handle:
+        handle.write(content)
+    os.replace(temp, target)
+
+
+def write_page(root, path, content, content_type):
+    """
+    Write the page and its precompressed copies; False if it is unchanged.
+    """
+    target = output_path(root, path)
+    if target.exists() and target.read_bytes() == content:
+        return False
+    _write_atomic(target, content)
+    if COMPRESSIBLE_TYPES.match(content_type) and len(content) >= MIN_SIZE:
+        for encoding, data in precompress(content).items():
+            _write_atomic(target.with_name(target.name + ENCODING_SUFFIXES[encoding]), data)
+    else:
+        for suffix in ENCODING_SUFFIXES.values():
+            target.with_name(target.name + suffix).unlink(missing_ok=True)
+    return True
+
+
+def remove_page(root, path):
+    target = output_path(root, path)
+    for suffix in ('', *ENCODING_SUFFIXES.values()):
+        target.with_name(target.name + suffix).unlink(missing_ok=True)
+    # Drop directories the page leaves empty
+    for parent in target.parents:
+        if parent == root or root not in parent.parents:
+            break
+        try:
+            parent.rmdir()
+        except OSError:
+            break
+
+
+def load_manifest(root):
+    try:
+        return json.loads((root / MANIFEST_NAME).read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_manifest(root, manifest):
+    _write_atomic(root / MANIFEST_NAME, json.dumps(manifest, indent=1, sort_keys=True).encode())
+
+
+def sync_tree(source, destination):
+    """Copy files missing from ``destination`` or differing in size or mtime"""
+    copied = 0
+    source = Path(source)
+    if not source.is_dir():
+        return copied
+    for directory, _, files in os.walk(source):
+        for name in files:
+            origin = Path(directory) / name
+            target = destination / origin.relative_to(source)
+            stat = origin.stat()
+            if target.exists():
+                current = target.stat()
+                if current.st_size == stat.st_size and int(current.st_mtime) == int(stat.st_mtime):
+                    continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(origin, target)
+            copied += 1
+    return copied
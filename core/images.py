@@ -0,0 +1,162 @@
+"""
+Responsive images
+Resized WebP/AVIF derivatives of uploaded images, saved to media storage
+under content-hashed names and described by a small JSON manifest on the
+model, so templates can emit ``srcset`` without touching disk.
+"""
+import hashlib
+import logging
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+logger = logging.getLogger('portfolio.images')
+
+try:
+    # Registers AVIF support on Pillow versions without it built in
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+DERIVATIVE_DIR = 'derivatives'
+DERIVATIVE_WIDTHS = (320, 640, 960, 1280, 1920)
+QUALITY = {'avif': 55, 'webp': 80, 'jpeg': 82}
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpeg': 'image/jpeg', 'png': 'image/png'}
+
+
+def modern_formats():
+    """Next-generation formats this Pillow build can encode, best first"""
+    Image.init()
+    formats = []
+    if 'AVIF' in Image.SAVE:
+        formats.append('avif')
+    if features.check('webp'):
+        formats.append('webp')
+    return formats
+
+
+# Changing widths, formats or quality invalidates every stored manifest
+PIPELINE_SIGNATURE = hashlib.sha256(
+    repr((DERIVATIVE_WIDTHS, modern_formats(), sorted(QUALITY.items()))).encode()
+).hexdigest()[:16]
+
+
+def image_hash(data):
+    """Hash of the source image bytes plus the pipeline configuration"""
+    digest = hashlib.sha256(PIPELINE_SIGNATURE.encode())
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def _encode(image, fmt):
+    buffer = BytesIO()
+    if fmt == 'jpeg':
+        image.convert('RGB').save(buffer, 'JPEG', quality=QUALITY['jpeg'], optimize=True, progressive=True)
+    elif fmt == 'png':
+        image.save(buffer, 'PNG', optimize=True)
+    else:
+        image.save(buffer, fmt.upper(), quality=QUALITY[fmt])
+    return buffer.getvalue()
+
+
+def build_derivatives(data, storage):
+    """
+    Write every derivative of the image in ``data`` to ``storage``.
+
+    Names are derived from the content hash, so unchanged images map to
+    files that already exist and are not encoded again. Returns the
+    manifest stored on the model (minus ``source``).
+    """
+    digest = image_hash(data)
+    with Image.open(BytesIO(data)) as opened:
+        original = ImageOps.exif_transpose(opened)
+        original.load()
+    width, height = original.size
+    has_alpha = original.mode in ('RGBA', 'LA') or 'transparency' in original.info
+    if not has_alpha and original.mode not in ('RGB', 'L'):
+        original = original.convert('RGB')
+
+    # Never upscale; an image narrower than every step gets its own width
+    widths = [w for w in DERIVATIVE_WIDTHS if w < width] + [min(width, DERIVATIVE_WIDTHS[-1])]
+    fallback = 'png' if has_alpha else 'jpeg'
+
+    sources = {fmt: [] for fmt in [*modern_formats(), fallback]}
+    for target in widths:
+        resized = None
+        for fmt, entries in sources.items():
+            name = f'{DERIVATIVE_DIR}/{digest[:2]}/{digest[:24]}-{target}w.{fmt}'
+            if storage.exists(name):
+                size = storage.size(name)
+            else:
+                if resized is None:
+                    resized = original if target == width else original.resize(
+                        (target, round(height * target / width)), Image.Resampling.LANCZOS, reducing_gap=3.0,
+                    )
+                content = _encode(resized, fmt)
+                name = storage.save(name, ContentFile(content))
+                size = len(content)
+            entries.append([target, name, size])
+
+    return {
+        'hash': digest, 'bytes': len(data), 'width': width, 'height': height,
+        'fallback': fallback, 'sources': sources,
+    }
+
+
+def is_current(name, manifest):
+    """True if ``manifest`` was built for file ``name`` by this pipeline"""
+    return bool(manifest) and manifest.get('source') == name and manifest.get('pipeline') == PIPELINE_SIGNATURE
+
+
+def derivatives_cached(instance, image_field, manifest_field, persist=True):
+    """
+    Return the derivative manifest for ``image_field``, building it when stale.
+
+    With ``persist`` the manifest is written back with a queryset update,
+    like ``render_cached``. A file that can't be read or decoded records an
+    empty manifest for that name, so it isn't retried on every request.
+    """
+    field_file = getattr(instance, image_field)
+    manifest = getattr(instance, manifest_field)
+    if not field_file:
+        if not manifest:
+            return manifest
+        manifest = {}
+    elif is_current(field_file.name, manifest):
+        return manifest
+    else:
+        manifest = build_manifest(field_file.name, field_file.storage)
+
+    setattr(instance, manifest_field, manifest)
+    if persist and instance.pk:
+        type(instance)._default_manager.filter(pk=instance.pk).update(**{manifest_field: manifest})
+    return manifest
+
+
+def build_manifest(name, storage, previous_hash=None):
+    """
+    Build the manifest for the stored file ``name``.
+
+    Returns ``None`` when the file's content hash equals ``previous_hash``.
+    A file that can't be read or decoded gets a manifest with no sources.
+    """
+    try:
+        with storage.open(name, 'rb') as source:
+            data = source.read()
+        if previous_hash is not None and image_hash(data) == previous_hash:
+            return None
+        manifest = build_derivatives(data, storage)
+    except FileNotFoundError:
+        # Common where a database was copied without its media
+        logger.debug("No file for %s, skipping derivatives", name)
+        manifest = {'sources': {}}
+    except (OSError, ValueError, Image.DecompressionBombError) as error:
+        logger.warning("Could not build derivatives for %s: %s", name, error)
+        manifest = {'sources': {}}
+    manifest.update(source=name, pipeline=PIPELINE_SIGNATURE)
+    return manifest
+
+
+def srcset(entries, storage):
+    return ', '.join(f'{storage.url(name)} {width}w' for width, name, _ in entries)
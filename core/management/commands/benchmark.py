@@ -0,0 +1,65 @@
+"""
+Benchmark every public URL against a stored baseline
+"""
+import json
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmark
+from core.testing import public_site_settings
+
+
+class Command(BaseCommand):
+    help = "Seed a throwaway database and benchmark every public URL"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--projects', type=int, default=500)
+        parser.add_argument('--images', type=int, default=5000)
+        parser.add_argument('--tech', type=int, default=100)
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument(
+            '--baseline', default=str(settings.BASE_DIR / 'benchmarks' / 'baseline.json'),
+            help="JSON file the results are compared against",
+        )
+        parser.add_argument(
+            '--update-baseline', action='store_true',
+            help="Write the results to the baseline instead of comparing",
+        )
+        parser.add_argument('--latency-tolerance', type=float, default=0.5)
+        parser.add_argument('--memory-tolerance', type=float, default=0.25)
+
+    def handle(self, *args, **options):
+        with benchmark.throwaway_database():
+            benchmark.seed_dataset(
+                posts=options['posts'], projects=options['projects'],
+                images=options['images'], tech=options['tech'],
+            )
+            with public_site_settings:
+                results = benchmark.run(iterations=options['iterations'])
+
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<20} {result['queries']:>3} queries  p50 {result['p50_ms']:>8.2f}ms  "
+                f"p95 {result['p95_ms']:>8.2f}ms  peak {result['peak_kib']:>8.1f}KiB"
+            )
+
+        baseline_path = Path(options['baseline'])
+        if options['update_baseline']:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(results, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {baseline_path}"))
+            return
+
+        if not baseline_path.exists():
+            raise CommandError(f"No baseline at {baseline_path}; run with --update-baseline first")
+        regressions = benchmark.compare(
+            results, json.loads(baseline_path.read_text()),
+            latency_tolerance=options['latency_tolerance'],
+            memory_tolerance=options['memory_tolerance'],
+        )
+        if regressions:
+            raise CommandError("Performance regressions:\n  " + "\n  ".join(regressions))
+        self.stdout.write(self.style.SUCCESS("No regressions against baseline"))
@@ -0,0 +1,39 @@
+"""
+Compare throughput of the WSGI and ASGI stacks
+"""
+from django.core.management.base import BaseCommand
+
+from core import benchmark
+from core.benchmark import asgi as asgi_benchmark
+from core.testing import public_site_settings
+
+
+class Command(BaseCommand):
+    help = "Seed a throwaway database and compare requests/s of the sync and async views"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--projects', type=int, default=100)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--requests', type=int, default=200)
+
+    def handle(self, *args, **options):
+        with benchmark.throwaway_database():
+            benchmark.seed_dataset(
+                posts=options['posts'], projects=options['projects'],
+                images=options['projects'] * 4, tech=20,
+            )
+            with public_site_settings:
+                results = asgi_benchmark.measure_throughput(options['concurrency'], options['requests'])
+
+        self.stdout.write(
+            f"{options['concurrency']} concurrent requests; "
+            "peak is memory allocated while serving, not process RSS"
+        )
+        self.stdout.write(f"{'route':<20} {'wsgi req/s':>10} {'asgi req/s':>10} {'wsgi peak':>12} {'asgi peak':>12}")
+        for name, stacks in results.items():
+            wsgi, asgi = stacks['wsgi'], stacks['asgi']
+            self.stdout.write(
+                f"{name:<20} {wsgi['rps']:>10.1f} {asgi['rps']:>10.1f} "
+                f"{wsgi['peak_kib']:>9.1f}KiB {asgi['peak_kib']:>9.1f}KiB"
+            )
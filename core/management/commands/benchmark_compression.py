@@ -0,0 +1,36 @@
+"""
+Compare response size and CPU time across content encodings
+"""
+from django.core.management.base import BaseCommand
+
+from core import benchmark
+from core.benchmark import compression as compression_benchmark
+from core.testing import public_site_settings
+
+
+class Command(BaseCommand):
+    help = "Seed a throwaway database and measure bytes and CPU per request for each encoding"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--projects', type=int, default=100)
+        parser.add_argument('--iterations', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with benchmark.throwaway_database():
+            benchmark.seed_dataset(
+                posts=options['posts'], projects=options['projects'],
+                images=options['projects'] * 4, tech=20,
+            )
+            with public_site_settings:
+                results = compression_benchmark.measure_compression(iterations=options['iterations'])
+
+        self.stdout.write(f"{'route':<20} {'encoding':<9} {'bytes':>9}  {'uncached cpu':>12}  {'cached cpu':>10}")
+        for name, encodings in results.items():
+            identity = encodings['identity']['bytes']
+            for encoding, row in encodings.items():
+                ratio = f"{row['bytes'] / identity:>6.1%}" if identity else ''
+                self.stdout.write(
+                    f"{name:<20} {encoding:<9} {row['bytes']:>9} {ratio}  "
+                    f"{row['cpu_ms']:>10.2f}ms  {row['cached_cpu_ms']:>8.2f}ms"
+                )
@@ -0,0 +1,44 @@
+"""
+Benchmark full-text search latency on a synthetic corpus
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmark
+from core.benchmark import search as search_benchmark
+
+
+class Command(BaseCommand):
+    help = "Seed a throwaway database with search documents and time ranked queries"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--documents', type=int, default=50000)
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument(
+            '--budget-ms', type=float, default=10.0,
+            help="Fail if any selective query's p95 latency exceeds this",
+        )
+        parser.add_argument(
+            '--selective-fraction', type=float, default=0.05,
+            help="Queries matching at most this fraction of documents are held to the budget",
+        )
+
+    def handle(self, *args, **options):
+        with benchmark.throwaway_database():
+            queries = search_benchmark.seed_search_documents(options['documents'])
+            results = search_benchmark.measure_search(queries, iterations=options['iterations'])
+
+        # Every match is scored, so a query matching much of the corpus
+        # costs time in proportion; those are reported but not budgeted.
+        selective = options['documents'] * options['selective_fraction']
+        over_budget = []
+        for query, result in results.items():
+            note = '' if result['matches'] <= selective else '  (unselective, not budgeted)'
+            self.stdout.write(
+                f"{query!r:<24} {result['matches']:>7} matches  "
+                f"p50 {result['p50_ms']:>7.2f}ms  p95 {result['p95_ms']:>7.2f}ms{note}"
+            )
+            if not note and result['p95_ms'] > options['budget_ms']:
+                over_budget.append(query)
+        if over_budget:
+            raise CommandError(f"p95 over {options['budget_ms']}ms budget for: {', '.join(over_budget)}")
+        self.stdout.write(self.style.SUCCESS(f"All selective queries within {options['budget_ms']}ms at p95"))
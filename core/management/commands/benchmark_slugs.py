@@ -0,0 +1,32 @@
+"""
+Benchmark slug allocation when many titles collide
+"""
+from django.core.management.base import BaseCommand
+
+from core import benchmark
+from core.benchmark import slugs as slug_benchmark
+
+
+class Command(BaseCommand):
+    help = "Give many posts the same title in a throwaway database and time slug allocation"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=10000)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with benchmark.throwaway_database():
+            results = slug_benchmark.measure_slug_allocation(
+                count=options['count'], batch_size=options['batch_size'],
+            )
+
+        labels = {
+            'bulk': f"bulk_create of {options['count']} colliding titles",
+            'allocate': "next slug, prefix query",
+            'probe': "next slug, probing candidates",
+            'save': "Post.objects.create (median)",
+        }
+        for name, label in labels.items():
+            row = results[name]
+            queries = '' if row['queries'] is None else f"  {row['queries']:>6} queries"
+            self.stdout.write(f"{label:<42} {row['ms']:>10.2f}ms{queries}")
@@ -0,0 +1,112 @@
+"""
+Build responsive image derivatives for existing uploads
+"""
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import django
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from blog.models import Post
+from core.images import build_manifest, is_current
+from projects.models import ProjectImage
+
+# (model, image field, manifest field)
+TARGETS = [
+    (Post, 'featured_image', 'featured_image_variants'),
+    (ProjectImage, 'image', 'image_variants'),
+]
+
+
+def process(name, previous_hash):
+    """Worker entry point: the new manifest, or None if the file is unchanged"""
+    return build_manifest(name, default_storage, previous_hash)
+
+
+def saved_bytes(manifest):
+    """Original size minus the preferred format at its largest width"""
+    sources = manifest.get('sources')
+    if not sources or 'bytes' not in manifest:
+        return 0
+    preferred = next(iter(sources.values()))
+    return manifest['bytes'] - preferred[-1][2]
+
+
+class Command(BaseCommand):
+    help = "Generate resized WebP/AVIF variants for every post and project image, in parallel"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help="Worker processes (default: one per core)",
+        )
+        parser.add_argument(
+            '--verify', action='store_true',
+            help="Re-hash files whose manifest looks current, to catch files replaced in place",
+        )
+
+    def handle(self, *args, **options):
+        tasks = list(self.pending(options['verify']))
+        if not tasks:
+            self.stdout.write(self.style.SUCCESS("All image derivatives are current"))
+            return
+
+        # Workers only touch storage; don't let forked children inherit
+        # the parent's database connections.
+        connections.close_all()
+        processed = unchanged = failed = total_saved = 0
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=django.setup) as pool:
+            queue = iter(tasks)
+            running = {}
+            # Bounded in-flight window, so a large library isn't queued at once
+            while True:
+                while len(running) < options['workers'] * 4:
+                    task = next(queue, None)
+                    if task is None:
+                        break
+                    model, pk, manifest_field, name, previous_hash = task
+                    running[pool.submit(process, name, previous_hash)] = task
+                if not running:
+                    break
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    model, pk, manifest_field, name, _ = running.pop(future)
+                    manifest = future.result()
+                    if manifest is None:
+                        unchanged += 1
+                        continue
+                    # Saved one at a time, so an interrupted run resumes
+                    # from the first image it had not finished.
+                    model._default_manager.filter(pk=pk).update(**{manifest_field: manifest})
+                    processed += 1
+                    if manifest['sources']:
+                        total_saved += saved_bytes(manifest)
+                    else:
+                        failed += 1
+
+        elapsed = time.perf_counter() - start
+        rate = (processed + unchanged) / elapsed if elapsed else 0
+        self.stdout.write(
+            f"Processed {processed} images ({failed} unreadable), {unchanged} unchanged "
+            f"in {elapsed:.1f}s: {rate:.1f} images/s"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Saved {total_saved / 1024 / 1024:.1f} MiB against the originals"
+        ))
+
+    def pending(self, verify):
+        """(model, pk, manifest field, file name, hash to compare or None)"""
+        for model, image_field, manifest_field in TARGETS:
+            rows = (
+                model._default_manager.exclude(**{image_field: ''}).exclude(**{f'{image_field}__isnull': True})
+                .order_by('pk').values_list('pk', image_field, manifest_field)
+            )
+            for pk, name, manifest in rows.iterator():
+                if not is_current(name, manifest):
+                    yield model, pk, manifest_field, name, None
+                elif verify and manifest.get('hash'):
+                    yield model, pk, manifest_field, name, manifest['hash']
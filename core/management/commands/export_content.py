@@ -0,0 +1,43 @@
+"""
+Export posts and projects to JSON Lines or a markdown directory
+"""
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from core import bulk
+
+
+class Command(BaseCommand):
+    help = "Write every post and project to a .jsonl file or a directory of markdown files"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'destination',
+            help="JSON Lines file ('-' for stdout), or a directory for posts/ and projects/ markdown files",
+        )
+        parser.add_argument(
+            '--format', choices=['jsonl', 'markdown'],
+            help="Default: markdown for an existing directory or a path without a suffix, otherwise jsonl",
+        )
+        parser.add_argument('--type', choices=bulk.KINDS, help="Only export posts or only projects")
+        parser.add_argument('--chunk-size', type=int, default=1000, help="Rows read per query")
+
+    def handle(self, *args, **options):
+        destination = options['destination']
+        output_format = options['format'] or (
+            'markdown' if destination != '-' and (Path(destination).is_dir() or not Path(destination).suffix)
+            else 'jsonl'
+        )
+        kinds = [options['type']] if options['type'] else bulk.KINDS
+        records = bulk.export_records(kinds, chunk_size=options['chunk_size'])
+
+        if output_format == 'markdown':
+            count = bulk.write_markdown(records, destination)
+        elif destination == '-':
+            count = bulk.write_jsonl(records, self.stdout)
+        else:
+            with open(destination, 'w', encoding='utf-8') as stream:
+                count = bulk.write_jsonl(records, stream)
+        # With '-' stdout carries the records
+        (self.stderr if destination == '-' else self.stdout).write(f"Exported {count} records to {destination}")
@@ -0,0 +1,133 @@
+"""
+Export the public site as static files
+"""
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import nullcontext
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core import export
+
+
+def default_base_url():
+    hosts = [host for host in settings.ALLOWED_HOSTS if host != '*' and not host.startswith('.')]
+    scheme = 'https' if settings.SECURE_SSL_REDIRECT else 'http'
+    return f"{scheme}://{hosts[0] if hosts else 'localhost'}"
+
+
+class Command(BaseCommand):
+    help = "Pre-render every public page to a directory servable by WhiteNoise or any static server"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', default=str(settings.BASE_DIR / 'export'),
+            help="Directory to write the site to (default: ./export)",
+        )
+        parser.add_argument(
+            '--base-url', default=None,
+            help="Scheme and host the pages are rendered for, e.g. https://example.com",
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help="Worker processes (default: one per core; 1 renders in this process)",
+        )
+        parser.add_argument(
+            '--full', action='store_true',
+            help="Ignore the previous export's manifest and render every page",
+        )
+        parser.add_argument(
+            '--assets', action='store_true',
+            help="Also copy collected static files and media uploads into the export",
+        )
+
+    def handle(self, *args, **options):
+        root = Path(options['output']).resolve()
+        root.mkdir(parents=True, exist_ok=True)
+        base = urlsplit(options['base_url'] or default_base_url())
+        if base.scheme not in ('http', 'https') or not base.netloc:
+            raise CommandError(f"Invalid --base-url {options['base_url']!r}")
+
+        previous = {} if options['full'] else export.load_manifest(root)
+        # Without a lasting shared cache, earlier ETags never match
+        send_etags = export.validators_persist()
+        if previous and not send_etags:
+            self.stdout.write(
+                "The cache is per-process, so every page is rendered; only changed files are written"
+            )
+        manifest = {}
+        excluded = export.excluded_prefixes()
+        counts = {'rendered': 0, 'unchanged': 0, 'failed': 0}
+        start = time.perf_counter()
+
+        pending = deque(export.seed_paths())
+        seen = set(pending)
+
+        def record(path, result):
+            status, etag, content_type, content = result
+            if status == 200:
+                written = export.write_page(root, path, content, content_type)
+                counts['rendered' if written else 'unchanged'] += 1
+                manifest[path] = {'etag': etag, 'links': export.extract_links(content, excluded)}
+            elif status == 304:
+                counts['unchanged'] += 1
+                manifest[path] = previous[path]
+            else:
+                if status not in (404, 410) and path in previous:
+                    # Keep serving the last good copy
+                    manifest[path] = previous[path]
+                counts['failed'] += status not in (404, 410)
+                self.stderr.write(f"{path}: HTTP {status}")
+            for link in manifest.get(path, {}).get('links', []):
+                if link not in seen:
+                    seen.add(link)
+                    pending.append(link)
+
+        workers = max(1, options['workers'])
+        if workers > 1:
+            # Workers open their own connections; don't let forked
+            # children inherit the parent's.
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=django.setup)
+        else:
+            pool = nullcontext()
+        with pool:
+            running = {}
+            while pending or running:
+                while pending and len(running) < workers * 4:
+                    path = pending.popleft()
+                    etag = previous.get(path, {}).get('etag') if send_etags else None
+                    task = (path, etag, base.netloc, base.scheme == 'https')
+                    if workers == 1:
+                        record(path, export.fetch(*task))
+                    else:
+                        running[pool.submit(export.fetch, *task)] = path
+                if running:
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        record(running.pop(future), future.result())
+
+        removed = set(previous) - set(manifest)
+        for path in removed:
+            export.remove_page(root, path)
+        export.save_manifest(root, manifest)
+
+        if options['assets']:
+            copied = export.sync_tree(settings.STATIC_ROOT, root / settings.STATIC_URL.strip('/'))
+            copied += export.sync_tree(settings.MEDIA_ROOT, root / settings.MEDIA_URL.strip('/'))
+            self.stdout.write(f"Copied {copied} static and media files")
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"Exported {len(manifest)} pages to {root} in {elapsed:.1f}s: {counts['rendered']} rendered, "
+            f"{counts['unchanged']} unchanged, {len(removed)} removed, {counts['failed']} failed"
+        )
+        if counts['failed']:
+            raise CommandError(f"{counts['failed']} pages failed to render")
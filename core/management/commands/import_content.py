@@ -0,0 +1,69 @@
+"""
+Import posts and projects from JSON Lines or a markdown directory
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+
+import django
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core import bulk
+
+
+class Command(BaseCommand):
+    help = "Create or update posts and projects (matched by slug) from a .jsonl file or markdown directory"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'source',
+            help="JSON Lines file ('-' for stdin), or a directory with posts/ and projects/ markdown files",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Records written per bulk insert/update",
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help="Markdown rendering processes (default: one per core; 1 renders in this process)",
+        )
+        parser.add_argument(
+            '--author',
+            help="Username for posts without an author (default: the first superuser)",
+        )
+
+    def handle(self, *args, **options):
+        author = None
+        if options['author']:
+            author = User.objects.filter(username=options['author']).first()
+            if author is None:
+                raise CommandError(f"No user {options['author']!r}")
+
+        workers = max(1, options['workers'])
+        if workers > 1:
+            # Workers only render markdown; don't let them inherit the
+            # parent's connections.
+            connections.close_all()
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=django.setup)
+        else:
+            pool = nullcontext()
+
+        start = time.perf_counter()
+        with pool:
+            importer = bulk.Importer(
+                batch_size=max(1, options['batch_size']), pool=pool if workers > 1 else None,
+                workers=workers, author=author,
+            )
+            try:
+                for position, record in bulk.read_records(options['source']):
+                    importer.add(position, record)
+                counts = importer.finish()
+            except (OSError, ValueError) as error:
+                raise CommandError(str(error))
+
+        elapsed = time.perf_counter() - start
+        summary = ', '.join(f'{count} {label}' for label, count in sorted(counts.items())) or 'nothing'
+        self.stdout.write(self.style.SUCCESS(f"Imported {summary} in {elapsed:.1f}s"))
@@ -0,0 +1,53 @@
+"""
+Rebuild the full-text search index from scratch
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.models import Post
+from core.models import SearchDocument
+from core.search import POST_FIELDS, PROJECT_FIELDS, post_document, project_document
+from projects.models import Project
+
+
+class Command(BaseCommand):
+    help = "Recreate search documents for every published post and project"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        posts = (
+            Post.objects.filter(status='published').only(*POST_FIELDS).order_by('pk')
+            .prefetch_related('tags').iterator(chunk_size=batch_size)
+        )
+        projects = (
+            Project.objects.filter(status='published').only(*PROJECT_FIELDS).order_by('pk')
+            .prefetch_related('tech_stack').iterator(chunk_size=batch_size)
+        )
+        with transaction.atomic():
+            SearchDocument.objects.all().delete()
+            post_count = self.write(
+                (post_document(post, [tag.name for tag in post.tags.all()]) for post in posts),
+                batch_size,
+            )
+            project_count = self.write(
+                (project_document(project, [tech.name for tech in project.tech_stack.all()])
+                 for project in projects),
+                batch_size,
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {post_count} posts and {project_count} projects"
+        ))
+
+    def write(self, documents, batch_size):
+        batch, total = [], 0
+        for document in documents:
+            batch.append(document)
+            if len(batch) >= batch_size:
+                SearchDocument.objects.bulk_create(batch)
+                total += len(batch)
+                batch = []
+        SearchDocument.objects.bulk_create(batch)
+        return total + len(batch)
@@ -0,0 +1,62 @@
+"""
+Re-render stored markdown HTML for posts and projects
+"""
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+from core.rendering import content_hash, render_many
+from projects.models import Project
+
+# (model, source field, html field, hash field)
+TARGETS = [
+    (Post, 'content', 'content_html', 'content_html_hash'),
+    (Project, 'case_study_content', 'case_study_html', 'case_study_html_hash'),
+]
+
+
+class Command(BaseCommand):
+    help = "Re-render stored markdown HTML whose source or pipeline has changed"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help="Re-render every record, even if its stored hash is current",
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help="Number of records written per bulk update",
+        )
+
+    def handle(self, *args, **options):
+        for model, source_field, html_field, hash_field in TARGETS:
+            rendered = self.rerender(
+                model, source_field, html_field, hash_field,
+                force=options['force'], batch_size=options['batch_size'],
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f"{model._meta.verbose_name_plural}: re-rendered {rendered}"
+            ))
+
+    def rerender(self, model, source_field, html_field, hash_field, force, batch_size):
+        queryset = model._default_manager.only('pk', source_field, hash_field).order_by('pk')
+        batch = []
+        rendered = 0
+        for obj in queryset.iterator(chunk_size=batch_size):
+            digest = content_hash(getattr(obj, source_field))
+            if not force and getattr(obj, hash_field) == digest:
+                continue
+            setattr(obj, hash_field, digest)
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                rendered += self.flush(model, batch, source_field, html_field, hash_field)
+                batch = []
+        if batch:
+            rendered += self.flush(model, batch, source_field, html_field, hash_field)
+        return rendered
+
+    def flush(self, model, batch, source_field, html_field, hash_field):
+        html = render_many(getattr(obj, source_field) for obj in batch)
+        for obj, obj_html in zip(batch, html):
+            setattr(obj, html_field, obj_html)
+        model._default_manager.bulk_update(batch, [html_field, hash_field])
+        return len(batch)
@@ -0,0 +1,91 @@
+"""
+Deliver queued outbound emails
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import OutboundEmail
+
+logger = logging.getLogger('portfolio.outbox')
+
+
+class Command(BaseCommand):
+    help = "Send pending outbound emails over a single reused SMTP connection"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=50)
+        parser.add_argument(
+            '--loop', action='store_true',
+            help="Keep polling for new emails instead of exiting when the queue is empty",
+        )
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds between polls with --loop")
+        parser.add_argument(
+            '--lease', type=int, default=300,
+            help="Seconds a claimed email is hidden from other workers while being sent",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent = self.send_batch(options['batch_size'], options['lease'])
+            if sent is None:
+                if not options['loop']:
+                    return
+                time.sleep(options['interval'])
+
+    def claim(self, batch_size, lease):
+        """Reserve a batch of due emails so concurrent workers skip them"""
+        now = timezone.now()
+        with transaction.atomic():
+            emails = list(
+                OutboundEmail.objects.select_for_update(skip_locked=True)
+                .filter(status='pending', next_attempt_at__lte=now)
+                .order_by('next_attempt_at')[:batch_size]
+            )
+            OutboundEmail.objects.filter(pk__in=[email.pk for email in emails]).update(
+                next_attempt_at=now + timedelta(seconds=lease)
+            )
+        return emails
+
+    def send_batch(self, batch_size, lease):
+        emails = self.claim(batch_size, lease)
+        if not emails:
+            return None
+
+        connection = get_connection()
+        try:
+            connection.open()
+        except Exception as error:
+            logger.warning("Could not connect to mail server: %s", error)
+            for email in emails:
+                email.mark_failed(error)
+            return 0
+
+        sent = 0
+        try:
+            for email in emails:
+                message = EmailMessage(
+                    subject=email.subject,
+                    body=email.body,
+                    from_email=email.from_email or None,
+                    to=email.get_recipient_list(),
+                    connection=connection,
+                )
+                try:
+                    message.send()
+                except Exception as error:
+                    logger.warning("Sending email %s failed: %s", email.pk, error)
+                    email.mark_failed(error)
+                else:
+                    email.mark_sent()
+                    sent += 1
+        finally:
+            connection.close()
+
+        self.stdout.write(f"Sent {sent} of {len(emails)} emails")
+        return sent
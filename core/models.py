@@ -2,7 +2,11 @@
 Core app models
 General functionality like contact messages
 """
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
 class ContactMessage(models.Model):
@@ -20,3 +24,92 @@ class ContactMessage(models.Model):
     
     def __str__(self):
         return f"{self.name} - {self.subject}"
+
+
+class OutboundEmail(models.Model):
+    """Queued email, delivered by the send_outbox worker command"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    contact_message = models.ForeignKey(
+        ContactMessage, on_delete=models.SET_NULL, null=True, blank=True, related_name='emails'
+    )
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    recipients = models.TextField(help_text="Comma-separated addresses")
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['next_attempt_at'],
+                condition=models.Q(status='pending'),
+                name='outbox_due_idx',
+            ),
+        ]
+    
+    def get_recipient_list(self):
+        return [address.strip() for address in self.recipients.split(',') if address.strip()]
+    
+    def mark_sent(self):
+        self.status = 'sent'
+        self.sent_at = timezone.now()
+        self.attempts += 1
+        self.last_error = ''
+        self.save(update_fields=['status', 'sent_at', 'attempts', 'last_error'])
+    
+    def mark_failed(self, error):
+        """Schedule a retry with exponential backoff, or give up"""
+        self.attempts += 1
+        self.last_error = str(error)
+        if self.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            self.status = 'failed'
+        else:
+            delay = settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (self.attempts - 1)
+            self.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        self.save(update_fields=['status', 'attempts', 'last_error', 'next_attempt_at'])
+    
+    def __str__(self):
+        return f"{self.subject} ({self.status})"
+
+
+class SearchDocument(models.Model):
+    """
+    Denormalized, searchable copy of a published post or project.
+
+    The full-text index itself is maintained by the database: a generated
+    tsvector column with a GIN index on PostgreSQL, an FTS5 table kept in
+    sync by triggers on SQLite (see migration 0003).
+    """
+    KIND_CHOICES = [
+        ('post', 'Post'),
+        ('project', 'Project'),
+    ]
+    
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    title = models.CharField(max_length=200)
+    summary = models.TextField(blank=True)
+    body = models.TextField(blank=True)
+    url = models.CharField(max_length=300)
+    updated_at = models.DateTimeField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='searchdocument_unique_object'),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind}: {self.title}"
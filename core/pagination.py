@@ -0,0 +1,159 @@
+"""
+Keyset (cursor) pagination
+Pages through a queryset by its ordering key instead of OFFSET, so deep
+pages cost the same as the first and no COUNT(*) is needed.
+"""
+import base64
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+
+
+def _json_default(value):
+    # Full precision isoformat; DjangoJSONEncoder truncates microseconds,
+    # which would make the seek condition skip or repeat rows.
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+class InvalidCursor(Exception):
+    """The cursor token could not be decoded"""
+
+
+class CursorPage:
+    """A page of results plus the cursors needed to move around it"""
+    is_cursor = True
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Paginate ``queryset`` by the fields in ``ordering``.
+
+    ``ordering`` must be a unique, non-null key (end it with ``id``), given
+    in ``order_by`` syntax, e.g. ``('-published_at', '-created_at', '-id')``.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.per_page = per_page
+        self.fields = [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+
+    def encode_cursor(self, obj, direction):
+        values = [getattr(obj, name) for name, _ in self.fields]
+        payload = json.dumps([direction, values], default=_json_default, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (ValueError, TypeError):
+            raise InvalidCursor(cursor)
+        if direction not in ('next', 'prev') or not isinstance(values, list) or len(values) != len(self.fields):
+            raise InvalidCursor(cursor)
+        return direction, values
+
+    def _seek(self, values, forward):
+        """
+        Rows strictly after (or before) ``values`` in ordering order.
+
+        The redundant leading range on the first field lets the database
+        start an index range scan at the cursor instead of filtering.
+        """
+        condition = Q()
+        for index in reversed(range(len(self.fields))):
+            name, descending = self.fields[index]
+            lookup = 'lt' if descending == forward else 'gt'
+            step = Q(**{f'{name}__{lookup}': values[index]})
+            if index < len(self.fields) - 1:
+                step |= Q(**{name: values[index]}) & condition
+            condition = step
+        name, descending = self.fields[0]
+        bound = Q(**{f"{name}__{'lte' if descending == forward else 'gte'}": values[0]})
+        return bound & condition
+
+    def page(self, cursor=None):
+        direction, values = self.decode_cursor(cursor) if cursor else ('next', None)
+        forward = direction == 'next'
+        queryset = self.queryset
+        if values is not None:
+            try:
+                queryset = queryset.filter(self._seek(values, forward))
+            except (ValidationError, ValueError, TypeError):
+                raise InvalidCursor(cursor)
+        if forward:
+            queryset = queryset.order_by(*self.ordering)
+        else:
+            queryset = queryset.order_by(*[
+                name[1:] if name.startswith('-') else f'-{name}' for name in self.ordering
+            ])
+
+        # Fetch one extra row as a cheap "is there more" probe
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+        if not rows:
+            return CursorPage(rows, None, None)
+
+        if forward:
+            has_next, has_previous = has_more, values is not None
+        else:
+            has_next, has_previous = True, has_more
+        return CursorPage(
+            rows,
+            self.encode_cursor(rows[-1], 'next') if has_next else None,
+            self.encode_cursor(rows[0], 'prev') if has_previous else None,
+        )
+
+
+class CursorPaginationMixin:
+    """
+    Opt-in keyset pagination for ListView.
+
+    Used when ``PAGINATION_MODE`` is ``'cursor'`` or the request carries a
+    ``?cursor=`` token; otherwise the numbered Paginator is kept.
+    """
+    cursor_ordering = None
+
+    def use_cursor_pagination(self):
+        return 'cursor' in self.request.GET or settings.PAGINATION_MODE == 'cursor'
+
+    def paginate_queryset(self, queryset, page_size):
+        if not self.use_cursor_pagination():
+            return super().paginate_queryset(queryset, page_size)
+        paginator = CursorPaginator(queryset, self.cursor_ordering, page_size)
+        try:
+            page = paginator.page(self.request.GET.get('cursor'))
+        except InvalidCursor:
+            raise Http404("Invalid cursor")
+        if settings.STATIC_EXPORT:
+            # A static server would answer ?cursor= links with this page
+            page.next_cursor = page.previous_cursor = None
+        return (paginator, page, page.object_list, page.has_other_pages())
@@ -0,0 +1,45 @@
+"""
+Reference data
+Small, rarely changing lookup sets (blog categories, tech stack) cached in
+process memory and in the shared cache. Each set is versioned by the same
+generation counter that evicts cached pages, so reads cost one cache get
+and no queries until a save or delete bumps it.
+"""
+from .cache import get_cache, get_generations
+
+REFERENCE_PREFIX = 'reference:'
+REFERENCE_TIMEOUT = 60 * 60 * 24
+
+# tag -> (generation, value), per process
+_local = {}
+
+
+def get(tag, loader):
+    """The value of ``loader()`` for the current generation of ``tag``"""
+    generation = get_generations([tag])[tag]
+    cached = _local.get(tag)
+    if cached is not None and cached[0] == generation:
+        return cached[1]
+
+    cache = get_cache()
+    key = f'{REFERENCE_PREFIX}{tag}:{generation}'
+    value = cache.get(key)
+    if value is None:
+        # Loaded under the generation read above: a bump landing meanwhile
+        # makes the next read miss instead of serving this value forever.
+        value = loader()
+        cache.set(key, value, REFERENCE_TIMEOUT)
+    _local[tag] = (generation, value)
+    return value
+
+
+def categories():
+    """All blog categories, by name"""
+    from blog.models import Category
+    return get('categories', lambda: list(Category.objects.all()))
+
+
+def tech_stack():
+    """All tech stack items, by name"""
+    from projects.models import TechStack
+    return get('tech-stack', lambda: list(TechStack.objects.all()))
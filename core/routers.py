@@ -0,0 +1,146 @@
+"""
+Read replica routing
+With ``DATABASE_REPLICA_URL`` set, GET/HEAD requests to the public apps
+read from the replica; everything else (admin, forms, commands, the
+snapshot thread) uses the primary. Reads stay on the primary for
+``REPLICA_LAG_SECONDS``:
+
+- for a client after a request of theirs saved a model, via a cookie, so
+  an editor sees their own save;
+- for every client after public content changed, so pages rebuilt for
+  the page cache aren't filled from a replica that hasn't caught up.
+"""
+import contextvars
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import m2m_changed, post_save
+from django.dispatch import receiver
+
+from .cache import changed_at
+
+PIN_COOKIE = 'read_primary'
+PUBLIC_NAMESPACES = {'core', 'blog', 'projects'}
+
+_current = contextvars.ContextVar('replica_reads', default=None)
+
+
+class ReadState:
+    """Routing decisions for one request"""
+    __slots__ = ('public', 'replica', 'wrote')
+
+    def __init__(self):
+        # A public, read-only view was resolved
+        self.public = False
+        # Whether that view reads the replica, decided on its first query
+        self.replica = None
+        # A model was saved (see note_write)
+        self.wrote = False
+
+
+class ReplicaRouter:
+    """Send public-view reads to ``REPLICA_DATABASE`` and all writes to the primary"""
+
+    def db_for_read(self, model, **hints):
+        state = _current.get()
+        if state is None or not state.public:
+            return None
+        if state.replica is None:
+            state.replica = time.time() - changed_at() >= settings.REPLICA_LAG_SECONDS
+        # The replica doesn't have this request's own writes yet
+        if state.replica and not state.wrote:
+            return settings.REPLICA_DATABASE
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Explicit: the default would be the database an instance was read from
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, settings.REPLICA_DATABASE}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # The replica receives the schema from the primary
+        if settings.REPLICA_DATABASE and db == settings.REPLICA_DATABASE:
+            return False
+        return None
+
+
+@receiver(post_save)
+@receiver(m2m_changed)
+def note_write(sender, **kwargs):
+    """
+    Pin the current request's client once it saves a model.
+
+    Routers are also asked for a database by writes that never run, and
+    queryset updates (the lazy HTML and image manifest refreshes on public
+    pages) send no signal, so neither pins anonymous readers. Deletes
+    aren't listened to: a receiver for every model would disable Django's
+    fast deletes, and deleted public content bumps its cache tags, which
+    sends every client to the primary anyway.
+    """
+    state = _current.get()
+    if state is not None:
+        state.wrote = True
+
+
+class ReplicaMiddleware:
+    """
+    Mark public read-only requests for the replica, and pin a client to the
+    primary after a request of theirs wrote.
+
+    Sits above SessionMiddleware, so the session saved on login counts as
+    a write.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = ReadState()
+        token = _current.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.pin(response, state)
+
+    async def __acall__(self, request):
+        state = ReadState()
+        token = _current.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.pin(response, state)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _current.get()
+        if (
+            state is not None and settings.REPLICA_DATABASE
+            and request.method in ('GET', 'HEAD')
+            and PIN_COOKIE not in request.COOKIES
+            and request.resolver_match.namespace in PUBLIC_NAMESPACES
+        ):
+            state.public = True
+
+    @staticmethod
+    def pin(response, state):
+        if state.wrote and settings.REPLICA_DATABASE:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_LAG_SECONDS,
+                secure=settings.SESSION_COOKIE_SECURE, httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,38 @@
+"""
+Route discovery
+Walks the URLconf for the named public routes, for the static export and
+the benchmark harness, and derives the ASGI routes from the sync ones.
+"""
+from django.urls import URLPattern, URLResolver
+
+# URL namespaces that are not part of the public site
+EXCLUDED_NAMESPACES = {'admin'}
+
+
+def route_names(patterns, namespace=None):
+    """(name, converters) for every named route outside EXCLUDED_NAMESPACES"""
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace in EXCLUDED_NAMESPACES:
+                continue
+            inner = ':'.join(filter(None, [namespace, pattern.namespace])) or None
+            yield from route_names(pattern.url_patterns, inner)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            name = f'{namespace}:{pattern.name}' if namespace else pattern.name
+            yield name, getattr(pattern.pattern, 'converters', {})
+
+
+def with_async_views(patterns, async_views):
+    """
+    ``patterns`` with each class-based view found in ``async_views``
+    ({sync view: async view}) replaced by its async counterpart, built with
+    the same ``as_view`` arguments.
+    """
+    result = []
+    for pattern in patterns:
+        view_class = getattr(pattern.callback, 'view_class', None)
+        if view_class in async_views:
+            view = async_views[view_class].as_view(**pattern.callback.view_initkwargs)
+            pattern = URLPattern(pattern.pattern, view, pattern.default_args, pattern.name)
+        result.append(pattern)
+    return result
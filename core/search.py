@@ -0,0 +1,117 @@
+"""
+Full-text search
+Keeps SearchDocument rows in step with published posts and projects and
+queries the database's native full-text index: tsvector + GIN on
+PostgreSQL, FTS5 on SQLite, with a plain icontains scan elsewhere.
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import SearchDocument
+
+POST_FIELDS = ['pk', 'title', 'excerpt', 'content', 'slug', 'status', 'updated_at']
+PROJECT_FIELDS = ['pk', 'title', 'short_description', 'case_study_content', 'slug', 'status', 'updated_at']
+
+
+def post_document(post, tag_names):
+    return SearchDocument(
+        kind='post', object_id=post.pk, title=post.title,
+        summary=post.excerpt,
+        body=f"{post.content}\n{' '.join(tag_names)}",
+        url=post.get_absolute_url(), updated_at=post.updated_at,
+    )
+
+
+def project_document(project, tech_names):
+    return SearchDocument(
+        kind='project', object_id=project.pk, title=project.title,
+        summary=project.short_description,
+        body=f"{project.case_study_content}\n{' '.join(tech_names)}",
+        url=project.get_absolute_url(), updated_at=project.updated_at,
+    )
+
+
+def _save(document):
+    SearchDocument.objects.update_or_create(
+        kind=document.kind, object_id=document.object_id,
+        defaults={
+            field: getattr(document, field)
+            for field in ('title', 'summary', 'body', 'url', 'updated_at')
+        },
+    )
+
+
+def remove(kind, object_id):
+    SearchDocument.objects.filter(kind=kind, object_id=object_id).delete()
+
+
+def index_post(post):
+    """Add, refresh or drop a post's document according to its status"""
+    if post.status != 'published':
+        remove('post', post.pk)
+    else:
+        _save(post_document(post, post.tags.values_list('name', flat=True)))
+
+
+def index_project(project):
+    """Add, refresh or drop a project's document according to its status"""
+    if project.status != 'published':
+        remove('project', project.pk)
+    else:
+        _save(project_document(project, project.tech_stack.values_list('name', flat=True)))
+
+
+def _fts5_query(query):
+    # Quote every term so user input can't use FTS5 query syntax; the
+    # porter tokenizer still matches other forms of each word.
+    return ' '.join(f'"{term}"' for term in re.findall(r'\w+', query))
+
+
+def search(query, limit=20):
+    """Published posts and projects matching ``query``, best match first"""
+    query = query.strip()
+    if not query:
+        return []
+
+    if connection.vendor == 'postgresql':
+        return list(SearchDocument.objects.raw(
+            """
+            SELECT d.id, d.kind, d.object_id, d.title, d.summary, d.url, d.updated_at,
+                   ts_rank_cd(d.search_vector, q) AS rank
+            FROM core_searchdocument d, websearch_to_tsquery('english', %s) q
+            WHERE d.search_vector @@ q
+            ORDER BY rank DESC
+            LIMIT %s
+            """,
+            [query, limit],
+        ))
+
+    if connection.vendor == 'sqlite':
+        match = _fts5_query(query)
+        if not match:
+            return []
+        # bm25() is lower-is-better; title matches weigh most. Every match
+        # is scored, on the FTS table alone, and only the top rows are joined.
+        return list(SearchDocument.objects.raw(
+            """
+            SELECT d.id, d.kind, d.object_id, d.title, d.summary, d.url, d.updated_at, ranked.rank
+            FROM (
+                SELECT rowid, rank
+                FROM core_searchdocument_fts
+                WHERE core_searchdocument_fts MATCH %s AND rank MATCH 'bm25(10.0, 4.0, 1.0)'
+                ORDER BY rank
+                LIMIT %s
+            ) ranked
+            JOIN core_searchdocument d ON d.id = ranked.rowid
+            ORDER BY ranked.rank
+            """,
+            [match, limit],
+        ))
+
+    return list(
+        SearchDocument.objects.filter(
+            Q(title__icontains=query) | Q(summary__icontains=query) | Q(body__icontains=query)
+        ).defer('body')[:limit]
+    )
@@ -0,0 +1,182 @@
+"""
+Sitemaps
+A sitemap index pointing at one shard per primary key range of each
+section, so crawlers find every post, project and category without paging
+through the public lists. Shards are streamed from ``.iterator()`` and
+cached with a fingerprint of their rows (count, newest modification);
+a shard is regenerated only when its own fingerprint changes. The index
+is cached under the list cache tags, which any change to a public post,
+project or category bumps.
+"""
+import hashlib
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.db.models import Count, ExpressionWrapper, F, IntegerField, Max, Q
+from django.urls import reverse
+
+from .cache import get_cache, get_generations
+
+SHARD_PREFIX = 'sitemap:v1:'
+INDEX_KEY = 'sitemap:v1:index'
+INDEX_TAGS = ['post-list', 'project-list', 'categories']
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+NAMESPACE = 'http://www.sitemaps.org/schemas/sitemap/0.9'
+ITERATOR_CHUNK_SIZE = 1000
+
+
+def _lastmod(value):
+    return f'<lastmod>{value.isoformat(timespec="seconds")}</lastmod>' if value else ''
+
+
+class Section:
+    """
+    One kind of page in the sitemap.
+
+    Shard ``n`` holds the rows with ``n * SITEMAP_SHARD_SIZE <= pk <
+    (n + 1) * SITEMAP_SHARD_SIZE``, so an edit only changes its own shard
+    and no shard is ever read with an offset.
+    """
+    name = None
+    # Field (or lookup) whose latest value is the page's modification time
+    lastmod = 'updated_at'
+    lastmod_filter = None
+    # Cache tags for changes the rows' lastmod does not reflect
+    tags = ()
+
+    def get_queryset(self):
+        raise NotImplementedError
+
+    def location(self, obj):
+        return obj.get_absolute_url()
+
+    def _aggregates(self):
+        return {
+            'count': Count('pk', distinct=True),
+            'modified': Max(self.lastmod, filter=self.lastmod_filter),
+        }
+
+    def shards(self):
+        """``(number, count, modified)`` for each non-empty shard"""
+        size = settings.SITEMAP_SHARD_SIZE
+        rows = (
+            self.get_queryset()
+            .annotate(shard=ExpressionWrapper(F('pk') / size, output_field=IntegerField()))
+            .values('shard').annotate(**self._aggregates()).order_by('shard')
+        )
+        return [(row['shard'], row['count'], row['modified']) for row in rows]
+
+    def shard_queryset(self, number):
+        size = settings.SITEMAP_SHARD_SIZE
+        return self.get_queryset().filter(pk__gte=number * size, pk__lt=(number + 1) * size)
+
+    def fingerprint(self, number):
+        """``(count, modified, generations)`` of one shard, from a single aggregate"""
+        stats = self.shard_queryset(number).aggregate(**self._aggregates())
+        return stats['count'], stats['modified'], get_generations(self.tags) if self.tags else {}
+
+    def entries(self, number):
+        """``(location, modified)`` per row of the shard, read in chunks"""
+        queryset = self.shard_queryset(number).order_by('pk').only('pk', 'slug', self.lastmod)
+        for obj in queryset.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+            yield self.location(obj), getattr(obj, self.lastmod)
+
+
+class PostSection(Section):
+    name = 'posts'
+
+    def get_queryset(self):
+        from blog.models import Post
+
+        return Post.objects.filter(status='published')
+
+
+class ProjectSection(Section):
+    name = 'projects'
+
+    def get_queryset(self):
+        from projects.models import Project
+
+        return Project.objects.filter(status='published')
+
+
+class CategorySection(Section):
+    """Category pages change when one of their published posts does"""
+    name = 'categories'
+    lastmod = 'posts__updated_at'
+    lastmod_filter = Q(posts__status='published')
+    # Renaming a category moves its page without touching any post
+    tags = ('categories',)
+
+    def get_queryset(self):
+        from blog.models import Category
+
+        return Category.objects.all()
+
+    def location(self, obj):
+        return reverse('blog:category', kwargs={'category_slug': obj.slug})
+
+    def entries(self, number):
+        queryset = (
+            self.shard_queryset(number).order_by('pk').only('pk', 'slug')
+            .annotate(modified=Max(self.lastmod, filter=self.lastmod_filter))
+        )
+        for category in queryset.iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+            yield self.location(category), category.modified
+
+
+SECTIONS = {section.name: section for section in (PostSection(), ProjectSection(), CategorySection())}
+
+
+def index_shards():
+    """``(section, number, count, modified)`` for every non-empty shard"""
+    generations = get_generations(INDEX_TAGS)
+    entry = get_cache().get(INDEX_KEY)
+    if entry is not None and entry['generations'] == generations:
+        return entry['shards']
+    shards = [
+        (name, number, count, modified)
+        for name, section in SECTIONS.items()
+        for number, count, modified in section.shards()
+    ]
+    get_cache().set(INDEX_KEY, {'generations': generations, 'shards': shards}, None)
+    return shards
+
+
+def index_lines(base_url, shards):
+    """The sitemap index, for ``shards`` as ``(url, modified)`` pairs"""
+    yield XML_HEADER + f'<sitemapindex xmlns="{NAMESPACE}">\n'
+    for url, modified in shards:
+        yield f'<sitemap><loc>{escape(base_url + url)}</loc>{_lastmod(modified)}</sitemap>\n'
+    yield '</sitemapindex>\n'
+
+
+def shard_lines(base_url, section, number):
+    yield XML_HEADER + f'<urlset xmlns="{NAMESPACE}">\n'
+    for location, modified in section.entries(number):
+        yield f'<url><loc>{escape(base_url + location)}</loc>{_lastmod(modified)}</url>\n'
+    yield '</urlset>\n'
+
+
+def shard_cache_key(section, number, base_url):
+    # Locations are absolute, so each host (and scheme) has its own copy
+    base = hashlib.md5(base_url.encode()).hexdigest()
+    return f'{SHARD_PREFIX}{section.name}:{number}:{base}'
+
+
+def get_cached_shard(key, fingerprint):
+    entry = get_cache().get(key)
+    if entry is None or entry['fingerprint'] != fingerprint:
+        return None
+    return entry['content']
+
+
+def stream_and_store(lines, key, fingerprint):
+    """Yield ``lines`` encoded, caching the whole shard once it is complete"""
+    chunks = []
+    for line in lines:
+        chunk = line.encode()
+        chunks.append(chunk)
+        yield chunk
+    # Not reached if the client disconnects mid-stream
+    get_cache().set(key, {'fingerprint': fingerprint, 'content': b''.join(chunks)}, None)
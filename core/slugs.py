@@ -0,0 +1,158 @@
+"""
+Slug allocation
+Free slugs for new rows, found with an indexed prefix query per title
+rather than one query per candidate: a taken ``title`` becomes
+``title-<n>`` for the lowest free ``n`` from 2. Saves that lose a race
+for the same slug retry with the next candidate.
+"""
+import re
+
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import BigIntegerField, Count, Max, Q
+from django.db.models.functions import Cast, Substr
+from django.utils.text import slugify
+
+# Room kept for "-<n>" when a slug at the field's max_length collides
+SUFFIX_LENGTH = 8
+
+# Retries for a save whose slug was taken between allocation and INSERT
+SAVE_ATTEMPTS = 5
+
+
+def _bases(model, value, field):
+    """``(base, stem)``: the plain slug, and what suffixes are appended to"""
+    max_length = model._meta.get_field(field).max_length
+    base = slugify(value)[:max_length].strip('-') or model._meta.model_name
+    return base, base[:max_length - SUFFIX_LENGTH].strip('-')
+
+
+def _rows(model):
+    # The database the new row goes to: a replica may not have the latest slugs
+    return model._default_manager.db_manager(router.db_for_write(model))
+
+
+def _prefix(model, field, stem):
+    """Rows whose slug starts with ``stem-``, as a condition an index can serve"""
+    if connections[router.db_for_write(model)].vendor == 'sqlite':
+        # SQLite's LIKE is case-insensitive and ignores the column's index;
+        # '.' is the character after '-', so this is a range scan
+        return Q(**{f'{field}__gte': f'{stem}-', f'{field}__lt': f'{stem}.'})
+    # PostgreSQL serves this from the varchar_pattern_ops index Django adds
+    # for unique slug fields
+    return Q(**{f'{field}__startswith': f'{stem}-'})
+
+
+def used_suffixes(model, value, field='slug'):
+    """
+    The suffixes in use for ``value``'s slug, 1 standing for the plain slug.
+
+    Numbered slugs are ``stem-<n>`` with no leading zeros. One aggregate
+    query suffices when they are exactly 2..n, as allocation leaves them;
+    after deletes, or when titles end in a number, a second query reads
+    the numbers.
+    """
+    base, stem = _bases(model, value, field)
+    # Nine digits at most, so the cast fits any integer column
+    suffixed = (
+        _prefix(model, field, stem) & Q(**{f'{field}__regex': rf'^{re.escape(stem)}-[1-9][0-9]{{0,8}}$'})
+        & ~Q(**{field: base})
+    )
+    rows = _rows(model).filter(Q(**{field: base}) | suffixed)
+    # Among these rows, any but the plain slug is numbered
+    numbered = ~Q(**{field: base})
+    stats = rows.aggregate(
+        plain=Count('pk', filter=Q(**{field: base})),
+        count=Count('pk', filter=numbered),
+        top=Max(Cast(Substr(field, len(stem) + 2), BigIntegerField()), filter=numbered),
+    )
+    used = {1} if stats['plain'] else set()
+    top = stats['top'] or 1
+    if stats['count'] == top - 1:
+        return used | set(range(2, top + 1))
+    return used | {int(slug[len(stem) + 1:]) for slug in rows.filter(suffixed).values_list(field, flat=True)}
+
+
+def allocate(model, value, field='slug', reserved=()):
+    """
+    A slug for ``value`` not used by any ``model`` row, nor in ``reserved``:
+    the plain slug, or the lowest free numbered one.
+    """
+    base, stem = _bases(model, value, field)
+    used = used_suffixes(model, value, field)
+    if 1 not in used and base not in reserved:
+        return base
+    number = 2
+    while number in used or f'{stem}-{number}' in reserved:
+        number += 1
+    return f'{stem}-{number}'
+
+
+def allocate_many(model, values, field='slug', reserved=()):
+    """
+    Distinct free slugs for ``values``, e.g. before a bulk_create.
+
+    One query finds which plain slugs are taken; only those, and values
+    repeated within ``values``, need their suffixes read (see
+    used_suffixes). Slugs in ``reserved`` (about to be written by the
+    caller) are avoided too.
+    """
+    bases = [_bases(model, value, field) for value in values]
+    taken = set(_rows(model).filter(
+        **{f'{field}__in': {base for base, _ in bases}},
+    ).order_by().values_list(field, flat=True)) | set(reserved)
+    # stem -> (suffixes in use, lowest number that may be free)
+    suffixes = {}
+    slugs = []
+    for value, (base, stem) in zip(values, bases):
+        if base not in taken:
+            slug = base
+        else:
+            if stem not in suffixes:
+                suffixes[stem] = (used_suffixes(model, value, field), 2)
+            used, number = suffixes[stem]
+            # Skip slugs handed out earlier in this call as plain slugs
+            while number in used or f'{stem}-{number}' in taken:
+                number += 1
+            suffixes[stem] = (used, number + 1)
+            slug = f'{stem}-{number}'
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def assign(instances, source, field='slug'):
+    """Fill in blank slugs on unsaved ``instances`` from their ``source`` field"""
+    blank = [instance for instance in instances if not getattr(instance, field)]
+    if blank:
+        slugs = allocate_many(type(blank[0]), [getattr(instance, source) for instance in blank], field)
+        for instance, slug in zip(blank, slugs):
+            setattr(instance, field, slug)
+    return instances
+
+
+def save_with_slug(instance, source, save, field='slug'):
+    """
+    Call ``save()``, first allocating a slug from ``source`` if it is blank.
+
+    Another save may take the same slug between allocation and INSERT; the
+    unique constraint then fails and the slug is allocated again. Each
+    attempt runs in a savepoint, so a failed INSERT doesn't abort the
+    caller's transaction.
+    """
+    if getattr(instance, field):
+        return save()
+    model = type(instance)
+    # Slugs found taken on INSERT; the next attempt moves past them
+    tried = set()
+    for attempt in range(SAVE_ATTEMPTS):
+        slug = allocate(model, getattr(instance, source), field, reserved=tried)
+        setattr(instance, field, slug)
+        try:
+            with transaction.atomic(using=router.db_for_write(model)):
+                return save()
+        except IntegrityError:
+            taken = _rows(model).filter(**{field: slug}).exists()
+            setattr(instance, field, '')
+            if not taken or attempt == SAVE_ATTEMPTS - 1:
+                raise
+            tried.add(slug)
@@ -0,0 +1,119 @@
+"""
+Home page snapshot
+The home page's featured content, assembled into plain template data and
+kept in the shared cache under the generations of the tags it depends on.
+When those tags are bumped the old snapshot keeps being served while a
+single background thread rebuilds it (stale-while-revalidate), so readers
+never wait on the queries; only the very first request builds inline.
+"""
+import logging
+import threading
+
+from django.db import close_old_connections, connection, connections
+
+from .cache import get_cache, get_generations
+
+logger = logging.getLogger('portfolio.snapshot')
+
+SNAPSHOT_KEY = 'snapshot:home'
+LOCK_KEY = 'snapshot:home:refreshing'
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+# Longest a crashed refresh can block the next one
+LOCK_TIMEOUT = 60
+HOME_TAGS = ['featured-projects', 'featured-posts']
+FEATURED_COUNT = 3
+
+
+def featured_projects():
+    from projects.models import Project
+
+    return list(Project.objects.filter(status='published', featured=True).prefetch_related(
+        'tech_stack',
+    ).with_cover_image()[:FEATURED_COUNT])
+
+
+def featured_posts():
+    from blog.models import Post
+
+    return list(Post.objects.filter(status='published', featured=True).select_related('category')[:FEATURED_COUNT])
+
+
+def project_card(project):
+    from .templatetags.images import picture
+
+    cover = project.cover_image
+    return {
+        'title': project.title,
+        'short_description': project.short_description,
+        'url': project.get_absolute_url(),
+        'tech': [tech.name for tech in project.tech_stack.all()],
+        # Rendered now, as it may build image derivatives
+        'picture': cover and picture(
+            cover, 'image', sizes='(min-width: 768px) 33vw, 100vw', alt=project.title, **{'class': 'card-img-top'},
+        ),
+    }
+
+
+def post_card(post):
+    return {
+        'title': post.title,
+        'excerpt': post.excerpt,
+        'url': post.get_absolute_url(),
+        'category': post.category.name if post.category else '',
+        'published_at': post.published_at,
+    }
+
+
+def build():
+    """Build and store a snapshot for the current generations"""
+    # Read first: an edit landing mid-build leaves a snapshot already stale
+    generations = get_generations(HOME_TAGS)
+    snapshot = {
+        'generations': generations,
+        'featured_projects': [project_card(project) for project in featured_projects()],
+        'featured_posts': [post_card(post) for post in featured_posts()],
+    }
+    get_cache().set(SNAPSHOT_KEY, snapshot, SNAPSHOT_TIMEOUT)
+    return snapshot
+
+
+def _refresh():
+    close_old_connections()
+    try:
+        build()
+    except Exception:
+        logger.exception("Home snapshot refresh failed")
+    finally:
+        get_cache().delete(LOCK_KEY)
+        connections.close_all()
+
+
+def start_refresh():
+    """Rebuild in a background thread, unless a refresh is already running"""
+    if not get_cache().add(LOCK_KEY, True, LOCK_TIMEOUT):
+        return
+    if connection.in_atomic_block:
+        # Another connection wouldn't see this transaction's writes (e.g.
+        # ATOMIC_REQUESTS, or tests), so rebuild on this one
+        try:
+            build()
+        finally:
+            get_cache().delete(LOCK_KEY)
+        return
+    threading.Thread(target=_refresh, name='home-snapshot', daemon=True).start()
+
+
+def home():
+    """
+    The current home snapshot, or the previous one while it is rebuilt.
+
+    The returned ``generations`` are the ones the data was built at; pages
+    rendered from a stale snapshot are cached under them, so they miss
+    again once the refresh lands.
+    """
+    snapshot = get_cache().get(SNAPSHOT_KEY)
+    if snapshot is None:
+        return build()
+    if snapshot['generations'] != get_generations(HOME_TAGS):
+        start_refresh()
+    return snapshot
@@ -0,0 +1,43 @@
+"""
+Responsive image template tags
+"""
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from core.images import MIME_TYPES, derivatives_cached, srcset
+
+register = template.Library()
+
+
+@register.simple_tag
+def picture(instance, field_name, sizes='100vw', alt='', **attrs):
+    """
+    A ``<picture>`` for ``instance.<field_name>`` with a ``srcset`` per format.
+
+    Derivatives are read from ``<field_name>_variants`` and built on first
+    use when missing. Extra keyword arguments become ``<img>`` attributes,
+    e.g. ``{% picture post 'featured_image' sizes='50vw' class='img-fluid' %}``.
+    """
+    field_file = getattr(instance, field_name)
+    if not field_file:
+        return ''
+    manifest = derivatives_cached(instance, field_name, f'{field_name}_variants')
+    attrs = {'loading': 'lazy', 'decoding': 'async', **attrs}
+    if not manifest.get('sources'):
+        return format_html(
+            '<img src="{}" alt="{}"{}>', field_file.url, alt,
+            format_html_join('', ' {}="{}"', attrs.items()),
+        )
+
+    storage = field_file.storage
+    fallback = manifest['sources'][manifest['fallback']]
+    modern = [(fmt, entries) for fmt, entries in manifest['sources'].items() if fmt != manifest['fallback']]
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}"{}></picture>',
+        format_html_join('', '<source type="{}" srcset="{}" sizes="{}">', (
+            (MIME_TYPES[fmt], srcset(entries, storage), sizes) for fmt, entries in modern
+        )),
+        storage.url(fallback[-1][1]), srcset(fallback, storage), sizes,
+        manifest['width'], manifest['height'], alt,
+        format_html_join('', ' {}="{}"', attrs.items()),
+    )
@@ -0,0 +1,30 @@
+"""
+Pagination template tags
+"""
+from django import template
+from django.urls import reverse
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def page_url(context, number):
+    """
+    Path of page ``number`` of the current list view, e.g. ``/blog/page/2/``.
+
+    Page 1 is the route without a page, so every page has one URL and the
+    archive can be exported as plain files. Both forms are reversed once
+    per render, as a long archive links every page.
+    """
+    urls = context.render_context.get('page_urls')
+    if urls is None:
+        match = context['request'].resolver_match
+        kwargs = {key: value for key, value in match.kwargs.items() if key != 'page'}
+        # Page routes end in "<int:page>/"; keep everything before the number
+        urls = (
+            reverse(match.view_name, kwargs=kwargs),
+            reverse(match.view_name, kwargs={**kwargs, 'page': 0})[:-len('0/')],
+        )
+        context.render_context['page_urls'] = urls
+    first, prefix = urls
+    return first if number == 1 else f'{prefix}{number}/'
@@ -0,0 +1,29 @@
+"""
+Shared test helpers
+"""
+from django.db import connection
+from django.test import override_settings
+
+
+class QueryPlanMixin:
+    """Helpers for asserting on SQLite EXPLAIN QUERY PLAN output"""
+
+    def assertUsesIndex(self, queryset, index_name):
+        """Assert the query reads ``index_name`` and needs no sort step"""
+        if connection.vendor != 'sqlite':
+            self.skipTest("Query plan assertions target SQLite")
+        plan = queryset.explain()
+        self.assertIn(f'USING INDEX {index_name}', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+# Render public pages in tests without collectstatic, an HTTPS redirect
+# or responses served from the page cache
+public_site_settings = override_settings(
+    STORAGES={
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    },
+    SECURE_SSL_REDIRECT=False,
+    PAGE_CACHE_ENABLED=False,
+)
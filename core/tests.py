@@ -0,0 +1,1033 @@
+"""
+Core tests
+"""
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache, caches
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.template import Context, Template
+from django.http import HttpResponse
+from django.db import connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from PIL import Image
+
+from blog import urls as blog_urls
+from blog.models import Category, Post, PostTag, Tag
+from blog.views import AsyncPostDetailView, AsyncPostListView
+from config import settings_asgi
+from projects import urls as projects_urls
+from projects.models import Project, ProjectImage, TechStack
+
+from . import benchmark, bulk, compression, export, reference, routers, search, slugs, snapshot
+from . import urls as core_urls
+from .cache import bump
+from .models import ContactMessage, OutboundEmail, SearchDocument
+from .rendering import render_many, render_markdown
+from .routers import ReplicaRouter
+from .testing import public_site_settings
+
+
+class RenderingTests(SimpleTestCase):
+    """Shared, pooled markdown rendering"""
+
+    documents = [
+        '# Heading\n\n```python\nprint("hi")\n```',
+        '| a | b |\n|---|---|\n| 1 | 2 |',
+        'plain <script>alert(1)</script>',
+    ]
+
+    def test_render_many_matches_single_renders(self):
+        self.assertEqual(
+            render_many(self.documents),
+            [render_markdown(text) for text in self.documents],
+        )
+
+    def test_reused_parser_does_not_leak_state(self):
+        first = render_markdown('# Same\n\n# Same')
+        self.assertEqual(render_markdown('# Same\n\n# Same'), first)
+
+    def test_concurrent_threads_render_consistently(self):
+        expected = render_many(self.documents * 20)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = list(pool.map(render_many, [self.documents * 20] * 8))
+        self.assertTrue(all(result == expected for result in results))
+
+
+@public_site_settings
+class BenchmarkHarnessTests(TestCase):
+    """The benchmark harness covers every public route"""
+
+    def test_every_public_route_is_measured(self):
+        benchmark.seed_dataset(posts=15, projects=4, images=8, tech=3, categories=2)
+        results = benchmark.run(iterations=2)
+        self.assertEqual(
+            set(results),
+            {'core:home', 'core:search', 'core:contact', 'core:sitemap', 'core:sitemap-shard',
+             'projects:list', 'projects:detail',
+             'blog:list', 'blog:category', 'blog:rss', 'blog:atom', 'blog:category-rss', 'blog:category-atom',
+             'blog:tag', 'blog:detail'},
+        )
+
+    def test_compare_flags_regressions_beyond_tolerance(self):
+        baseline = {'blog:list': {'queries': 4, 'p50_ms': 10.0, 'p95_ms': 20.0, 'peak_kib': 100.0}}
+        noisy = {'blog:list': {'queries': 4, 'p50_ms': 11.0, 'p95_ms': 25.0, 'peak_kib': 110.0}}
+        self.assertEqual(benchmark.compare(noisy, baseline), [])
+        slower = {'blog:list': {'queries': 5, 'p50_ms': 30.0, 'p95_ms': 40.0, 'peak_kib': 200.0}}
+        self.assertEqual(len(benchmark.compare(slower, baseline)), 3)
+
+
+@public_site_settings
+class ServerTimingTests(TestCase):
+    """Sampled Server-Timing header and timing log line"""
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=1.0)
+    def test_sampled_request_reports_breakdown(self):
+        post = Post.objects.create(
+            title='Timed', author=User.objects.create_user('author'), content='**text**', status='published',
+        )
+        Post.objects.filter(pk=post.pk).update(content_html_hash='')
+        with self.assertLogs('portfolio.timing', 'INFO') as logs:
+            response = self.client.get(post.get_absolute_url())
+        header = response['Server-Timing']
+        for metric in ('db;dur=', 'template;dur=', 'markdown;dur=', 'page-cache;desc="bypass"', 'total;dur='):
+            self.assertIn(metric, header)
+        self.assertIn('"path": "/blog/timed/"', logs.output[0])
+
+    @override_settings(SERVER_TIMING_SAMPLE_RATE=0.0)
+    def test_unsampled_request_has_no_header(self):
+        self.assertFalse(self.client.get('/').has_header('Server-Timing'))
+
+
+class FailingEmailBackend(BaseEmailBackend):
+    def send_messages(self, messages):
+        raise ConnectionError("mail server unavailable")
+
+
+@public_site_settings
+@override_settings(CONTACT_EMAIL='owner@example.com', EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend')
+class ContactOutboxTests(TestCase):
+    """Contact notifications go through the outbox"""
+
+    def submit(self):
+        return self.client.post('/contact/', {
+            'name': 'Visitor', 'email': 'visitor@example.com', 'subject': 'Hello', 'message': 'Hi there',
+        })
+
+    def test_contact_post_queues_without_sending(self):
+        self.assertEqual(self.submit().status_code, 302)
+        email = OutboundEmail.objects.get()
+        self.assertEqual(email.contact_message, ContactMessage.objects.get())
+        self.assertEqual(email.get_recipient_list(), ['owner@example.com'])
+        self.assertEqual(mail.outbox, [])
+
+    def test_worker_sends_pending_emails(self):
+        self.submit()
+        self.submit()
+        call_command('send_outbox', stdout=StringIO())
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertFalse(OutboundEmail.objects.exclude(status='sent').exists())
+
+    @override_settings(EMAIL_BACKEND='core.tests.FailingEmailBackend', OUTBOX_MAX_ATTEMPTS=2)
+    def test_failures_back_off_then_give_up(self):
+        self.submit()
+        call_command('send_outbox', stdout=StringIO())
+        email = OutboundEmail.objects.get()
+        self.assertEqual((email.status, email.attempts), ('pending', 1))
+        self.assertIn('unavailable', email.last_error)
+
+        # Not due yet: the worker leaves it alone
+        call_command('send_outbox', stdout=StringIO())
+        self.assertEqual(OutboundEmail.objects.get().attempts, 1)
+
+        OutboundEmail.objects.update(next_attempt_at=email.created_at)
+        call_command('send_outbox', stdout=StringIO())
+        self.assertEqual(OutboundEmail.objects.get().status, 'failed')
+
+
+@public_site_settings
+class SearchTests(TestCase):
+    """Full-text index maintained from model signals"""
+
+    def setUp(self):
+        self.author = User.objects.create_user('author')
+
+    def make_post(self, title, content='Body text', status='published'):
+        return Post.objects.create(
+            title=title, author=self.author, excerpt='Excerpt', content=content, status=status,
+        )
+
+    def test_published_posts_are_found_and_drafts_are_not(self):
+        post = self.make_post('Scaling Django')
+        self.make_post('Django draft', status='draft')
+        self.assertEqual([result.object_id for result in search.search('django')], [post.pk])
+
+    def test_unpublishing_removes_from_index(self):
+        post = self.make_post('Scaling Django')
+        post.status = 'draft'
+        post.save()
+        self.assertEqual(search.search('django'), [])
+
+    def test_title_matches_rank_first(self):
+        self.make_post('Queues', content='Background workers with postgres and postgres tuning')
+        title_match = self.make_post('Postgres indexing')
+        self.assertEqual(search.search('postgres')[0].object_id, title_match.pk)
+
+    def test_best_match_ranks_first_however_old(self):
+        best = self.make_post('Postgres tuning')
+        SearchDocument.objects.bulk_create(
+            SearchDocument(
+                kind='post', object_id=1000 + index, title=f'Note {index}', body='mentions postgres once',
+                url=f'/blog/note-{index}/', updated_at=best.updated_at,
+            )
+            for index in range(600)
+        )
+        self.assertEqual(search.search('postgres')[0].object_id, best.pk)
+
+    def test_query_syntax_is_treated_as_text(self):
+        self.make_post('Scaling Django')
+        self.assertEqual(len(search.search('"django*')), 1)
+        self.assertEqual(search.search('NEAR( OR'), [])
+
+    def test_search_page_lists_results(self):
+        self.make_post('Scaling Django')
+        response = self.client.get('/search/', {'q': 'scaling'})
+        self.assertContains(response, 'Scaling Django')
+
+
+class ReferenceDataTests(TestCase):
+    """Generation-versioned, process-local reference sets"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_steady_state_reads_cost_no_queries(self):
+        Category.objects.create(name='Django')
+        reference.categories()
+        with self.assertNumQueries(0):
+            self.assertEqual([category.name for category in reference.categories()], ['Django'])
+
+    def test_save_and_delete_refresh_the_set(self):
+        django = Category.objects.create(name='Django')
+        reference.categories()
+        Category.objects.create(name='Python')
+        self.assertEqual([category.name for category in reference.categories()], ['Django', 'Python'])
+        django.delete()
+        self.assertEqual([category.name for category in reference.categories()], ['Python'])
+
+    def test_other_processes_reuse_the_shared_copy(self):
+        TechStack.objects.create(name='Django')
+        reference.tech_stack()
+        reference._local.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual([tech.name for tech in reference.tech_stack()], ['Django'])
+
+
+TIERED_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tiered-shared'},
+    'tiered': {
+        'BACKEND': 'core.cache_backends.TieredCache',
+        'OPTIONS': {'SHARED': 'shared', 'LOCAL_TIMEOUT': 5, 'LOCAL_MAX_BYTES': 2048},
+    },
+}
+
+
+@override_settings(CACHES=TIERED_CACHES)
+class TieredCacheTests(SimpleTestCase):
+    """In-process LRU in front of a shared cache"""
+
+    def setUp(self):
+        self.cache = caches['tiered']
+        self.cache.clear()
+        self.cache.counters = dict.fromkeys(self.cache.counters, 0)
+
+    def test_second_read_is_served_locally(self):
+        caches['shared'].set('key', 'value')
+        self.assertEqual(self.cache.get('key'), 'value')
+        self.assertEqual(self.cache.get('key'), 'value')
+        self.assertEqual(self.cache.get('missing', 'default'), 'default')
+        stats = self.cache.stats()
+        self.assertEqual((stats['shared_hits'], stats['local_hits'], stats['misses']), (1, 1, 1))
+
+    def test_local_copy_expires_after_local_timeout(self):
+        self.cache.set('key', 'old')
+        caches['shared'].set('key', 'new')
+        self.assertEqual(self.cache.get('key'), 'old')
+        later = time.monotonic() + 6
+        with mock.patch('core.cache_backends.time.monotonic', return_value=later):
+            self.assertEqual(self.cache.get('key'), 'new')
+        self.assertEqual(self.cache.stats()['expirations'], 1)
+
+    def test_byte_budget_evicts_least_recently_used(self):
+        for index in range(4):
+            self.cache.set(f'key-{index}', 'x' * 600)
+            self.cache.get('key-0')
+        stats = self.cache.stats()
+        self.assertLessEqual(stats['local_bytes'], 2048)
+        self.assertGreater(stats['evictions'], 0)
+        self.cache.get('key-0')
+        self.assertEqual(self.cache.stats()['local_hits'], 5)
+        # Evicted entries are still in the shared tier
+        self.assertEqual(self.cache.get('key-1'), 'x' * 600)
+
+    def test_counters_always_read_the_shared_tier(self):
+        self.cache.set('count', 1)
+        self.assertEqual(self.cache.get('count'), 1)
+        caches['shared'].incr('count')
+        self.assertEqual(self.cache.incr('count'), 3)
+        self.assertEqual(self.cache.get('count'), 3)
+
+    def test_delete_drops_both_tiers(self):
+        self.cache.set('key', 'value')
+        self.cache.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+        self.assertIsNone(caches['shared'].get('key'))
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+@public_site_settings
+class CompressionTests(TestCase):
+    """Negotiated Brotli/gzip, precompressed in the page cache"""
+
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user('author')
+        for index in range(5):
+            Post.objects.create(title=f'Post {index}', author=author, content='text ' * 50, status='published')
+
+    def test_negotiation_follows_q_values(self):
+        self.assertEqual(compression.negotiate('gzip, deflate, br', ['br', 'gzip']), 'br')
+        self.assertEqual(compression.negotiate('br;q=0.5, gzip', ['br', 'gzip']), 'gzip')
+        self.assertEqual(compression.negotiate('gzip;q=0', ['gzip']), None)
+        self.assertEqual(compression.negotiate('*', ['gzip']), 'gzip')
+        self.assertEqual(compression.negotiate('', ['br', 'gzip']), None)
+        self.assertEqual(compression.negotiate('br', ['gzip']), None)
+
+    def test_html_is_gzipped_when_accepted(self):
+        response = self.client.get('/blog/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn(b'Post 4', gzip.decompress(response.content))
+
+    def test_identity_without_accept_encoding(self):
+        response = self.client.get('/blog/')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertIn(b'Post 4', response.content)
+
+    def test_cache_hit_is_served_without_compressing(self):
+        miss = self.client.get('/blog/', HTTP_ACCEPT_ENCODING='gzip')
+        with mock.patch('core.compression.gzip.compress') as compress:
+            hit = self.client.get('/blog/', HTTP_ACCEPT_ENCODING='gzip')
+            plain = self.client.get('/blog/')
+        compress.assert_not_called()
+        self.assertEqual(hit['Content-Encoding'], 'gzip')
+        self.assertEqual(hit.content, miss.content)
+        self.assertEqual(plain.content, gzip.decompress(miss.content))
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+    def test_encoded_cache_hits_have_a_weak_etag(self):
+        miss = self.client.get('/blog/', HTTP_ACCEPT_ENCODING='gzip')
+        hit = self.client.get('/blog/', HTTP_ACCEPT_ENCODING='gzip')
+        plain = self.client.get('/blog/')
+        self.assertTrue(miss['ETag'].startswith('W/"'))
+        self.assertEqual(hit['ETag'], miss['ETag'])
+        self.assertEqual(plain['ETag'], miss['ETag'][2:])
+        response = self.client.get('/blog/', HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=hit['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_small_and_binary_responses_are_left_alone(self):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        for response in (HttpResponse('short'), HttpResponse(b'\x89PNG' * 100, content_type='image/png')):
+            response = compression.CompressionMiddleware(lambda request: response)(request)
+            self.assertFalse(response.has_header('Content-Encoding'))
+
+
+@public_site_settings
+class ExportSiteTests(TestCase):
+    """Static export of the public site"""
+
+    def setUp(self):
+        cache.clear()
+        self.output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output, ignore_errors=True)
+        author = User.objects.create_user('author')
+        category = Category.objects.create(name='Django')
+        self.posts = [
+            Post.objects.create(
+                title=f'Post {index}', author=author, content='text', status='published', category=category,
+            )
+            for index in range(12)
+        ]
+        Project.objects.create(title='Portfolio', short_description='A site', status='published')
+
+    def export(self):
+        out = StringIO()
+        call_command('export_site', output=self.output, workers=1, base_url='http://testserver', stdout=out)
+        return out.getvalue()
+
+    def exported(self, path):
+        return os.path.exists(os.path.join(self.output, path.lstrip('/'), 'index.html'))
+
+    def test_exports_every_linked_public_page(self):
+        self.assertIn('0 failed', self.export())
+        for path in ['/', '/blog/', '/blog/page/2/', '/blog/category/django/', '/projects/',
+                     '/projects/portfolio/', self.posts[0].get_absolute_url()]:
+            self.assertTrue(self.exported(path), path)
+        self.assertFalse(self.exported('/search/'))
+        self.assertFalse(self.exported('/contact/'))
+        self.assertTrue(os.path.exists(os.path.join(self.output, 'blog', 'index.html.gz')))
+        # Shards are found through the sitemap index
+        self.assertTrue(os.path.exists(os.path.join(self.output, 'sitemap.xml')))
+        self.assertTrue(os.path.exists(os.path.join(self.output, 'sitemap-categories-0.xml')))
+
+    def test_second_export_only_rewrites_changed_pages(self):
+        self.export()
+        self.assertIn(' 0 rendered', self.export())
+
+        self.posts[0].title = 'Renamed'
+        self.posts[0].save()
+        self.assertNotIn(' 0 rendered', self.export())
+        with open(os.path.join(self.output, 'blog', self.posts[0].slug, 'index.html')) as page:
+            self.assertIn('Renamed', page.read())
+
+    def test_unchanged_pages_are_not_rendered_with_a_shared_cache(self):
+        statuses = {}
+        fetch = export.fetch
+
+        def record(path, *args):
+            result = fetch(path, *args)
+            statuses[path] = result[0]
+            return result
+
+        with mock.patch.object(export, 'validators_persist', return_value=True):
+            self.export()
+            with mock.patch.object(export, 'fetch', record):
+                self.assertIn(' 0 rendered', self.export())
+        self.assertEqual(statuses['/blog/'], 304)
+        self.assertEqual(statuses[self.posts[0].get_absolute_url()], 304)
+
+    def test_per_process_cache_renders_every_page(self):
+        self.assertFalse(export.validators_persist())
+        self.export()
+        with mock.patch.object(export, 'fetch', wraps=export.fetch) as fetch:
+            self.assertIn('every page is rendered', self.export())
+        self.assertEqual({call.args[1] for call in fetch.call_args_list}, {None})
+
+    @override_settings(PAGINATION_MODE='cursor')
+    def test_pages_link_no_query_strings(self):
+        tag = Tag.objects.create(name='python')
+        for post in self.posts:
+            post.tags.add(tag)
+        self.export()
+        self.assertTrue(self.exported('/blog/page/2/'))
+        for path in ['/blog/', tag.get_absolute_url()]:
+            with open(os.path.join(self.output, path.lstrip('/'), 'index.html')) as page:
+                self.assertNotIn('?cursor=', page.read())
+
+    def test_unpublished_pages_are_removed(self):
+        self.export()
+        post = self.posts[0]
+        post.status = 'draft'
+        post.save()
+        self.assertIn('1 removed', self.export())
+        self.assertFalse(self.exported(post.get_absolute_url()))
+
+
+@override_settings(ROOT_URLCONF='config.urls_async')
+@public_site_settings
+class AsyncViewTests(TestCase):
+    """Public pages served by the async views"""
+
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user('author')
+        self.category = Category.objects.create(name='Django')
+        self.posts = [
+            Post.objects.create(
+                title=f'Post {index}', author=author, content='text', status='published',
+                category=self.category, featured=index == 0,
+            )
+            for index in range(12)
+        ]
+        self.project = Project.objects.create(
+            title='Portfolio', short_description='A site', status='published', featured=True,
+        )
+
+    async def test_public_pages_render(self):
+        pages = {
+            '/': 'Portfolio',
+            '/blog/': 'Post 11',
+            '/blog/page/2/': 'Post 0',
+            '/blog/category/django/': 'Post 11',
+            f'/blog/{self.posts[0].slug}/': 'Post 0',
+            '/projects/': 'Portfolio',
+            f'/projects/{self.project.slug}/': 'Portfolio',
+        }
+        for path, text in pages.items():
+            response = await self.async_client.get(path)
+            self.assertEqual(response.status_code, 200, path)
+            self.assertContains(response, text)
+
+    async def test_missing_pages_are_404(self):
+        for path in ['/blog/missing/', '/blog/category/missing/', '/blog/page/9/', '/projects/missing/']:
+            response = await self.async_client.get(path)
+            self.assertEqual(response.status_code, 404, path)
+
+    async def test_conditional_get(self):
+        response = await self.async_client.get(f'/blog/{self.posts[0].slug}/')
+        response = await self.async_client.get(
+            f'/blog/{self.posts[0].slug}/', headers={'If-None-Match': response['ETag']},
+        )
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(PAGE_CACHE_ENABLED=True)
+    async def test_page_cache_serves_repeat_requests(self):
+        first = await self.async_client.get('/blog/')
+        with mock.patch.object(AsyncPostListView, 'get', side_effect=AssertionError("view ran")):
+            second = await self.async_client.get('/blog/')
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    async def test_other_methods(self):
+        response = await self.async_client.options('/blog/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Allow'], 'GET, HEAD, OPTIONS')
+        response = await self.async_client.post('/blog/')
+        self.assertEqual(response.status_code, 405)
+
+    def test_routes_follow_the_sync_urlconf(self):
+        self.assertEqual(settings_asgi.ROOT_URLCONF, 'config.urls_async')
+        for urls in (blog_urls, core_urls, projects_urls):
+            self.assertEqual(
+                [(str(pattern.pattern), pattern.name) for pattern in urls.async_urlpatterns],
+                [(str(pattern.pattern), pattern.name) for pattern in urls.urlpatterns],
+            )
+        self.assertIs(blog_urls.async_urlpatterns[-1].callback.view_class, AsyncPostDetailView)
+
+
+@public_site_settings
+class HomeSnapshotTests(TestCase):
+    """Home page content from a stale-while-revalidate snapshot"""
+
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user('author')
+        category = Category.objects.create(name='Django')
+        self.post = Post.objects.create(
+            title='Featured post', author=author, content='text', status='published', featured=True,
+            category=category,
+        )
+        project = Project.objects.create(
+            title='Featured project', short_description='A site', status='published', featured=True,
+        )
+        project.tech_stack.add(TechStack.objects.create(name='Python'))
+
+    def test_home_renders_snapshot_without_queries(self):
+        response = self.client.get('/')
+        self.assertContains(response, 'Featured post')
+        self.assertContains(response, 'Featured project')
+        self.assertContains(response, 'Python')
+        with self.assertNumQueries(0):
+            self.assertContains(self.client.get('/'), f'href="{self.post.get_absolute_url()}"')
+
+    def test_stale_snapshot_is_served_while_one_refresh_runs(self):
+        self.client.get('/')
+        self.post.title = 'Renamed post'
+        self.post.save()
+
+        # Outside a test transaction the refresh runs in its own thread
+        with mock.patch('core.snapshot.connection') as connection, \
+                mock.patch('core.snapshot.threading.Thread') as thread:
+            connection.in_atomic_block = False
+            self.assertContains(self.client.get('/'), 'Featured post')
+            self.assertContains(self.client.get('/'), 'Featured post')
+        thread.assert_called_once()
+        thread.return_value.start.assert_called_once()
+
+        # What the background thread runs
+        snapshot.build()
+        cache.delete(snapshot.LOCK_KEY)
+        self.assertContains(self.client.get('/'), 'Renamed post')
+
+    @override_settings(PAGE_CACHE_ENABLED=True)
+    def test_page_from_stale_snapshot_is_not_cached_as_current(self):
+        self.client.get('/')
+        self.post.title = 'Renamed post'
+        self.post.save()
+        # Served stale (the refresh runs inline inside the test transaction)
+        self.assertContains(self.client.get('/'), 'Featured post')
+        self.assertContains(self.client.get('/'), 'Renamed post')
+
+
+@override_settings(SITEMAP_SHARD_SIZE=2)
+@public_site_settings
+class SitemapTests(TestCase):
+    """Sharded sitemap index and cached, streamed shards"""
+
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user('author')
+        self.category = Category.objects.create(name='Django')
+        self.posts = [
+            Post.objects.create(
+                title=f'Post {index}', author=author, content='text', status='published', category=self.category,
+            )
+            for index in range(5)
+        ]
+        Post.objects.create(title='Draft', author=author, content='text')
+        Project.objects.create(title='Portfolio', short_description='A site', status='published')
+
+    def get(self, path, **extra):
+        response = self.client.get(path, **extra)
+        content = response.getvalue() if response.streaming else response.content
+        return response, content.decode()
+
+    def shard_url(self, post):
+        return f'/sitemap-posts-{post.pk // 2}.xml'
+
+    def test_index_lists_each_non_empty_shard(self):
+        response, content = self.get('/sitemap.xml')
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/xml')
+        shards = {self.shard_url(post) for post in self.posts}
+        for url in shards:
+            self.assertIn(f'<loc>http://testserver{url}</loc>', content)
+        self.assertEqual(content.count('<sitemap>'), len(shards) + 2)
+
+        with self.assertNumQueries(0):
+            self.get('/sitemap.xml')
+        last_shard = self.shard_url(self.posts[-1])
+        for post in self.posts:
+            if self.shard_url(post) == last_shard:
+                post.delete()
+        self.assertNotIn(last_shard, self.get('/sitemap.xml')[1])
+
+    def test_shard_lists_its_published_pages(self):
+        post = self.posts[0]
+        _, content = self.get(self.shard_url(post))
+        self.assertIn(f'<loc>http://testserver{post.get_absolute_url()}</loc>', content)
+        self.assertNotIn('/blog/draft/', content)
+        self.assertNotIn(self.posts[-1].get_absolute_url(), content)
+
+        _, content = self.get('/sitemap-categories-0.xml')
+        self.assertIn('<loc>http://testserver/blog/category/django/</loc>', content)
+        self.assertEqual(self.get('/sitemap-posts-999.xml')[0].status_code, 404)
+        self.assertEqual(self.get('/sitemap-unknown-0.xml')[0].status_code, 404)
+
+    def test_shard_is_cached_until_its_rows_change(self):
+        post = self.posts[0]
+        self.assertTrue(self.get(self.shard_url(post))[0].streaming)
+        with self.assertNumQueries(1):
+            response, content = self.get(self.shard_url(post))
+        self.assertFalse(response.streaming)
+
+        self.assertEqual(self.get(self.shard_url(post), HTTP_IF_NONE_MATCH=response['ETag'])[0].status_code, 304)
+
+        post.slug = 'renamed'
+        post.save()
+        response, content = self.get(self.shard_url(post))
+        self.assertTrue(response.streaming)
+        self.assertIn('/blog/renamed/', content)
+
+    def test_renamed_category_regenerates_its_shard(self):
+        self.get('/sitemap-categories-0.xml')
+        self.category.slug = 'python'
+        self.category.save()
+        self.assertIn('/blog/category/python/', self.get('/sitemap-categories-0.xml')[1])
+
+
+class BulkContentTests(TestCase):
+    """import_content / export_content in JSON Lines and markdown"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        self.author = User.objects.create_superuser('admin')
+        category = Category.objects.create(name='Django')
+        post = Post.objects.create(
+            title='Hello', author=self.author, content='**bold**', status='published', category=category,
+        )
+        post.tags.add(Tag.objects.create(name='python'))
+        project = Project.objects.create(
+            title='Portfolio', short_description='A site', case_study_content='# Study', status='published',
+        )
+        project.tech_stack.add(TechStack.objects.create(name='Python'))
+
+    def write_jsonl(self, records):
+        path = os.path.join(self.directory, 'content.jsonl')
+        with open(path, 'w') as stream:
+            stream.writelines(json.dumps(record) + '\n' for record in records)
+        return path
+
+    def run_import(self, source, **options):
+        out = StringIO()
+        call_command('import_content', source, workers=1, stdout=out, **options)
+        return out.getvalue()
+
+    def test_jsonl_round_trip(self):
+        path = os.path.join(self.directory, 'export.jsonl')
+        call_command('export_content', path, stdout=StringIO())
+        Post.objects.all().delete()
+        Project.objects.all().delete()
+
+        self.assertIn('1 posts created', self.run_import(path))
+        post = Post.objects.get(slug='hello')
+        self.assertEqual(post.category.name, 'Django')
+        self.assertEqual([tag.name for tag in post.tags.all()], ['python'])
+        self.assertEqual(post.content_html, '<p><strong>bold</strong></p>')
+        self.assertEqual(Tag.objects.get(name='python').post_count, 1)
+        self.assertEqual(search.search('hello')[0].title, 'Hello')
+        project = Project.objects.get(slug='portfolio')
+        self.assertEqual([tech.name for tech in project.tech_stack.all()], ['Python'])
+        self.assertIn('Study', project.case_study_html)
+
+        # Re-importing the same content writes nothing
+        updated_at = Post.objects.get(slug='hello').updated_at
+        self.assertIn('1 posts unchanged', self.run_import(path))
+        self.assertEqual(Post.objects.get(slug='hello').updated_at, updated_at)
+
+    def test_markdown_round_trip_updates_by_slug(self):
+        call_command('export_content', self.directory, stdout=StringIO())
+        path = os.path.join(self.directory, 'posts', 'hello.md')
+        with open(path) as handle:
+            text = handle.read()
+        self.assertTrue(text.startswith('---\ntitle: "Hello"') or '\ntitle: "Hello"\n' in text)
+        with open(path, 'w') as handle:
+            handle.write(text.replace('**bold**', '*edited*'))
+
+        self.assertIn('1 posts updated', self.run_import(self.directory))
+        self.assertEqual(Post.objects.count(), 1)
+        self.assertEqual(Post.objects.get(slug='hello').content_html, '<p><em>edited</em></p>')
+
+    def test_updated_posts_keep_their_creation_time(self):
+        path = os.path.join(self.directory, 'export.jsonl')
+        call_command('export_content', path, stdout=StringIO())
+        with open(path) as handle:
+            text = handle.read()
+        with open(path, 'w') as handle:
+            handle.write(text.replace('**bold**', '*edited*'))
+
+        self.assertIn('1 posts updated', self.run_import(path))
+        post = Post.objects.get(slug='hello')
+        self.assertEqual(PostTag.objects.get(post=post).created_at, post.created_at)
+
+    def test_hand_written_frontmatter(self):
+        fields, body = bulk.parse_frontmatter('---\ntitle: Plain title\ntags: [a, "b"]\nfeatured: true\n---\nBody\n')
+        self.assertEqual(fields, {'title': 'Plain title', 'tags': ['a', 'b'], 'featured': True})
+        self.assertEqual(body, 'Body\n')
+
+    def test_references_are_resolved_once_per_batch(self):
+        records = [
+            {'type': 'post', 'slug': f'imported-{index}', 'title': f'Imported {index}', 'content': 'text',
+             'status': 'published', 'category': f'Category {index % 3}', 'tags': ['python', f'tag-{index % 2}']}
+            for index in range(100)
+        ]
+        path = self.write_jsonl(records)
+        for created in (True, False):
+            with CaptureQueriesContext(connection) as queries:
+                self.run_import(path)
+            # A fixed number per batch, not per record
+            self.assertLess(len(queries), 40, created)
+        self.assertEqual(Post.objects.filter(title__startswith='Imported').count(), 100)
+        self.assertEqual(Category.objects.count(), 4)
+
+    def test_invalid_records_are_reported(self):
+        with self.assertRaisesMessage(CommandError, 'line 2: missing title'):
+            self.run_import(self.write_jsonl([{'type': 'post', 'title': 'Fine'}, {'type': 'post'}]))
+
+    @public_site_settings
+    def test_markdown_file_names_are_slugified(self):
+        folder = os.path.join(self.directory, 'posts')
+        os.makedirs(folder)
+        with open(os.path.join(folder, 'My Post.md'), 'w') as handle:
+            handle.write('---\ntitle: My post\nstatus: published\n---\nBody\n')
+        self.assertIn('1 posts created', self.run_import(self.directory))
+        self.assertEqual(Post.objects.get(slug='my-post').title, 'My post')
+        self.assertEqual(self.client.get('/blog/').status_code, 200)
+
+    def test_invalid_slugs_are_reported(self):
+        with self.assertRaisesMessage(CommandError, "line 2: invalid slug 'My Post'"):
+            self.run_import(self.write_jsonl([
+                {'type': 'post', 'title': 'Fine'},
+                {'type': 'post', 'title': 'My post', 'slug': 'My Post'},
+            ]))
+        self.assertFalse(Post.objects.filter(title__in=['Fine', 'My post']).exists())
+
+    def test_unknown_author_is_reported(self):
+        path = self.write_jsonl([
+            {'type': 'post', 'title': 'Fine', 'author': 'admin'},
+            {'type': 'post', 'title': 'Hi', 'author': 'ghost'},
+        ])
+        with self.assertRaisesMessage(CommandError, "line 2: unknown author 'ghost'"):
+            self.run_import(path)
+        self.assertFalse(Post.objects.filter(title='Hi').exists())
+
+    def test_records_without_a_slug_are_created(self):
+        original = Post.objects.get(slug='hello')
+        self.assertIn('2 posts created', self.run_import(self.write_jsonl([
+            {'type': 'post', 'title': 'Hello', 'content': 'other'},
+            {'type': 'post', 'slug': 'hello-2', 'title': 'Second', 'content': 'text'},
+        ])))
+        self.assertEqual(Post.objects.get(slug='hello').content, original.content)
+        self.assertEqual(Post.objects.get(slug='hello-2').title, 'Second')
+        self.assertEqual(Post.objects.get(slug='hello-3').content, 'other')
+
+
+class SlugAllocationTests(TestCase):
+    """Unique slugs from one prefix query, for saves and bulk creates"""
+
+    def setUp(self):
+        self.author = User.objects.create_user('author')
+
+    def create(self, title):
+        return Post.objects.create(title=title, author=self.author, content='')
+
+    def test_collisions_get_the_next_suffix(self):
+        slugs_ = [self.create('Hello').slug for _ in range(3)]
+        self.assertEqual(slugs_, ['hello', 'hello-2', 'hello-3'])
+        # Other slugs sharing the prefix are not suffixes
+        self.create('Hello World')
+        self.create('Hello 10 things')
+        with self.assertNumQueries(1):
+            self.assertEqual(slugs.allocate(Post, 'Hello'), 'hello-4')
+
+    def test_explicit_slug_is_kept(self):
+        self.assertEqual(Post.objects.create(title='Hello', slug='custom', author=self.author).slug, 'custom')
+
+    def test_categories_and_tags(self):
+        Category.objects.create(name='Django')
+        self.assertEqual(Category.objects.create(name='django!').slug, 'django-2')
+        Tag.objects.create(name='C++')
+        self.assertEqual(Tag.objects.create(name='C').slug, 'c-2')
+
+    def test_allocate_many_for_bulk_create(self):
+        self.create('Hello')
+        self.create('Hello')
+        posts = [Post(title=title, author=self.author) for title in ['Hello', 'New', 'Hello', 'New', 'Hello 2']]
+        # One query for the plain slugs, then one per stem that collides:
+        # hello and hello-2 with existing rows, new within the batch
+        with self.assertNumQueries(4):
+            slugs.assign(posts, 'title')
+        Post.objects.bulk_create(posts)
+        self.assertEqual([post.slug for post in posts], ['hello-3', 'new', 'hello-4', 'new-2', 'hello-2-2'])
+
+    def test_save_retries_when_the_slug_is_taken_concurrently(self):
+        self.create('Hello')
+        # As if the row appeared after the suffixes were read
+        with mock.patch('core.slugs.used_suffixes', return_value=set()):
+            post = self.create('Hello')
+        self.assertEqual(post.slug, 'hello-2')
+        self.assertEqual(Post.objects.count(), 2)
+
+    def test_numbers_with_leading_zeros_are_not_suffixes(self):
+        for slug in ('agent', 'agent-8', 'agent-007'):
+            Post.objects.create(title='Agent', slug=slug, author=self.author)
+        self.assertEqual(self.create('Agent').slug, 'agent-2')
+        self.assertEqual(slugs.allocate_many(Post, ['Agent'] * 7), [f'agent-{n}' for n in (3, 4, 5, 6, 7, 9, 10)])
+
+    def test_numbered_titles_leave_the_lowest_free_suffix(self):
+        self.create('Top')
+        self.create('Top 10')
+        self.assertEqual(self.create('Top!').slug, 'top-2')
+
+    def test_prefix_query_uses_the_slug_index(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("SQLite query plan")
+        self.create('Hello')
+        with CaptureQueriesContext(connection) as queries:
+            slugs.allocate(Post, 'Hello')
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {queries[0]['sql']}")
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertNotIn('SCAN blog_post', plan)
+        self.assertIn('INDEX', plan)
+
+
+@override_settings(REPLICA_DATABASE='replica', REPLICA_LAG_SECONDS=0)
+@public_site_settings
+class ReplicaRoutingTests(TestCase):
+    """Public reads routed to the replica, with stickiness after writes"""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', password='pw')
+        Post.objects.create(title='Hello', author=self.admin, content='Body', status='published')
+
+    def get(self, path, client=None, **extra):
+        """The response, and the database each read was routed to"""
+        client = client or self.client
+        aliases = []
+        route = ReplicaRouter.db_for_read
+
+        def spy(router_, model, **hints):
+            alias = route(router_, model, **hints)
+            aliases.append(alias)
+            # There is no replica connection in tests; run the query anyway
+            return None if alias == 'replica' else alias
+
+        with mock.patch.object(ReplicaRouter, 'db_for_read', spy):
+            if client is self.async_client:
+                response = async_to_sync(client.get)(path, **extra)
+            else:
+                response = client.get(path, **extra)
+        return response, aliases
+
+    def test_public_pages_read_from_the_replica(self):
+        for name in ('core:home', 'blog:list', 'projects:list'):
+            response, aliases = self.get(reverse(name))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(set(aliases), {'replica'}, name)
+            self.assertNotIn(routers.PIN_COOKIE, response.cookies)
+
+    @override_settings(ROOT_URLCONF='config.urls_async')
+    def test_async_views_read_from_the_replica(self):
+        response, aliases = self.get(reverse('blog:list'), client=self.async_client)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(aliases), {'replica'})
+
+    def test_admin_reads_from_the_primary(self):
+        self.client.force_login(self.admin)
+        response, aliases = self.get(reverse('admin:blog_post_changelist'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('replica', aliases)
+
+    @override_settings(REPLICA_LAG_SECONDS=5)
+    def test_client_reads_primary_after_a_save(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse('admin:blog_category_add'), {'name': 'New'})
+        self.assertEqual(response.status_code, 302)
+        cookie = response.cookies[routers.PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], 5)
+
+        _, aliases = self.get(reverse('blog:list'))
+        self.assertNotIn('replica', aliases)
+
+    def test_lazy_refreshes_on_public_pages_do_not_pin(self):
+        post = Post.objects.get()
+        Post.objects.filter(pk=post.pk).update(content_html_hash='stale')
+        response, _ = self.get(post.get_absolute_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(routers.PIN_COOKIE, response.cookies)
+        # The refresh itself was written
+        self.assertNotEqual(Post.objects.get().content_html_hash, 'stale')
+
+    def test_all_clients_read_primary_just_after_content_changes(self):
+        with override_settings(REPLICA_LAG_SECONDS=60):
+            bump('post-list')
+            _, aliases = self.get(reverse('blog:list'))
+        self.assertNotIn('replica', aliases)
+
+    def test_writes_go_to_the_primary(self):
+        router = ReplicaRouter()
+        post = Post.objects.get()
+        post._state.db = 'replica'
+        self.assertEqual(router.db_for_write(Post, instance=post), 'default')
+        self.assertTrue(router.allow_relation(post, self.admin))
+        self.assertIs(router.allow_migrate('replica', 'blog'), False)
+        self.assertIsNone(router.allow_migrate('default', 'blog'))
+
+    @override_settings(REPLICA_DATABASE=None)
+    def test_without_a_replica(self):
+        _, aliases = self.get(reverse('blog:list'))
+        self.assertEqual(set(aliases), {None})
+        self.client.force_login(self.admin)
+        response = self.client.post(reverse('admin:blog_category_add'), {'name': 'New'})
+        self.assertNotIn(routers.PIN_COOKIE, response.cookies)
+
+
+def make_upload(name='shot.png', size=(1000, 500), mode='RGB'):
+    buffer = BytesIO()
+    Image.new(mode, size, 'teal').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class ImageDerivativeTests(TestCase):
+    """Responsive derivatives built on upload and rendered as srcset"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.project = Project.objects.create(
+            title='Imaged', short_description='Short', case_study_content='text', status='published',
+        )
+
+    def test_upload_builds_resized_variants_without_upscaling(self):
+        image = ProjectImage.objects.create(project=self.project, image=make_upload())
+        manifest = ProjectImage.objects.get(pk=image.pk).image_variants
+        self.assertEqual(manifest['source'], image.image.name)
+        self.assertEqual((manifest['width'], manifest['fallback']), (1000, 'jpeg'))
+        self.assertIn('webp', manifest['sources'])
+        for entries in manifest['sources'].values():
+            self.assertEqual([width for width, _, _ in entries], [320, 640, 960, 1000])
+            self.assertTrue(all(default_storage.exists(name) for _, name, _ in entries))
+
+    def test_identical_content_shares_derivatives(self):
+        first = ProjectImage.objects.create(project=self.project, image=make_upload('a.png'))
+        second = ProjectImage.objects.create(project=self.project, image=make_upload('b.png'))
+        self.assertNotEqual(first.image.name, second.image.name)
+        self.assertEqual(first.image_variants['sources'], second.image_variants['sources'])
+
+    def test_transparent_images_fall_back_to_png(self):
+        image = ProjectImage.objects.create(project=self.project, image=make_upload(mode='RGBA', size=(200, 100)))
+        self.assertEqual(image.image_variants['fallback'], 'png')
+        self.assertEqual([width for width, _, _ in image.image_variants['sources']['png']], [200])
+
+    def test_picture_tag_builds_missing_variants_lazily(self):
+        image = ProjectImage.objects.create(project=self.project, image=make_upload())
+        ProjectImage.objects.filter(pk=image.pk).update(image_variants={})
+        image = ProjectImage.objects.get(pk=image.pk)
+        html = Template("{% load images %}{% picture image 'image' sizes='50vw' class='card-img-top' %}").render(
+            Context({'image': image})
+        )
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn('-320w.webp 320w', html)
+        self.assertIn('sizes="50vw"', html)
+        self.assertIn('class="card-img-top"', html)
+        self.assertTrue(ProjectImage.objects.get(pk=image.pk).image_variants['sources'])
+
+    def test_undecodable_file_falls_back_to_original(self):
+        upload = SimpleUploadedFile('broken.png', b'not an image')
+        with self.assertLogs('portfolio.images', 'WARNING'):
+            image = ProjectImage.objects.create(project=self.project, image=upload)
+        html = Template("{% load images %}{% picture image 'image' %}").render(Context({'image': image}))
+        self.assertIn(f'src="/media/{image.image.name}"', html)
+        self.assertEqual(ProjectImage.objects.get(pk=image.pk).image_variants['sources'], {})
+
+    def test_bulk_command_builds_missing_variants_and_skips_current_ones(self):
+        image = ProjectImage.objects.create(project=self.project, image=make_upload())
+        built = ProjectImage.objects.get(pk=image.pk).image_variants
+        ProjectImage.objects.filter(pk=image.pk).update(image_variants={})
+
+        out = StringIO()
+        call_command('build_image_derivatives', workers=2, stdout=out)
+        self.assertIn('Processed 1 images', out.getvalue())
+        self.assertIn('images/s', out.getvalue())
+        self.assertEqual(ProjectImage.objects.get(pk=image.pk).image_variants, built)
+
+        out = StringIO()
+        call_command('build_image_derivatives', stdout=out)
+        self.assertIn('All image derivatives are current', out.getvalue())
+
+        out = StringIO()
+        call_command('build_image_derivatives', workers=1, verify=True, stdout=out)
+        self.assertIn('1 unchanged', out.getvalue())
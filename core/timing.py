@@ -0,0 +1,154 @@
+"""
+Request timing
+Collects where a request spends its time (database, templates, markdown,
+cache) and reports it as a Server-Timing header and a structured log line.
+"""
+import contextvars
+import json
+import logging
+import random
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('portfolio.timing')
+
+_current = contextvars.ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Accumulated durations (seconds) and counts for one request"""
+
+    def __init__(self):
+        self.durations = defaultdict(float)
+        self.counts = defaultdict(int)
+        self.events = {}
+
+    def add(self, name, seconds, count=1):
+        self.durations[name] += seconds
+        self.counts[name] += count
+
+    def db_wrapper(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.add('db', time.perf_counter() - start)
+
+    def header(self, total):
+        # Entries overlap: template time includes queries and markdown
+        # rendering triggered while the template was evaluated.
+        metrics = [
+            f'{name};dur={seconds * 1000:.1f};desc="{self.counts[name]}x"'
+            for name, seconds in self.durations.items()
+        ]
+        metrics += [f'{name};desc="{value}"' for name, value in self.events.items()]
+        metrics.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(metrics)
+
+    def as_dict(self, total):
+        return {
+            'total_ms': round(total * 1000, 2),
+            **{f'{name}_ms': round(seconds * 1000, 2) for name, seconds in self.durations.items()},
+            **{f'{name}_count': count for name, count in self.counts.items()},
+            **self.events,
+        }
+
+
+@contextmanager
+def timer(name):
+    """Attribute the time spent in the block to ``name``, when sampled"""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+def record(name, value):
+    """Record a named event for the current request, e.g. a cache hit"""
+    timings = _current.get()
+    if timings is not None:
+        timings.events[name] = value
+
+
+class ServerTimingMiddleware:
+    """
+    Time a sample of requests and emit a Server-Timing header and log line.
+
+    ``SERVER_TIMING_SAMPLE_RATE`` (0.0-1.0) picks the fraction of requests
+    measured; unsampled requests pay for a single random() call.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= settings.SERVER_TIMING_SAMPLE_RATE:
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            with self.wrap_queries(timings):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.report(request, response, timings, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if random.random() >= settings.SERVER_TIMING_SAMPLE_RATE:
+            return await self.get_response(request)
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            with self.wrap_queries(timings):
+                response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.report(request, response, timings, time.perf_counter() - start)
+
+    @staticmethod
+    def wrap_queries(timings):
+        stack = ExitStack()
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(timings.db_wrapper))
+        return stack
+
+    def report(self, request, response, timings, total):
+        response['Server-Timing'] = timings.header(total)
+        logger.info(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            **timings.as_dict(total),
+        }))
+        return response
+
+    def process_template_response(self, request, response):
+        timings = _current.get()
+        if timings is not None:
+            # Rendering happens right after this hook returns
+            start = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: timings.add('template', time.perf_counter() - start)
+            )
+        return response
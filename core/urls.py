@@ -3,10 +3,19 @@ Core URL configuration
 """
 from django.urls import path
 from . import views
+from .routes import with_async_views
 
 app_name = 'core'
 
 urlpatterns = [
     path('', views.HomeView.as_view(), name='home'),
+    path('search/', views.SearchView.as_view(), name='search'),
     path('contact/', views.ContactView.as_view(), name='contact'),
+    path('sitemap.xml', views.SitemapIndexView.as_view(), name='sitemap'),
+    path('sitemap-<slug:section>-<int:number>.xml', views.SitemapShardView.as_view(), name='sitemap-shard'),
 ]
+
+# Same routes with the async views, for config.urls_async
+async_urlpatterns = with_async_views(urlpatterns, {
+    views.HomeView: views.AsyncHomeView,
+})
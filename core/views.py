@@ -2,32 +2,115 @@
 Core views
 Homepage and contact functionality
 """
-from django.views.generic import TemplateView, CreateView
+from asgiref.sync import sync_to_async
+from django.views.generic import TemplateView, CreateView, View
 from django.contrib import messages
-from django.urls import reverse_lazy
-from django.core.mail import send_mail
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse, reverse_lazy
 from django.conf import settings
-from .models import ContactMessage
-from projects.models import Project
-from blog.models import Post
+from . import search, sitemap, snapshot
+from .asyncviews import AsyncPageMixin
+from .cache import PageCacheMixin
+from .conditional import ConditionalGetMixin, make_etag
+from .models import ContactMessage, OutboundEmail
 
 
-class HomeView(TemplateView):
-    """Homepage with featured content"""
+class HomeView(PageCacheMixin, TemplateView):
+    """Homepage with featured content, from the cached home snapshot"""
     template_name = 'core/home.html'
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['featured_projects'] = Project.objects.filter(
-            status='published',
-            featured=True
-        ).prefetch_related('tech_stack')[:3]
-        
-        context['featured_posts'] = Post.objects.filter(
-            status='published',
-            featured=True
-        ).select_related('category')[:3]
-        
+        self.snapshot = snapshot.home()
+        context['featured_projects'] = self.snapshot['featured_projects']
+        context['featured_posts'] = self.snapshot['featured_posts']
+        return context
+    
+    def get_cache_tags(self):
+        return snapshot.HOME_TAGS
+    
+    def get_page_generations(self):
+        # A stale snapshot is cached under its own generations, so the page
+        # misses again once the background refresh has landed
+        return self.snapshot['generations']
+
+
+class AsyncHomeView(AsyncPageMixin, HomeView):
+    """HomeView for ASGI"""
+    
+    async def get(self, request, *args, **kwargs):
+        # The snapshot may be built inline, with queries
+        context = await sync_to_async(self.get_context_data)(**kwargs)
+        await self.read_generations()
+        return await self.render(context)
+
+
+class SitemapMixin:
+    """Absolute locations for the sitemap views"""
+    
+    def get_base_url(self):
+        return self.request.build_absolute_uri('/').rstrip('/')
+
+
+class SitemapIndexView(SitemapMixin, ConditionalGetMixin, View):
+    """Sitemap index listing every non-empty shard of each section"""
+    
+    def get_shards(self):
+        """``(url, count, modified)`` per shard"""
+        if not hasattr(self, 'shards'):
+            self.shards = [
+                (reverse('core:sitemap-shard', kwargs={'section': name, 'number': number}), count, modified)
+                for name, number, count, modified in sitemap.index_shards()
+            ]
+        return self.shards
+    
+    def get_validators(self):
+        shards = self.get_shards()
+        last_modified = max((modified for _, _, modified in shards if modified), default=None)
+        return last_modified, make_etag(self.get_base_url(), shards)
+    
+    def get(self, request, *args, **kwargs):
+        shards = [(url, modified) for url, _, modified in self.get_shards()]
+        return StreamingHttpResponse(sitemap.index_lines(self.get_base_url(), shards), content_type='application/xml')
+
+
+class SitemapShardView(SitemapMixin, ConditionalGetMixin, View):
+    """One shard of a section, served from the cache until its rows change"""
+    
+    def get_fingerprint(self):
+        if not hasattr(self, 'fingerprint'):
+            self.section = sitemap.SECTIONS.get(self.kwargs['section'])
+            self.fingerprint = self.section and self.section.fingerprint(self.kwargs['number'])
+        return self.fingerprint
+    
+    def get_validators(self):
+        fingerprint = self.get_fingerprint()
+        if not fingerprint or not fingerprint[0]:
+            return None
+        return fingerprint[1], make_etag(self.get_base_url(), self.kwargs, fingerprint)
+    
+    def get(self, request, *args, **kwargs):
+        fingerprint = self.get_fingerprint()
+        if not fingerprint or not fingerprint[0]:
+            raise Http404("No such sitemap shard")
+        base_url = self.get_base_url()
+        key = sitemap.shard_cache_key(self.section, self.kwargs['number'], base_url)
+        content = sitemap.get_cached_shard(key, fingerprint)
+        if content is not None:
+            return HttpResponse(content, content_type='application/xml')
+        lines = sitemap.shard_lines(base_url, self.section, self.kwargs['number'])
+        return StreamingHttpResponse(sitemap.stream_and_store(lines, key, fingerprint), content_type='application/xml')
+
+
+class SearchView(TemplateView):
+    """Ranked full-text search over published posts and projects"""
+    template_name = 'core/search.html'
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '')[:200]
+        context['query'] = query
+        context['results'] = search.search(query)
         return context
 
 
@@ -41,19 +124,15 @@ class ContactView(CreateView):
     def form_valid(self, form):
         response = super().form_valid(form)
         
-        # Send email notification
+        # Queue the email notification; the send_outbox worker delivers it
         if settings.CONTACT_EMAIL:
-            try:
-                send_mail(
-                    subject=f"Portfolio Contact: {form.cleaned_data['subject']}",
-                    message=f"From: {form.cleaned_data['name']} ({form.cleaned_data['email']})\n\n{form.cleaned_data['message']}",
-                    from_email=settings.EMAIL_HOST_USER,
-                    recipient_list=[settings.CONTACT_EMAIL],
-                    fail_silently=True,
-                )
-            except Exception as e:
-                # Log error but don't fail the form submission
-                print(f"Email error: {e}")
+            OutboundEmail.objects.create(
+                contact_message=self.object,
+                subject=f"Portfolio Contact: {form.cleaned_data['subject']}",
+                body=f"From: {form.cleaned_data['name']} ({form.cleaned_data['email']})\n\n{form.cleaned_data['message']}",
+                from_email=settings.EMAIL_HOST_USER,
+                recipients=settings.CONTACT_EMAIL,
+            )
         
         messages.success(self.request, 'Thank you for your message! I\'ll get back to you soon.')
         return response
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-17 06:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='case_study_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='project',
+            name='case_study_html_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
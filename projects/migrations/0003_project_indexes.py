@@ -0,0 +1,25 @@
+# Generated by Django 5.0.1 on 2026-10-17 06:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_project_case_study_html'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['order', '-created_at'], name='project_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('featured', True), ('status', 'published')), fields=['order', '-created_at'], name='project_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='projectimage',
+            index=models.Index(fields=['project', 'order'], name='projectimage_order_idx'),
+        ),
+    ]
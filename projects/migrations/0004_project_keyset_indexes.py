@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-17 06:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0003_project_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='project',
+            name='project_published_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='project',
+            name='project_featured_idx',
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['order', '-created_at', '-id'], name='project_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('featured', True), ('status', 'published')), fields=['order', '-created_at', '-id'], name='project_featured_idx'),
+        ),
+    ]
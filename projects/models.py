@@ -3,10 +3,10 @@ Projects app models
 Stores portfolio projects with case studies
 """
 from django.db import models
-from django.utils.text import slugify
 from django.urls import reverse
-import markdown
-import bleach
+from core.images import derivatives_cached
+from core.rendering import render_cached
+from core.slugs import save_with_slug
 
 
 class TechStack(models.Model):
@@ -23,6 +23,16 @@ class TechStack(models.Model):
         return self.name
 
 
+class ProjectQuerySet(models.QuerySet):
+    def with_cover_image(self):
+        """Prefetch only each project's first image, for ``cover_image``"""
+        return self.prefetch_related(models.Prefetch(
+            'images',
+            queryset=ProjectImage.objects.order_by('order', 'pk')[:1],
+            to_attr='_cover_images',
+        ))
+
+
 class Project(models.Model):
     """Portfolio project with detailed information"""
     STATUS_CHOICES = [
@@ -44,6 +54,8 @@ class Project(models.Model):
         blank=True,
         help_text="Detailed case study in Markdown format"
     )
+    case_study_html = models.TextField(blank=True, editable=False)
+    case_study_html_hash = models.CharField(max_length=64, blank=True, editable=False)
     
     # Metadata
     featured = models.BooleanField(default=False, help_text="Show on homepage")
@@ -53,39 +65,46 @@ class Project(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = ProjectQuerySet.as_manager()
+    
     class Meta:
         ordering = ['order', '-created_at']
+        # Partial indexes matching the public list/home query shapes, so the
+        # published filter and default ordering are served without a sort.
+        # The trailing id makes the list key unique for cursor pagination.
+        indexes = [
+            models.Index(
+                fields=['order', '-created_at', '-id'],
+                condition=models.Q(status='published'),
+                name='project_published_idx',
+            ),
+            models.Index(
+                fields=['order', '-created_at', '-id'],
+                condition=models.Q(status='published', featured=True),
+                name='project_featured_idx',
+            ),
+        ]
     
     def save(self, *args, **kwargs):
-        if not self.slug:
-            self.slug = slugify(self.title)
-        super().save(*args, **kwargs)
+        render_cached(self, 'case_study_content', 'case_study_html', 'case_study_html_hash', persist=False)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'case_study_content' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'case_study_html', 'case_study_html_hash'}
+        save_with_slug(self, 'title', lambda: super(Project, self).save(*args, **kwargs))
     
     def get_absolute_url(self):
         return reverse('projects:detail', kwargs={'slug': self.slug})
     
+    @property
+    def cover_image(self):
+        """First image by order, from ``with_cover_image()`` when prefetched"""
+        if hasattr(self, '_cover_images'):
+            return self._cover_images[0] if self._cover_images else None
+        return self.images.order_by('order', 'pk').first()
+    
     def get_case_study_html(self):
-        """Convert markdown to safe HTML"""
-        html = markdown.markdown(
-            self.case_study_content,
-            extensions=['fenced_code', 'codehilite', 'tables', 'toc']
-        )
-        # Sanitize HTML to prevent XSS
-        allowed_tags = [
-            'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
-            'strong', 'em', 'a', 'ul', 'ol', 'li',
-            'blockquote', 'code', 'pre', 'hr', 'br',
-            'table', 'thead', 'tbody', 'tr', 'th', 'td',
-            'img', 'div', 'span'
-        ]
-        allowed_attrs = {
-            'a': ['href', 'title'],
-            'img': ['src', 'alt', 'title'],
-            'code': ['class'],
-            'div': ['class'],
-            'span': ['class'],
-        }
-        return bleach.clean(html, tags=allowed_tags, attributes=allowed_attrs)
+        """Return the stored HTML, re-rendering it if the source changed"""
+        return render_cached(self, 'case_study_content', 'case_study_html', 'case_study_html_hash')
     
     def __str__(self):
         return self.title
@@ -95,11 +114,20 @@ class ProjectImage(models.Model):
     """Screenshots/images for projects"""
     project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='images')
     image = models.ImageField(upload_to='projects/%Y/%m/')
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     caption = models.CharField(max_length=200, blank=True)
     order = models.IntegerField(default=0)
     
     class Meta:
         ordering = ['order']
+        indexes = [
+            models.Index(fields=['project', 'order'], name='projectimage_order_idx'),
+        ]
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # After saving, so a new upload has its final storage name
+        derivatives_cached(self, 'image', 'image_variants')
     
     def __str__(self):
         return f"{self.project.title} - Image {self.order}"
@@ -0,0 +1,126 @@
+"""
+Projects signal handlers
+Evict cached pages that display a project, its images or its tech stack,
+and keep the search index in step with published projects
+"""
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from core import search
+from core.cache import bump
+from .models import Project, ProjectImage, TechStack
+
+
+def project_page_tags(project_id, status, featured):
+    """Cache tags of the public pages showing a project in the given state"""
+    if status != 'published':
+        return set()
+    tags = {f'project:{project_id}', 'project-list'}
+    if featured:
+        tags.add('featured-projects')
+    return tags
+
+
+def evict_projects(queryset):
+    tags = set()
+    for project in queryset.values('pk', 'status', 'featured'):
+        tags |= project_page_tags(project['pk'], project['status'], project['featured'])
+    bump(*tags)
+
+
+@receiver(pre_save, sender=Project)
+def remember_project_pages(sender, instance, **kwargs):
+    # Pages showing the project before this save must be evicted as well,
+    # e.g. when it is unpublished or unfeatured.
+    instance._previous_page_tags = set()
+    if instance.pk:
+        previous = Project.objects.filter(pk=instance.pk).values('status', 'featured').first()
+        if previous:
+            instance._previous_page_tags = project_page_tags(instance.pk, **previous)
+
+
+@receiver(post_save, sender=Project)
+def evict_project_pages(sender, instance, **kwargs):
+    tags = project_page_tags(instance.pk, instance.status, instance.featured)
+    bump(*tags, *getattr(instance, '_previous_page_tags', ()))
+
+
+@receiver(post_delete, sender=Project)
+def evict_deleted_project_pages(sender, instance, **kwargs):
+    bump(*project_page_tags(instance.pk, instance.status, instance.featured))
+
+
+@receiver(post_save, sender=ProjectImage)
+@receiver(post_delete, sender=ProjectImage)
+def evict_project_image_pages(sender, instance, **kwargs):
+    evict_projects(Project.objects.filter(pk=instance.project_id))
+
+
+@receiver(post_save, sender=TechStack)
+@receiver(pre_delete, sender=TechStack)
+def evict_tech_stack_pages(sender, instance, **kwargs):
+    evict_projects(instance.projects.all())
+
+
+@receiver(post_save, sender=TechStack)
+@receiver(post_delete, sender=TechStack)
+def bump_tech_stack(sender, instance, **kwargs):
+    # After the change, so a reload can't cache the old set as current
+    bump('tech-stack')
+
+
+@receiver(m2m_changed, sender=Project.tech_stack.through)
+def evict_project_tech_stack_pages(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        evict_projects(Project.objects.filter(pk=instance.pk))
+    elif action == 'pre_clear':
+        evict_projects(instance.projects.all())
+    else:
+        evict_projects(Project.objects.filter(pk__in=pk_set))
+
+
+def reindex_projects(queryset):
+    for project in queryset:
+        search.index_project(project)
+
+
+@receiver(post_save, sender=Project)
+def index_project(sender, instance, **kwargs):
+    search.index_project(instance)
+
+
+@receiver(post_delete, sender=Project)
+def unindex_project(sender, instance, **kwargs):
+    search.remove('project', instance.pk)
+
+
+@receiver(post_save, sender=TechStack)
+def reindex_tech_stack_projects(sender, instance, **kwargs):
+    reindex_projects(instance.projects.all())
+
+
+@receiver(pre_delete, sender=TechStack)
+def remember_tech_stack_projects(sender, instance, **kwargs):
+    instance._project_ids = list(instance.projects.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=TechStack)
+def reindex_deleted_tech_stack_projects(sender, instance, **kwargs):
+    reindex_projects(Project.objects.filter(pk__in=getattr(instance, '_project_ids', [])))
+
+
+@receiver(m2m_changed, sender=Project.tech_stack.through)
+def reindex_project_tech_stack(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        # Cleared projects are unreachable from the tech item afterwards
+        instance._project_ids = list(instance.projects.values_list('pk', flat=True))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        search.index_project(instance)
+    elif action == 'post_clear':
+        reindex_projects(Project.objects.filter(pk__in=getattr(instance, '_project_ids', [])))
+    else:
+        reindex_projects(Project.objects.filter(pk__in=pk_set))
@@ -0,0 +1,93 @@
+"""
+Projects tests
+"""
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.testing import QueryPlanMixin, public_site_settings
+
+from .models import Project, ProjectImage, TechStack
+from .views import ProjectListView
+
+
+class ProjectIndexTests(QueryPlanMixin, TestCase):
+    """Public project queries are served from the partial indexes"""
+
+    def test_project_list_uses_published_index(self):
+        self.assertUsesIndex(ProjectListView().get_queryset(), 'project_published_idx')
+
+    def test_home_featured_projects_use_featured_index(self):
+        queryset = Project.objects.filter(status='published', featured=True)[:3]
+        self.assertUsesIndex(queryset, 'project_featured_idx')
+
+
+@override_settings(PAGE_CACHE_ENABLED=True)
+@public_site_settings
+class ProjectPageCacheTests(TestCase):
+    """Cached project pages follow images and tech stack changes"""
+
+    def setUp(self):
+        cache.clear()
+        self.project = Project.objects.create(title='Cached', short_description='text', status='published')
+        self.other = Project.objects.create(title='Other', short_description='text', status='published')
+        for project in (self.project, self.other):
+            self.client.get(project.get_absolute_url())
+
+    def assertCached(self, project, cached=True):
+        with self.assertNumQueries(0) if cached else self.assertNumQueries(3):
+            self.client.get(project.get_absolute_url())
+
+    def test_new_image_evicts_its_project(self):
+        ProjectImage.objects.create(project=self.project, image='projects/shot.png')
+        self.assertCached(self.project, cached=False)
+        self.assertCached(self.other)
+
+    def test_tech_stack_rename_evicts_projects_using_it(self):
+        tech = TechStack.objects.create(name='Django')
+        self.project.tech_stack.add(tech)
+        self.client.get(self.project.get_absolute_url())
+        tech.name = 'Django 5'
+        tech.save()
+        self.assertCached(self.project, cached=False)
+        self.assertCached(self.other)
+
+
+@public_site_settings
+class ProjectCoverImageTests(TestCase):
+    """Project cards read a prefetched cover image"""
+
+    def create_projects(self, count):
+        tech = TechStack.objects.create(name=f'Tech {count}')
+        for index in range(count):
+            project = Project.objects.create(
+                title=f'Project {count}-{index}', short_description='text', status='published', featured=True,
+            )
+            project.tech_stack.add(tech)
+            ProjectImage.objects.create(project=project, image=f'projects/{index}-b.png', order=2)
+            ProjectImage.objects.create(project=project, image=f'projects/{index}-a.png', order=1)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries.captured_queries)
+
+    def test_cover_image_is_first_by_order(self):
+        self.create_projects(1)
+        project = Project.objects.with_cover_image().get()
+        with self.assertNumQueries(0):
+            self.assertEqual(project.cover_image.image.name, 'projects/0-a.png')
+        self.assertEqual(Project.objects.get().cover_image.image.name, 'projects/0-a.png')
+
+    def test_list_query_count_is_independent_of_page_size(self):
+        self.create_projects(2)
+        small = self.count_queries('/projects/')
+        self.create_projects(10)
+        self.assertEqual(self.count_queries('/projects/'), small)
+
+    def test_home_query_count_is_independent_of_images(self):
+        self.create_projects(1)
+        single = self.count_queries('/')
+        self.create_projects(2)
+        self.assertEqual(self.count_queries('/'), single)
@@ -2,11 +2,19 @@
 Projects URL configuration
 """
 from django.urls import path
+from core.routes import with_async_views
 from . import views
 
 app_name = 'projects'
 
 urlpatterns = [
     path('', views.ProjectListView.as_view(), name='list'),
+    path('page/<int:page>/', views.ProjectListView.as_view(), name='list'),
     path('<slug:slug>/', views.ProjectDetailView.as_view(), name='detail'),
 ]
+
+# Same routes with the async views, for config.urls_async
+async_urlpatterns = with_async_views(urlpatterns, {
+    views.ProjectListView: views.AsyncProjectListView,
+    views.ProjectDetailView: views.AsyncProjectDetailView,
+})
@@ -2,25 +2,56 @@
 Projects views
 """
 from django.views.generic import ListView, DetailView
+from core.asyncviews import AsyncDetailMixin, AsyncListMixin
+from core.cache import PageCacheMixin, get_generations
+from core.conditional import ConditionalDetailMixin, ConditionalGetMixin, make_etag
+from core.pagination import CursorPaginationMixin
 from .models import Project
 
 
-class ProjectListView(ListView):
+class ProjectListView(ConditionalGetMixin, PageCacheMixin, CursorPaginationMixin, ListView):
     """Display all published projects"""
     model = Project
     template_name = 'projects/project_list.html'
     context_object_name = 'projects'
     paginate_by = 12
+    cursor_ordering = ('order', '-created_at', '-id')
     
     def get_queryset(self):
-        return Project.objects.filter(status='published').prefetch_related('tech_stack', 'images')
+        return Project.objects.filter(status='published').prefetch_related('tech_stack').with_cover_image()
+    
+    def get_validators(self):
+        # project-list is bumped by any change to a listed project, its
+        # images or tech stack, so no query is needed; no Last-Modified, as
+        # a removal would not move it forward
+        generations = get_generations(self.get_cache_tags())
+        return None, make_etag(self.kwargs.get('page'), self.request.GET.urlencode(), generations)
+    
+    def get_cache_tags(self):
+        return ['project-list']
 
 
-class ProjectDetailView(DetailView):
+class ProjectDetailView(ConditionalDetailMixin, PageCacheMixin, DetailView):
     """Display project detail with case study"""
     model = Project
     template_name = 'projects/project_detail.html'
     context_object_name = 'project'
+    object_prefetches = ('tech_stack', 'images')
     
     def get_queryset(self):
-        return Project.objects.filter(status='published').prefetch_related('tech_stack', 'images')
+        return Project.objects.filter(status='published')
+    
+    def get_object_validators(self, project):
+        generations = get_generations([f'project:{project.pk}'])
+        return project.updated_at, make_etag(project.pk, project.updated_at, generations)
+    
+    def get_cache_tags(self):
+        return [f'project:{self.object.pk}']
+
+
+class AsyncProjectListView(AsyncListMixin, ProjectListView):
+    """ProjectListView for ASGI"""
+
+
+class AsyncProjectDetailView(AsyncDetailMixin, ProjectDetailView):
+    """ProjectDetailView for ASGI"""